@@ -1,33 +1,157 @@
-from typing import List
+import asyncio
+import json
+import time
+from contextlib import aclosing, suppress
+from typing import Any, AsyncIterator, Awaitable, Dict, List, Literal, Optional, Tuple, TypeVar, Union
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.schemas.ask import AskRequest, AskResponse, SubAnalysis
+from app.core.config import get_settings
+from app.db.executor import db_request_scope
+from app.db.query_control import QueryTimeoutError
+from app.db.session import get_read_db
+from app.schemas.ask import AskRequest, AskResponse, AskRowsPage, SubAnalysis
 from app.schemas.analysis import ChartSpec
-from app.services.router_service import route_and_run
+from app.services.po_open_report import make_po_open_config
+from app.services.router_service import route_and_run_events
 from app.services.po_open_mock import get_mock_po_open_payload
+from app.services.sql_bi_service import ColumnarRows, fetch_result_page
+
+try:
+    import orjson
+except ImportError:  # orjson 미설치 시 표준 json 으로 직렬화
+    orjson = None
+
+settings = get_settings()
 
 router = APIRouter()
 
+T = TypeVar("T")
+
+PO_MOCK_KEYWORDS = ["구매오더", "미결", "po open", "@5d@"]
+
+# /ask/stream 에서 rows 를 나눠 보내는 단위
+STREAM_ROWS_CHUNK = 100
+
+# /ask 처리 중 클라이언트 연결 종료 확인 간격(초)
+DISCONNECT_POLL_SECONDS = 0.5
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _run_until_disconnect(request: Request, work: Awaitable[T]) -> T:
+    """
+    work 를 실행하다가 클라이언트 연결이 끊기면 취소한다 (DB_CANCEL_ON_DISCONNECT).
+    취소되면 work 안의 db_request_scope 가 실행 중인 쿼리를 KILL QUERY 하고 ClientDisconnected 를 던진다.
+    """
+    task = asyncio.ensure_future(work)
+    if not settings.DB_CANCEL_ON_DISCONNECT:
+        return await task
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                with suppress(asyncio.CancelledError):
+                    await task
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+def _insight_fields(insight_obj: Any) -> Tuple[Optional[str], Any, Optional[Dict[str, Any]], Optional[str]]:
+    """
+    insight_obj(dict 또는 InsightResult 류)에서 (insight_text, chart_spec, kpis, report_text) 추출
+    """
+    if not insight_obj:
+        return None, None, None, None
+    if isinstance(insight_obj, dict):
+        return (
+            insight_obj.get("insight_text"),
+            insight_obj.get("chart_spec"),
+            insight_obj.get("kpis"),
+            insight_obj.get("report_text"),
+        )
+    return (
+        getattr(insight_obj, "insight_text", None),
+        getattr(insight_obj, "chart_spec", None),
+        getattr(insight_obj, "kpis", None),
+        getattr(insight_obj, "report_text", None),
+    )
+
+
+def _dump_json(payload: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS, default=str)
+    return json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+
+
+def _ask_response(
+    req: AskRequest,
+    *,
+    rows: Any,
+    chart_spec: Optional[ChartSpec],
+    sub_analyses: List[SubAnalysis],
+    **fields: Any,
+) -> Union[AskResponse, Response]:
+    """
+    row_format="columnar" 면 rows 를 {"columns": [...], "data": [[...]]} 로 보내고,
+    AskResponse(행별 pydantic 검증)를 거치지 않고 orjson 으로 바로 직렬화한다.
+    """
+    if req.row_format == "columnar":
+        table = rows if isinstance(rows, ColumnarRows) else ColumnarRows.from_records(rows or [])
+        payload = {
+            "question": req.question,
+            **fields,
+            "rows": table.to_payload(),
+            "row_count": len(table),
+            "chart_spec": _jsonable(chart_spec),
+            "sub_analyses": _jsonable(sub_analyses),
+        }
+        payload["kpis"] = payload.get("kpis") or {}
+        return Response(content=_dump_json(payload), media_type="application/json")
+
+    if isinstance(rows, ColumnarRows):
+        rows = rows.to_records()
+    return AskResponse(
+        question=req.question,
+        rows=rows or [],
+        row_count=len(rows or []),
+        chart_spec=chart_spec,
+        sub_analyses=sub_analyses,
+        **fields,
+    )
+
 
 @router.post("/ask", response_model=AskResponse)
-async def ask_endpoint(req: AskRequest, db: Session = Depends(get_db)) -> AskResponse:
+async def ask_endpoint(req: AskRequest, request: Request, db: Session = Depends(get_read_db)) -> Union[AskResponse, Response]:
     """
     자연어 질문을 받아 BI/리포트/차트/서브 분석/리포트 텍스트를 반환한다.
     """
     lower_q = (req.question or "").lower()
 
+    # 기간/기준일을 지정한 요청은 목업 대신 실제 리포트로 처리
+    has_period = any(v is not None for v in (req.start_date, req.end_date, req.base_date))
+    try:
+        po_open_config = make_po_open_config(req.start_date, req.end_date, req.base_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     # 구매오더 미결 키워드면 목업으로 즉시 응답
-    if any(k in lower_q for k in ["구매오더", "미결", "po open", "@5d@"]):
+    if not has_period and any(k in lower_q for k in PO_MOCK_KEYWORDS):
         mock = get_mock_po_open_payload(req.question)
-        return AskResponse(
-            question=req.question,
+        return _ask_response(
+            req,
             action=mock.get("action", "po_open_mock"),
             sql=mock.get("sql"),
             rows=mock.get("rows", []),
-            row_count=len(mock.get("rows", [])),
             insight=mock.get("insight"),
             report_text=mock.get("report_text"),
             chart_spec=ChartSpec(**mock["chart_spec"]) if mock.get("chart_spec") else None,
@@ -35,9 +159,38 @@ async def ask_endpoint(req: AskRequest, db: Session = Depends(get_db)) -> AskRes
             kpis=mock.get("kpis") or {},
         )
 
-    # 기본 라우팅 실행
+    # 기본 라우팅 실행 (page 이벤트로 페이지네이션 핸들도 같이 받는다)
+    async def run_route() -> Tuple[Dict[str, Any], Any]:
+        page: Dict[str, Any] = {}
+        result = None
+        async with db_request_scope(), aclosing(
+            route_and_run_events(
+                db,
+                req.question,
+                po_open_config,
+                columnar=req.row_format == "columnar",
+                fast_insight_mode=req.insight_mode == "fast",
+            )
+        ) as events:
+            async for event, data in events:
+                if event == "page":
+                    page = data
+                elif event == "result":
+                    result = data
+        if result is None:
+            raise RuntimeError("route_and_run_events 가 result 이벤트 없이 종료되었습니다.")
+        return page, result
+
     try:
-        action, sql, rows, insight_obj, sub_analyses = await route_and_run(db, req.question)
+        page, result = await _run_until_disconnect(request, run_route())
+        action, sql, rows, insight_obj, sub_analyses = result
+    except ClientDisconnected:
+        print(f"[ask_endpoint] client disconnected, cancelled: {req.question}")
+        # 응답을 받을 클라이언트가 없음 (nginx 관례의 499)
+        return Response(status_code=499)
+    except QueryTimeoutError as e:
+        print("[ask_endpoint] query timeout:", e)
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         import traceback
         print("[ask_endpoint] route_and_run error:", e)
@@ -47,22 +200,7 @@ async def ask_endpoint(req: AskRequest, db: Session = Depends(get_db)) -> AskRes
     rows = rows or []
     row_count = len(rows)
 
-    insight_text = None
-    chart_spec = None
-    kpis = None
-    report_text = None
-
-    if insight_obj:
-        if isinstance(insight_obj, dict):
-            insight_text = insight_obj.get("insight_text")
-            chart_spec = insight_obj.get("chart_spec")
-            kpis = insight_obj.get("kpis")
-            report_text = insight_obj.get("report_text")
-        else:
-            insight_text = getattr(insight_obj, "insight_text", None)
-            chart_spec = getattr(insight_obj, "chart_spec", None)
-            kpis = getattr(insight_obj, "kpis", None)
-            report_text = getattr(insight_obj, "report_text", None)
+    insight_text, chart_spec, kpis, report_text = _insight_fields(insight_obj)
 
     # chart_spec 정규화
     chart_spec_model = None
@@ -89,14 +227,13 @@ async def ask_endpoint(req: AskRequest, db: Session = Depends(get_db)) -> AskRes
     print("[ask_endpoint] sub_analyses count=", len(norm_sub_analyses))
 
     # PO 키워드인데 report_text 비어 있으면 목업으로 보완
-    if any(k in lower_q for k in ["구매오더", "미결", "po open", "@5d@"]) and report_text is None:
+    if not has_period and any(k in lower_q for k in PO_MOCK_KEYWORDS) and report_text is None:
         mock = get_mock_po_open_payload(req.question)
-        return AskResponse(
-            question=req.question,
+        return _ask_response(
+            req,
             action=mock.get("action", action),
             sql=mock.get("sql", sql),
             rows=mock.get("rows", rows),
-            row_count=len(mock.get("rows", rows)),
             insight=mock.get("insight", insight_text),
             report_text=mock.get("report_text"),
             chart_spec=ChartSpec(**mock["chart_spec"]) if mock.get("chart_spec") else chart_spec_model,
@@ -104,15 +241,183 @@ async def ask_endpoint(req: AskRequest, db: Session = Depends(get_db)) -> AskRes
             kpis=mock.get("kpis") or kpis or {},
         )
 
-    return AskResponse(
-        question=req.question,
+    return _ask_response(
+        req,
         action=action,
         sql=sql,
         rows=rows,
-        row_count=row_count,
         insight=insight_text,
         report_text=report_text,
         chart_spec=chart_spec_model,
         sub_analyses=norm_sub_analyses,
         kpis=kpis or {},
+        query_id=page.get("query_id"),
+        next_cursor=page.get("next_cursor"),
+    )
+
+
+@router.get("/ask/{query_id}/rows", response_model=AskRowsPage)
+async def ask_rows_endpoint(
+    query_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    row_format: Literal["records", "columnar"] = "records",
+    db: Session = Depends(get_read_db),
+) -> Union[AskRowsPage, Response]:
+    """
+    /ask 결과의 다음 페이지. cursor 는 /ask(또는 이전 페이지)의 next_cursor.
+    저장된 SQL 에 LIMIT/OFFSET 을 붙여 해당 구간만 조회한다.
+    """
+    try:
+        async with db_request_scope():
+            table, offset, next_cursor = await fetch_result_page(db, query_id, cursor, limit)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if row_format == "columnar":
+        payload = {
+            "query_id": query_id,
+            "offset": offset,
+            "rows": table.to_payload(),
+            "row_count": len(table),
+            "next_cursor": next_cursor,
+        }
+        return Response(content=_dump_json(payload), media_type="application/json")
+    return AskRowsPage.model_construct(
+        query_id=query_id,
+        offset=offset,
+        rows=table.to_records(),
+        row_count=len(table),
+        next_cursor=next_cursor,
+    )
+
+
+def _sse(event: str, data: Any) -> str:
+    payload = _dump_json(data).decode("utf-8")
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _jsonable(value: Any) -> Any:
+    # pydantic 모델(ChartSpec, SubAnalysis 등)은 dict 로
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _insight_event(insight_obj: Any) -> Dict[str, Any]:
+    insight_text, chart_spec, kpis, report_text = _insight_fields(insight_obj)
+    return {
+        "insight": insight_text,
+        "chart_spec": _jsonable(chart_spec),
+        "kpis": kpis or {},
+        "report_text": report_text,
+    }
+
+
+async def _rows_events(rows: Union[List[Dict[str, Any]], ColumnarRows]) -> AsyncIterator[str]:
+    if isinstance(rows, ColumnarRows):
+        # 컬럼형: 컬럼명은 첫 청크에만 싣는다
+        for offset in range(0, len(rows), STREAM_ROWS_CHUNK):
+            chunk: Dict[str, Any] = {"offset": offset, "data": rows.data[offset:offset + STREAM_ROWS_CHUNK]}
+            if offset == 0:
+                chunk["columns"] = rows.columns
+            yield _sse("rows", chunk)
+        yield _sse("rows_end", {"row_count": len(rows), "columns": rows.columns})
+        return
+    for offset in range(0, len(rows), STREAM_ROWS_CHUNK):
+        chunk = rows[offset:offset + STREAM_ROWS_CHUNK]
+        yield _sse("rows", {"offset": offset, "rows": chunk})
+    yield _sse("rows_end", {"row_count": len(rows)})
+
+
+async def _ask_stream_events(req: AskRequest, db: Session, has_period: bool, po_open_config) -> AsyncIterator[str]:
+    started = time.perf_counter()
+    lower_q = (req.question or "").lower()
+
+    # 구매오더 미결 키워드면 /ask 와 동일하게 목업으로 응답
+    if not has_period and any(k in lower_q for k in PO_MOCK_KEYWORDS):
+        mock = get_mock_po_open_payload(req.question)
+        yield _sse("action", {"action": mock.get("action", "po_open_mock")})
+        yield _sse("sql", {"sql": mock.get("sql")})
+        async for chunk in _rows_events(mock.get("rows", [])):
+            yield chunk
+        yield _sse("insight", {
+            "insight": mock.get("insight"),
+            "chart_spec": mock.get("chart_spec"),
+            "kpis": mock.get("kpis") or {},
+            "report_text": mock.get("report_text"),
+        })
+        yield _sse("sub_analyses", {"sub_analyses": mock.get("sub_analyses", [])})
+        yield _sse("done", {"elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2)})
+        return
+
+    try:
+        # 클라이언트가 끊겨 이 제너레이터가 닫히면 안쪽 파이프라인도 바로 닫는다 (aclosing)
+        async with db_request_scope(), aclosing(
+            route_and_run_events(
+                db,
+                req.question,
+                po_open_config,
+                stream_insight=True,
+                columnar=req.row_format == "columnar",
+                fast_insight_mode=req.insight_mode == "fast",
+            )
+        ) as events:
+            async for event, data in events:
+                if event == "action":
+                    yield _sse("action", {"action": data})
+                elif event == "sql":
+                    yield _sse("sql", {"sql": data})
+                elif event == "rows":
+                    async for chunk in _rows_events(data or []):
+                        yield chunk
+                elif event == "page":
+                    yield _sse("page", data)
+                elif event == "chart":
+                    yield _sse("chart", data)
+                elif event == "insight_delta":
+                    yield _sse("insight_delta", {"text": data})
+                elif event == "insight":
+                    yield _sse("insight", _insight_event(data))
+                elif event == "sub_analyses":
+                    yield _sse("sub_analyses", {"sub_analyses": _jsonable(data or [])})
+    except Exception as e:
+        import traceback
+        print("[ask_stream] route_and_run_events error:", e)
+        print(traceback.format_exc())
+        # 스트림은 이미 200 으로 시작됐으므로 에러도 이벤트로 알린다
+        yield _sse("error", {"detail": str(e)})
+        return
+
+    yield _sse("done", {"elapsed_ms": round((time.perf_counter() - started) * 1000.0, 2)})
+
+
+@router.post("/ask/stream")
+async def ask_stream_endpoint(req: AskRequest, db: Session = Depends(get_read_db)) -> StreamingResponse:
+    """
+    /ask 의 SSE(Server-Sent Events) 버전. 단계가 끝나는 대로 이벤트를 보낸다.
+      action → sql → rows(STREAM_ROWS_CHUNK 단위) → rows_end → page(뒤에 행이 더 있을 때) →
+      chart(로컬에서 정한 chart_spec/kpis, 인사이트 LLM 전에) → insight_delta(인사이트 모델 토큰) → insight(최종 insight/chart_spec/kpis) →
+      sub_analyses → done   (실패 시 error)
+    """
+    has_period = any(v is not None for v in (req.start_date, req.end_date, req.base_date))
+    try:
+        po_open_config = make_po_open_config(req.start_date, req.end_date, req.base_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        _ask_stream_events(req, db, has_period, po_open_config),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            # nginx 등 프록시 버퍼링 방지
+            "X-Accel-Buffering": "no",
+        },
     )
@@ -0,0 +1,95 @@
+# app/api/v1/endpoints/metrics.py
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter
+
+import make_order2
+from app.db.executor import get_db_executor_stats
+from app.db.pool_metrics import get_db_pool_stats
+from app.db.query_control import get_query_control_stats
+from app.services.bom_graph import bom_graph_cache, get_bom_graph_stats
+from app.services.reference_snapshot import get_reference_snapshot_stats, reference_snapshots
+from app.services.result_cache import get_result_cache_stats
+from app.services.result_pages import get_query_page_stats
+from app.services.router_service import get_pipeline_stats
+from app.services.schema_catalog import get_schema_catalog_stats, refresh_schema_catalog, schema_catalog
+from app.services.schema_index import get_schema_index_stats
+from app.services.sql_cache import get_sql_cache_stats, invalidate_sql_cache
+from app.services.sql_guard import get_sql_guard_stats
+from app.services.sql_repair import get_sql_repair_stats
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    운영 지표 조회용 엔드포인트 (부하테스트/튜닝용).
+    GET /api/v1/metrics
+    """
+    return {
+        "db_executor": get_db_executor_stats(),
+        "db_pool": get_db_pool_stats(),
+        "db_statements": get_query_control_stats(),
+        "sql_cache": get_sql_cache_stats(),
+        "result_cache": get_result_cache_stats(),
+        "result_pages": get_query_page_stats(),
+        "pipeline": get_pipeline_stats(),
+        "schema_index": get_schema_index_stats(),
+        "schema_catalog": get_schema_catalog_stats(),
+        "sql_guard": get_sql_guard_stats(),
+        "sql_repair": get_sql_repair_stats(),
+        "reference_snapshots": get_reference_snapshot_stats(),
+        "bom_graph": get_bom_graph_stats(),
+        "po_fetch": make_order2.get_po_fetch_stats(),
+    }
+
+
+@router.post("/cache/sql/invalidate")
+async def invalidate_sql_cache_endpoint() -> Dict[str, Any]:
+    """
+    SQL 생성 캐시 전체 삭제 (스키마 문서/SQL 프롬프트 변경 후 호출).
+    POST /api/v1/cache/sql/invalidate
+    """
+    invalidate_sql_cache()
+    return {"ok": True, "sql_cache": get_sql_cache_stats()}
+
+
+@router.get("/schema")
+async def get_schema_catalog() -> Dict[str, Any]:
+    """
+    캐시된 스키마 카탈로그 (테이블/컬럼/타입/행 수). DB 조회 없음.
+    GET /api/v1/schema
+    """
+    return {"schema_catalog": get_schema_catalog_stats(), "tables": schema_catalog.describe()}
+
+
+@router.post("/schema/refresh")
+async def refresh_schema_catalog_endpoint() -> Dict[str, Any]:
+    """
+    스키마 카탈로그 즉시 갱신 (테이블/컬럼 추가 후 주기를 기다리지 않을 때).
+    POST /api/v1/schema/refresh
+    """
+    changed = await refresh_schema_catalog()
+    return {"ok": True, "changed": changed, "schema_catalog": get_schema_catalog_stats()}
+
+
+@router.get("/reference")
+async def get_reference_snapshots() -> Dict[str, Any]:
+    """
+    기준정보 스냅샷(bom, standard_info, purchase order) 상태: 행 수/메모리/버전/컬럼 타입. DB 조회 없음.
+    GET /api/v1/reference
+    """
+    return {"reference_snapshots": get_reference_snapshot_stats(), "tables": reference_snapshots.describe()}
+
+
+@router.post("/reference/refresh")
+async def refresh_reference_snapshots(table: Optional[str] = None) -> Dict[str, Any]:
+    """
+    기준정보 스냅샷 삭제 → 다음 사용 시 다시 읽음 (버전 확인 주기를 기다리지 않을 때).
+    POST /api/v1/reference/refresh?table=bom
+    """
+    reference_snapshots.refresh(table)
+    if table in (None, "bom"):
+        bom_graph_cache.invalidate()
+    return {"ok": True, "reference_snapshots": get_reference_snapshot_stats()}
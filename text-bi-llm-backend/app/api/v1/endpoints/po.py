@@ -1,27 +1,49 @@
+import asyncio
+import json
+import threading
+from contextlib import suppress
+
 from fastapi import APIRouter, HTTPException
-from app.schemas.po import GeneratePORequest
+from app.db.executor import run_in_db
+from app.schemas.po import GeneratePORequest, RequirementsRequest
 import make_order2
 from order_pdf import save_po_pdf
 import traceback
 import logging
 import os
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 
 
 router = APIRouter()
 
 PO_BASE_DIR = r"C:/po_gen"
 
+def _pdf_result(date: str, pdf_infos: list) -> dict:
+    ok_infos = [info for info in pdf_infos if info.get("ok")]
+    failed = [info for info in pdf_infos if not info.get("ok")]
+    message = f"{len(ok_infos)}건 발주서 생성 완료 (서버: C:/po_gen)"
+    if failed:
+        message += f", {len(failed)}건 실패"
+    return {
+        "ok": bool(ok_infos),
+        "date": date,
+        "count": len(ok_infos),
+        "pdf_infos": ok_infos,
+        "failed": failed,
+        "message": message,
+    }
+
+
 @router.post("/generate_po")
 async def generate_po(req: GeneratePORequest):
     """
-    1) make_order2.generate_po_docs()로 발주 데이터 생성
-    2) order_pdf.save_po_pdf()로 PDF 생성
-    3) 생성 건수 / 파일 정보만 리턴
+    1) make_order2.generate_po_docs()로 발주 데이터 생성 (DB 스레드풀)
+    2) order_pdf.save_po_pdf()로 업체별 PDF 동시 생성 (이벤트 루프 밖 스레드에서)
+    3) 생성 건수 / 파일 정보 + 실패한 업체 목록 리턴
     """
     try:
         print(f"[API] generate_po 호출, date = {req.date}")
-        po_docs = make_order2.generate_po_docs(req.date)
+        po_docs = await run_in_db(make_order2.generate_po_docs, req.date)
         print(f"[API] generate_po_docs 결과 개수: {len(po_docs)}")
     except Exception as e:
         logging.error("발주 데이터 생성 중 오류", exc_info=True)
@@ -40,7 +62,7 @@ async def generate_po(req: GeneratePORequest):
         }
 
     try:
-        pdf_infos = save_po_pdf(po_docs)
+        pdf_infos = await asyncio.to_thread(save_po_pdf, po_docs, PO_BASE_DIR)
         print(f"[API] save_po_pdf 완료, PDF 개수: {len(pdf_infos)}")
     except Exception as e:
         logging.error("PDF 생성 중 오류", exc_info=True)
@@ -49,13 +71,108 @@ async def generate_po(req: GeneratePORequest):
             detail=f"PDF 생성 중 오류: {e}",
         )
 
-    return {
-        "ok": True,
-        "date": req.date,
-        "count": len(pdf_infos),
-        "pdf_infos": pdf_infos,
-        "message": f"{len(pdf_infos)}건 발주서 생성 완료 (서버: C:/po_gen)",
-    }
+    result = _pdf_result(req.date, pdf_infos)
+    if not result["ok"]:
+        # 한 건도 못 만들었으면 예전처럼 500
+        raise HTTPException(
+            status_code=500,
+            detail=f"PDF 생성 중 오류: {result['failed'][0].get('error')}",
+        )
+    return result
+
+
+def _sse(event: str, data) -> str:
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+async def _generate_po_events(date: str):
+    try:
+        po_docs = await run_in_db(make_order2.generate_po_docs, date)
+    except Exception as e:
+        logging.error("발주 데이터 생성 중 오류", exc_info=True)
+        yield _sse("error", {"detail": f"발주 데이터 생성 중 오류: {e}"})
+        return
+
+    yield _sse("po_docs", {"date": date, "count": len(po_docs)})
+    if not po_docs:
+        yield _sse("done", {"ok": False, "date": date, "count": 0, "pdf_infos": [], "message": "발주 대상이 없습니다."})
+        return
+
+    # save_po_pdf 의 on_progress(save_po_pdf 를 돌리는 스레드) → 이벤트 루프의 큐
+    loop = asyncio.get_running_loop()
+    progress: asyncio.Queue = asyncio.Queue()
+
+    def on_progress(done: int, total: int, info: dict) -> None:
+        loop.call_soon_threadsafe(progress.put_nowait, {"done": done, "total": total, **info})
+
+    stop = threading.Event()
+    task = asyncio.create_task(asyncio.to_thread(save_po_pdf, po_docs, PO_BASE_DIR, None, on_progress, stop))
+    get = None
+    try:
+        # 끝난 뒤에도 큐에 남은 진행 보고는 모두 보낸다
+        while not task.done() or not progress.empty():
+            if get is None:
+                get = asyncio.ensure_future(progress.get())
+            await asyncio.wait({get, task}, return_when=asyncio.FIRST_COMPLETED)
+            if get.done():
+                yield _sse("pdf", get.result())
+                get = None
+        pdf_infos = await task
+    except Exception as e:
+        logging.error("PDF 생성 중 오류", exc_info=True)
+        yield _sse("error", {"detail": f"PDF 생성 중 오류: {e}"})
+        return
+    finally:
+        # 클라이언트가 끊겨 스트림이 닫혀도 대기 중인 get 과 렌더 작업을 남기지 않는다:
+        # 아직 시작 안 한 업체는 건너뛰게 하고, 이미 돌고 있는 wkhtmltopdf 가 끝날 때까지 기다린다
+        stop.set()
+        if get is not None:
+            get.cancel()
+            with suppress(asyncio.CancelledError):
+                await get
+        if not task.done():
+            await asyncio.gather(task, return_exceptions=True)
+    yield _sse("done", _pdf_result(date, pdf_infos))
+
+
+@router.post("/generate_po/stream")
+async def generate_po_stream(req: GeneratePORequest) -> StreamingResponse:
+    """
+    /generate_po 의 SSE 버전. 업체별 PDF 가 끝나는 대로 진행 상황을 보낸다.
+      po_docs(발주 대상 업체 수) → pdf(done/total + 업체별 결과, 끝난 순서) → done(/generate_po 와 같은 본문)
+      (실패 시 error)
+    """
+    return StreamingResponse(
+        _generate_po_events(req.date),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+@router.post("/requirements")
+async def component_requirements(req: RequirementsRequest):
+    """
+    계획(date)의 완성품 수요를 BOM 전 레벨로 전개한 구성품별 필요수량.
+    BOM 그래프는 메모리 캐시(bom 테이블이 바뀔 때만 다시 읽음)라 all_plan 조회 외에는 ms 단위.
+    """
+    try:
+        return await run_in_db(
+            make_order2.component_requirements,
+            req.date,
+            basis=req.basis,
+            plant=req.plant,
+            procurement=req.procurement,
+            limit=req.limit,
+        )
+    except Exception as e:
+        logging.error("소요량 전개 중 오류", exc_info=True)
+        raise HTTPException(
+            status_code=500,
+            detail=f"소요량 전개 중 오류: {e}",
+        )
 
 @router.get("/download_po")
 async def download_po(file_name: str):
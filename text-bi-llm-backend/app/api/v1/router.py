@@ -1,10 +1,12 @@
 # app/api/v1/router.py
 
 from fastapi import APIRouter
-from .endpoints import ask, po
+from .endpoints import ask, metrics, po
 
 api_router = APIRouter(prefix="/api/v1")
 
 # POST /api/v1/ask
 api_router.include_router(ask.router, tags=["ask"])
-api_router.include_router(po.router,  prefix="/po",  tags=["po"]) 
\ No newline at end of file
+api_router.include_router(po.router,  prefix="/po",  tags=["po"])
+# GET /api/v1/metrics
+api_router.include_router(metrics.router, tags=["metrics"])
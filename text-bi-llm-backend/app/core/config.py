@@ -1,7 +1,8 @@
 # app/core/config.py
 
+from datetime import date
 from functools import lru_cache
-from typing import List
+from typing import Dict, List, Literal, Optional
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl
 
@@ -17,6 +18,16 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: str
     OPENAI_BASE_URL: str = "https://api.openai.com/v1"
 
+    # HTTP 커넥션 풀 (LLMClient 가 앱 수명 동안 하나의 AsyncClient 를 재사용)
+    OPENAI_HTTP2: bool = False                  # True 면 HTTP/2 사용 (httpx[http2] 필요)
+    OPENAI_MAX_CONNECTIONS: int = 20
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    OPENAI_KEEPALIVE_EXPIRY: float = 30.0       # 초
+    OPENAI_CONNECT_TIMEOUT: float = 10.0        # 초
+    OPENAI_TIMEOUT: float = 60.0                # 초 (기본 read timeout)
+    # 모델별 read timeout 오버라이드. 예) OPENAI_MODEL_TIMEOUTS='{"o1-mini": 120}'
+    OPENAI_MODEL_TIMEOUTS: Dict[str, float] = {}
+
     # (구 버전 호환용)
     OPENAI_BI_MODEL: str = "gpt-4.1-mini"
 
@@ -33,8 +44,164 @@ class Settings(BaseSettings):
     # 3) 보고서/서머리 생성
     OPENAI_REPORT_MODEL: str = "o1-mini"
 
+    # ========= 인사이트 프롬프트 (app/services/insight_service.py) =========
+    # True 면 결과 행 대신 로컬 통계 요약(app/services/result_profile.py) + 예시 행만 보낸다 (kpis 로도 반환)
+    INSIGHT_PROFILE_ENABLED: bool = True
+    # 통계 요약과 함께 보내는 예시 행 수 (대표 수치 최대/최소 행은 추가로 포함)
+    INSIGHT_EXEMPLAR_ROWS: int = 5
+    # 범주 빈도/비중 Top-K
+    INSIGHT_PROFILE_TOP_K: int = 5
+    # True 면 chart_spec 을 통계로 로컬에서 정하고(app/services/local_insight.py) LLM 은 insight_text 만 쓴다
+    INSIGHT_LOCAL_CHART_ENABLED: bool = True
+
+    # ========= /ask 파이프라인 (app/services/router_service.py) =========
+    # True 면 Router LLM 과 SQL 생성 LLM 을 동시에 시작하고,
+    # 라우팅 결과가 sql_bi 가 아니면 SQL 생성 호출을 취소/폐기한다.
+    ROUTER_SPECULATIVE_SQL: bool = True
+    # 로컬 분류기(app/services/local_router.py)가 이 확신도 이상이면 Router LLM 생략
+    ROUTER_LOCAL_ENABLED: bool = True
+    ROUTER_LOCAL_MIN_CONFIDENCE: float = 0.8
+    # LLM 라우팅 결과 적재 + n-gram 모델 학습용 JSONL ({"question", "action"}). None 이면 규칙만 사용
+    ROUTER_LOCAL_TRAINING_PATH: Optional[str] = None
+    # 새로 적재된 LLM 라우팅 결과가 이 건수 이상 쌓이면 n-gram 모델을 다시 만든다 (0 이면 끔)
+    ROUTER_LOCAL_RELOAD_EVERY: int = 50
+    # 적재 건수가 적어도 마지막 재학습 후 이 시간(초)이 지났으면 다음 적재 때 다시 만든다
+    ROUTER_LOCAL_RELOAD_INTERVAL_SECONDS: float = 600.0
+
+    # ========= 스키마 문서 검색 (app/services/schema_index.py) =========
+    # True 면 질문과 관련된 [TABLE: ...] 섹션 상위 K개만 SQL 프롬프트에 넣는다
+    SQL_SCHEMA_RETRIEVAL_ENABLED: bool = True
+    SQL_SCHEMA_TOP_K: int = 3
+    # 1위 테이블 점수 대비 이 비율 미만인 테이블은 top-k 안이어도 제외
+    SQL_SCHEMA_MIN_RELATIVE_SCORE: float = 0.3
+    # 로컬 임베딩 모델명 (sentence-transformers 필요). None 이면 키워드/컬럼명 점수만 사용
+    SQL_SCHEMA_EMBEDDING_MODEL: Optional[str] = None
+
+    # ========= 스키마 카탈로그 (app/services/schema_catalog.py) =========
+    # information_schema 를 시작 시 + 주기적으로 읽어 스키마 문서를 실제 DB 기준으로 다시 만든다
+    SCHEMA_CATALOG_ENABLED: bool = True
+    SCHEMA_CATALOG_REFRESH_SECONDS: float = 600.0   # 0 이면 시작 시 1회만
+    # 정적 문서에 설명이 없는 테이블도 (타입 정보만으로) 포함할지
+    SCHEMA_CATALOG_INCLUDE_UNDOCUMENTED: bool = False
+    SCHEMA_CATALOG_EXCLUDE_TABLES: List[str] = ["po_open_daily_agg", "po_open_daily_agg_state"]
+
+    # ========= SQL 생성 캐시 (app/services/sql_cache.py) =========
+    SQL_CACHE_BACKEND: str = "memory"           # memory | sqlite | redis | none
+    SQL_CACHE_MAX_ENTRIES: int = 1000
+    SQL_CACHE_TTL_SECONDS: float = 86400.0      # 0 이면 만료 없음
+    SQL_CACHE_SQLITE_PATH: str = "sql_cache.sqlite3"
+    SQL_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    # 정확히 같은 질문이 없을 때 SQL_SCHEMA_EMBEDDING_MODEL 임베딩 유사도로 조회 (모델이 없으면 꺼짐)
+    SQL_CACHE_SEMANTIC_ENABLED: bool = True
+    # 코사인 유사도 기준. 숫자 값(상위 N개, 날짜 등)이 다른 질문은 유사도와 관계없이 제외
+    SQL_CACHE_SEMANTIC_THRESHOLD: float = 0.93
+
+    # ========= 쿼리 결과 캐시 (app/services/result_cache.py) =========
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 256
+    RESULT_CACHE_MAX_ROWS_PER_ENTRY: int = 5000
+    # 테이블 버전(information_schema) 재조회 간격(초)
+    RESULT_CACHE_PROBE_INTERVAL_SECONDS: float = 5.0
+
+    # ========= SQL 실행 결과 직렬화 (app/services/sql_bi_service.py) =========
+    # 커서에서 한 번에 가져오고 컬럼 단위로 정규화하는 행 수
+    SQL_FETCH_BATCH_SIZE: int = 500
+    # True 면 서버 사이드 커서(PyMySQL SSCursor, stream_results)로 결과 전체를 메모리에 받지 않는다
+    SQL_STREAM_RESULTS: bool = True
+
+    # ========= SQL 가드레일 (app/services/sql_guard.py) =========
+    # LLM SQL 실행 전 정적 검사 + 스키마 카탈로그 대조 (sqlglot 있으면 컬럼까지)
+    SQL_GUARD_ENABLED: bool = True
+    SQL_GUARD_VERIFY_COLUMNS: bool = True
+    # MySQL EXPLAIN 으로 예상 비용 확인 후 기준 초과 쿼리 거부
+    SQL_GUARD_EXPLAIN_ENABLED: bool = True
+    # 이 행 수를 넘는 테이블 풀스캔(type=ALL)은 거부 (LIMIT 으로 바로 멈추는 단순 스캔 제외)
+    SQL_GUARD_MAX_SCAN_ROWS: int = 2_000_000
+    # 조인 포함 예상 검사 행 수 상한
+    SQL_GUARD_MAX_EXAMINED_ROWS: int = 50_000_000
+    # 같은 SQL 의 EXPLAIN 판정 재사용 시간(초)
+    SQL_GUARD_EXPLAIN_CACHE_SECONDS: float = 300.0
+
+    # ========= 생성 SQL 자동 수정 (app/services/sql_repair.py) =========
+    # DB/가드레일이 거부한 SQL 을 오류 메시지와 함께 SQL 모델에 되돌려 다시 생성하는 최대 횟수 (0 이면 끔)
+    SQL_REPAIR_MAX_ATTEMPTS: int = 2
+    # (실패 SQL → 수정 SQL) 메모 크기
+    SQL_REPAIR_MEMO_MAX_ENTRIES: int = 500
+
+    # ========= /ask 결과 페이지네이션 (app/services/result_pages.py) =========
+    # /ask 첫 응답 행 수 (SQL 에 LIMIT 을 붙여 DB 가 이 이상 만들지 않게 한다)
+    SQL_PAGE_SIZE: int = 200
+    # GET /ask/{query_id}/rows 의 limit 상한
+    SQL_MAX_PAGE_SIZE: int = 1000
+    # 페이지로 넘겨볼 수 있는 최대 행 수 (offset + limit 상한)
+    SQL_MAX_RESULT_ROWS: int = 10000
+    SQL_PAGE_HANDLE_MAX_ENTRIES: int = 1000
+    SQL_PAGE_HANDLE_TTL_SECONDS: float = 1800.0
+
+    # ========= 구매오더 미결 리포트 (app/services/po_open_report.py) =========
+    # 요청에 기간이 없을 때 사용할 기본 기간/기준일 (기준일 미지정 시 종료일)
+    PO_OPEN_DEFAULT_START_DATE: date = date(2025, 11, 1)
+    PO_OPEN_DEFAULT_END_DATE: date = date(2025, 11, 30)
+    PO_OPEN_DEFAULT_BASE_DATE: Optional[date] = None
+    # 기간이 이 일수보다 길면 일자별 사전집계(po_open_daily_agg) 사용
+    PO_OPEN_AGG_ENABLED: bool = True
+    PO_OPEN_AGG_MIN_DAYS: int = 31
+    # 같은 기간의 사전집계 변경 확인(지문 비교) 최소 간격(초)
+    PO_OPEN_AGG_REFRESH_INTERVAL_SECONDS: float = 300.0
+
+    # ========= 기준정보 스냅샷 (app/services/reference_snapshot.py) =========
+    # bom / standard_info / purchase order 를 메모리에 들고 있음. False 면 매번 DB 에서 읽는다
+    REF_SNAPSHOT_ENABLED: bool = True
+    # 테이블 버전(information_schema) 확인 최소 간격(초). 그 사이에는 스냅샷을 그대로 사용
+    REF_SNAPSHOT_CHECK_INTERVAL_SECONDS: float = 30.0
+    # 스냅샷 전체 메모리 상한(bytes, deep). 넘으면 오래 안 쓴 테이블부터 내림
+    REF_SNAPSHOT_MAX_BYTES: int = 512 * 1024 * 1024
+
+    # ========= BOM 전개 그래프 (app/services/bom_graph.py) =========
+    # False 면 호출마다 bom 스냅샷에서 그래프를 새로 만든다
+    BOM_GRAPH_CACHE_ENABLED: bool = True
+    # 기준일별 누적 소요량 배열을 보관할 날짜 수
+    BOM_GRAPH_MAX_CACHED_DATES: int = 8
+
+    # ========= 발주서 PDF (order_pdf.py) =========
+    # 프로세스 전체에서 동시에 띄우는 wkhtmltopdf 프로세스 수 (요청 여러 개가 같은 풀을 나눠 쓴다, 1 이면 순차)
+    PO_PDF_MAX_WORKERS: int = 8
+
     # ========= DB 설정 =========
     SQLALCHEMY_DATABASE_URI: str
+    # BI 조회(/ask 의 생성 SQL, 구매오더 미결 리포트)용 읽기 전용 replica. None 이면 primary 사용
+    SQLALCHEMY_READ_DATABASE_URI: Optional[str] = None
+
+    # 커넥션 풀 (app/db/session.py, primary/replica 각각 적용)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # 풀이 비었을 때 커넥션을 기다리는 최대 시간(초)
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    # 이 시간(초)보다 오래된 커넥션은 체크아웃 시 새로 연결 (MySQL wait_timeout 보다 짧게). -1 이면 끔
+    DB_POOL_RECYCLE_SECONDS: int = 3600
+    # 체크아웃 시 커넥션 살아있는지 확인
+    #   always: 매 체크아웃마다 ping (왕복 1회 추가)
+    #   idle:   DB_POOL_PING_IDLE_SECONDS 이상 쉬었던 커넥션만 ping
+    #   never:  ping 안 함 (recycle 만)
+    DB_POOL_PRE_PING: Literal["always", "idle", "never"] = "idle"
+    DB_POOL_PING_IDLE_SECONDS: float = 30.0
+    # 트랜잭션 격리 수준 (예: "READ COMMITTED"). None 이면 서버 기본값
+    DB_ISOLATION_LEVEL: Optional[str] = None
+    DB_READ_ISOLATION_LEVEL: Optional[str] = None
+
+    # 동기 DB 호출을 돌리는 전용 스레드풀 (app/db/executor.py)
+    DB_EXECUTOR_MAX_WORKERS: int = 8
+    # 한 요청 안에서 동시에 실행 가능한 DB 작업 수
+    DB_MAX_CONCURRENCY_PER_REQUEST: int = 4
+    # fan_out_db 로 동시에 실행하는 개별 쿼리의 제한(초). 넘기면 기다리지 않고 + DB_KILL_GRACE_SECONDS 에 KILL QUERY.
+    # 0 이면 대기 제한 없음 (DB_STATEMENT_TIMEOUT_SECONDS 로 KILL)
+    DB_FANOUT_TASK_TIMEOUT_SECONDS: float = 20.0
+    # 생성 SQL 쿼리 단위 실행 제한(초). MySQL MAX_EXECUTION_TIME 힌트 + 초과 시 KILL QUERY. 0 이면 제한 없음
+    DB_STATEMENT_TIMEOUT_SECONDS: float = 30.0
+    # 힌트가 안 먹는 쿼리를 KILL QUERY 하기까지 추가로 기다리는 시간(초)
+    DB_KILL_GRACE_SECONDS: float = 2.0
+    # /ask 클라이언트 연결이 끊기면 진행 중인 LLM 호출/쿼리를 취소 (쿼리는 KILL QUERY)
+    DB_CANCEL_ON_DISCONNECT: bool = True
 
     class Config:
         env_file = ".env"
@@ -1,31 +1,119 @@
 # app/core/llm_client.py
+import importlib.util
+import json
+from typing import AsyncIterator, List, Dict, Optional
+
 import httpx
-from typing import List, Dict, Optional
+
 from app.core.config import get_settings
 
 settings = get_settings()
 
 
 class LLMClient:
+    """
+    OpenAI Chat Completions 호출용 클라이언트.
+
+    - 앱 수명 동안 httpx.AsyncClient 하나를 재사용한다 (커넥션 풀 + keep-alive).
+      /ask 한 번에 router/SQL/insight 로 최대 3번 호출하므로, 매번 TLS 핸드셰이크를
+      새로 하지 않도록 한다.
+    - app.main 의 startup/shutdown 훅에서 startup()/shutdown() 을 호출한다.
+      (스크립트 등에서 startup 없이 쓰면 첫 호출 시 lazy 생성)
+    """
+
     def __init__(self):
         self.api_key = settings.OPENAI_API_KEY
-        self.base_url = "https://api.openai.com/v1/chat/completions"
+        self.base_url = settings.OPENAI_BASE_URL.rstrip("/")
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.OPENAI_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            # httpx[http2] (h2 패키지) 미설치 시 HTTP/1.1 로 동작
+            print("[LLMClient] h2 패키지가 없어 HTTP/1.1 로 동작합니다. (pip install httpx[http2])")
+            http2 = False
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY,
+            ),
+            timeout=self._timeout_for(None),
+        )
+
+    def _timeout_for(self, model: Optional[str]) -> httpx.Timeout:
+        """
+        모델별 read timeout (OPENAI_MODEL_TIMEOUTS) 이 있으면 그 값을, 없으면 OPENAI_TIMEOUT 사용.
+        """
+        read_timeout = settings.OPENAI_MODEL_TIMEOUTS.get(model or "", settings.OPENAI_TIMEOUT)
+        return httpx.Timeout(read_timeout, connect=settings.OPENAI_CONNECT_TIMEOUT)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = self._build_client()
+        return self._client
+
+    async def startup(self) -> None:
+        # 첫 요청 전에 클라이언트(풀)를 만들어 둔다.
+        _ = self.client
+
+    async def shutdown(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
 
     async def chat(self, messages: List[Dict], model: Optional[str] = None) -> str:
         # ⚠️ 기본 모델은 SQL 모델로 둠 (안 주면 SQL용으로 동작)
         use_model = model or settings.OPENAI_SQL_MODEL
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
         payload = {"model": use_model, "messages": messages}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(self.base_url, headers=headers, json=payload)
+        resp = await self.client.post(
+            "/chat/completions",
+            json=payload,
+            timeout=self._timeout_for(use_model),
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        return data["choices"][0]["message"]["content"]
+
+    async def chat_stream(self, messages: List[Dict], model: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        stream=True 로 호출해 content 조각(delta)을 도착하는 대로 돌려준다. (SSE "data: ..." 라인)
+        """
+        use_model = model or settings.OPENAI_SQL_MODEL
+
+        payload = {"model": use_model, "messages": messages, "stream": True}
+
+        async with self.client.stream(
+            "POST",
+            "/chat/completions",
+            json=payload,
+            timeout=self._timeout_for(use_model),
+        ) as resp:
             resp.raise_for_status()
-            data = resp.json()
-            return data["choices"][0]["message"]["content"]
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+                choices = chunk.get("choices") or []
+                delta = (choices[0].get("delta") or {}).get("content") if choices else None
+                if delta:
+                    yield delta
 
 
 llm_client = LLMClient()
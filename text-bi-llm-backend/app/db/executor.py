@@ -0,0 +1,268 @@
+# app/db/executor.py
+"""
+동기 SQLAlchemy 호출을 이벤트 루프 밖(전용 스레드풀)에서 실행하기 위한 실행기.
+
+- ask_endpoint 등 async 핸들러에서 Session.execute 를 직접 부르면
+  MySQL 쿼리가 도는 동안 uvicorn 워커 전체가 멈춘다.
+- run_in_db(fn, *args) 로 감싸면 DB 작업은 DB 전용 스레드풀(크기 제한)에서 돌고,
+  이벤트 루프는 다른 요청(LLM 호출 등)을 계속 처리한다.
+- 요청 단위 동시 실행 제한: db_request_scope() 안에서 실행된 DB 작업은
+  DB_MAX_CONCURRENCY_PER_REQUEST 개까지만 동시에 돈다.
+- 큐 대기시간/실행시간 지표는 get_db_executor_stats() 로 조회.
+- fan_out_db(): 서로 독립적인 쿼리 여러 개를 각자 별도 세션(풀 커넥션)으로 동시에 실행.
+- db_request_scope() 는 QueryScope(app/db/query_control)도 설정한다. 요청 작업이 예외/취소로
+  끝나면 그 요청에서 아직 실행 중인 쿼리를 KILL QUERY 한다.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Collection, Dict, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.query_control import QueryScope, reset_query_scope, set_query_scope, statement_timeout
+from app.db.session import ReadSessionLocal, SessionLocal
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# 요청 단위 세마포어 (db_request_scope 에서 설정)
+_request_semaphore: contextvars.ContextVar[Optional[asyncio.Semaphore]] = contextvars.ContextVar(
+    "db_request_semaphore", default=None
+)
+
+
+class _DBExecutorStats:
+    """
+    DB 스레드풀 지표 (스레드 안전).
+    - queue_wait: run_in_db 호출 ~ 워커 스레드에서 실제 실행 시작까지
+      (요청 단위 세마포어 대기 + 스레드풀 큐 대기 모두 포함)
+    - exec: 워커 스레드에서의 실행 시간
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.submitted = 0
+            self.completed = 0
+            self.failed = 0
+            self.in_flight = 0
+            self.queue_wait_total_ms = 0.0
+            self.queue_wait_max_ms = 0.0
+            self.exec_total_ms = 0.0
+            self.exec_max_ms = 0.0
+
+    def on_submit(self) -> None:
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+
+    def on_start(self, wait_ms: float) -> None:
+        with self._lock:
+            self.queue_wait_total_ms += wait_ms
+            self.queue_wait_max_ms = max(self.queue_wait_max_ms, wait_ms)
+
+    def on_finish(self, exec_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self.exec_total_ms += exec_ms
+            self.exec_max_ms = max(self.exec_max_ms, exec_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.failed
+            return {
+                "max_workers": settings.DB_EXECUTOR_MAX_WORKERS,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.in_flight,
+                "queue_wait_avg_ms": round(self.queue_wait_total_ms / started, 2) if started else 0.0,
+                "queue_wait_max_ms": round(self.queue_wait_max_ms, 2),
+                "exec_avg_ms": round(self.exec_total_ms / started, 2) if started else 0.0,
+                "exec_max_ms": round(self.exec_max_ms, 2),
+            }
+
+
+_stats = _DBExecutorStats()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.DB_EXECUTOR_MAX_WORKERS,
+                    thread_name_prefix="db-worker",
+                )
+    return _executor
+
+
+def shutdown_db_executor() -> None:
+    """
+    app.main 의 shutdown 훅에서 호출.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+def _timed_call(submitted_at: float, fn: Callable[..., T]) -> T:
+    started_at = time.perf_counter()
+    _stats.on_start((started_at - submitted_at) * 1000.0)
+    ok = False
+    try:
+        result = fn()
+        ok = True
+        return result
+    finally:
+        _stats.on_finish((time.perf_counter() - started_at) * 1000.0, ok)
+
+
+async def run_in_db(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    동기 DB 함수 fn(*args, **kwargs) 를 DB 전용 스레드풀에서 실행하고 결과를 기다린다.
+
+    예)
+        rows = await run_in_db(execute_sql, db, sql)
+    """
+    loop = asyncio.get_running_loop()
+    # contextvars(QueryScope 등)를 워커 스레드로 복사
+    call = functools.partial(contextvars.copy_context().run, fn, *args, **kwargs)
+
+    # 대기 시간은 세마포어 획득 전부터 잰다 (요청 내 동시 실행 제한으로 기다린 시간도 queue_wait 에 포함)
+    submitted_at = time.perf_counter()
+    sem = _request_semaphore.get()
+    if sem is not None:
+        await sem.acquire()
+    try:
+        _stats.on_submit()
+        return await loop.run_in_executor(
+            _get_executor(),
+            _timed_call,
+            submitted_at,
+            call,
+        )
+    finally:
+        if sem is not None:
+            sem.release()
+
+
+@asynccontextmanager
+async def db_request_scope(max_concurrency: Optional[int] = None):
+    """
+    한 요청 안에서 동시에 실행되는 DB 작업 수를 제한한다.
+
+        async with db_request_scope():
+            ...  # 이 안의 run_in_db 호출은 최대 N개까지만 동시 실행
+
+    블록이 예외/취소(클라이언트 연결 종료 등)로 끝나면 아직 DB 에서 돌고 있는
+    이 요청의 쿼리를 KILL QUERY 한다 (워커 스레드가 결과 없이 계속 붙잡혀 있지 않도록).
+    """
+    limit = max_concurrency or settings.DB_MAX_CONCURRENCY_PER_REQUEST
+    token = _request_semaphore.set(asyncio.Semaphore(limit))
+    scope = QueryScope()
+    scope_token = set_query_scope(scope)
+    try:
+        yield scope
+    except BaseException:
+        if scope.running:
+            # KILL 은 별도 커넥션 왕복이므로 기본 스레드풀에서 (DB 풀이 꽉 차 있어도 나가도록)
+            await asyncio.get_running_loop().run_in_executor(None, scope.cancel)
+        else:
+            scope.cancel()
+        raise
+    finally:
+        reset_query_scope(scope_token)
+        _request_semaphore.reset(token)
+
+
+@dataclass
+class DBTaskResult(Generic[T]):
+    name: str
+    value: Optional[T] = None
+    error: Optional[BaseException] = None
+    timed_out: bool = False
+    elapsed_ms: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def _run_with_own_session(
+    fn: Callable[[Session], T],
+    read_only: bool = False,
+    timeout: Optional[float] = None,
+) -> T:
+    # 작업마다 별도 세션 → 커넥션 풀에서 각자 커넥션을 받아 병렬 실행
+    session = ReadSessionLocal() if read_only else SessionLocal()
+    try:
+        # 시간 제한 초과 / 요청 취소 시 KILL QUERY → 워커 스레드와 커넥션을 돌려받는다
+        with statement_timeout(session, timeout):
+            return fn(session)
+    finally:
+        session.close()
+
+
+async def fan_out_db(
+    tasks: Sequence[Tuple[str, Callable[[Session], T]]],
+    timeout: Optional[float] = None,
+    read_only: Collection[str] = (),
+) -> List[DBTaskResult[T]]:
+    """
+    (이름, fn(session)) 작업들을 DB 스레드풀에서 동시에 실행하고 입력 순서대로 결과를 반환한다.
+
+    - 작업별 timeout(초, 기본 DB_FANOUT_TASK_TIMEOUT_SECONDS)을 넘기면 timed_out=True 로
+      표시하고 기다리지 않는다. 작업은 statement_timeout(session, timeout) 안에서 돌므로
+      DB 에서 계속 도는 쿼리는 timeout + DB_KILL_GRACE_SECONDS 에 KILL QUERY 되고,
+      요청 취소(db_request_scope) 시에도 같이 중단된다.
+      (timeout 이 0 이면 대기 제한 없이 DB_STATEMENT_TIMEOUT_SECONDS 로 제한)
+    - 예외는 전파하지 않고 DBTaskResult.error 에 담는다.
+    - read_only 에 이름이 있는 작업은 읽기 전용 replica 세션(ReadSessionLocal)에서 실행한다.
+    """
+    limit = settings.DB_FANOUT_TASK_TIMEOUT_SECONDS if timeout is None else timeout
+
+    async def one(name: str, fn: Callable[[Session], T]) -> DBTaskResult[T]:
+        started = time.perf_counter()
+        result: DBTaskResult[T] = DBTaskResult(name=name)
+        try:
+            result.value = await asyncio.wait_for(
+                run_in_db(_run_with_own_session, fn, name in read_only, limit or None),
+                timeout=limit or None,
+            )
+        except asyncio.TimeoutError:
+            result.timed_out = True
+            print(f"[db_executor] fan-out task timeout: {name} ({limit}s)")
+        except Exception as e:
+            result.error = e
+            print(f"[db_executor] fan-out task error: {name}: {e}")
+        result.elapsed_ms = round((time.perf_counter() - started) * 1000.0, 2)
+        return result
+
+    return list(await asyncio.gather(*(one(name, fn) for name, fn in tasks)))
+
+
+def get_db_executor_stats() -> Dict[str, Any]:
+    return _stats.snapshot()
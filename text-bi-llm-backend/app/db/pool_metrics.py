@@ -0,0 +1,113 @@
+# app/db/pool_metrics.py
+"""
+커넥션 풀 체크아웃 지표.
+
+- 풀 체크아웃 대기시간(풀이 비어 기다린 시간 + 새 커넥션 연결 시간) 히스토그램
+- 풀 타임아웃(DB_POOL_TIMEOUT_SECONDS 초과) 건수, idle ping 횟수/실패(끊긴 커넥션 교체) 건수
+- 엔진(primary / replica)별로 하나씩 만들어 session.py 에서 풀 클래스에 붙인다.
+  조회는 get_db_pool_stats() (→ /metrics 의 db_pool).
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Type
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# 대기시간 버킷 상한(ms). 마지막 버킷은 그 이상 전부
+WAIT_BUCKETS_MS = (0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolCheckoutMetrics:
+    def __init__(self, name: str):
+        self.name = name
+        self.pool: Optional[QueuePool] = None
+        self._lock = threading.Lock()
+        self._buckets: List[int] = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.pings = 0
+        self.ping_failures = 0
+
+    def observe(self, wait_ms: float) -> None:
+        idx = bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)
+        with self._lock:
+            self._buckets[idx] += 1
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            self.wait_max_ms = max(self.wait_max_ms, wait_ms)
+
+    def inc(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _percentile(self, q: float) -> float:
+        # 버킷 상한 기준 근사값 (최대값을 넘지 않게)
+        target = q * self.checkouts
+        seen = 0
+        for i, count in enumerate(self._buckets):
+            seen += count
+            if count and seen >= target:
+                bound = WAIT_BUCKETS_MS[i] if i < len(WAIT_BUCKETS_MS) else self.wait_max_ms
+                return round(min(bound, self.wait_max_ms), 2)
+        return 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.pool
+        with self._lock:
+            n = self.checkouts
+            labels = [f"<={b}ms" for b in WAIT_BUCKETS_MS] + [f">{WAIT_BUCKETS_MS[-1]}ms"]
+            return {
+                "pool_size": pool.size() if pool is not None else None,
+                "checked_out": pool.checkedout() if pool is not None else None,
+                "overflow": pool.overflow() if pool is not None else None,
+                "checkouts": n,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total_ms / n, 3) if n else 0.0,
+                "wait_p50_ms": self._percentile(0.5) if n else 0.0,
+                "wait_p99_ms": self._percentile(0.99) if n else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 2),
+                "wait_histogram": dict(zip(labels, self._buckets)),
+                "pings": self.pings,
+                "ping_failures": self.ping_failures,
+            }
+
+
+class TimedQueuePool(QueuePool):
+    """
+    체크아웃(_do_get) 시간을 재는 QueuePool. metrics 는 timed_pool_class() 로 만든 서브클래스에 붙는다.
+    (engine.dispose() 등으로 풀이 다시 만들어져도 같은 클래스 → 같은 지표)
+    """
+
+    metrics: PoolCheckoutMetrics
+
+    def _do_get(self):
+        self.metrics.pool = self
+        started = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.inc("timeouts")
+            raise
+        self.metrics.observe((time.perf_counter() - started) * 1000.0)
+        return conn
+
+
+_registry: Dict[str, PoolCheckoutMetrics] = {}
+
+
+def timed_pool_class(name: str) -> Type[TimedQueuePool]:
+    metrics = _registry.setdefault(name, PoolCheckoutMetrics(name))
+    return type(f"TimedQueuePool_{name}", (TimedQueuePool,), {"metrics": metrics})
+
+
+def pool_metrics(name: str) -> Optional[PoolCheckoutMetrics]:
+    return _registry.get(name)
+
+
+def get_db_pool_stats() -> Dict[str, Any]:
+    return {name: m.snapshot() for name, m in _registry.items()}
@@ -0,0 +1,231 @@
+# app/db/query_control.py
+"""
+생성 SQL 의 쿼리 단위 실행 시간 제한 + 취소.
+
+- 폭주 쿼리 하나가 풀 커넥션과 DB 워커 스레드를 계속 잡고 있지 않도록:
+  1) MySQL MAX_EXECUTION_TIME 힌트로 서버가 스스로 중단 (SELECT 에만 적용됨)
+  2) 힌트가 안 먹는 경우(UNION 최상위 등) 대비, 제한 + DB_KILL_GRACE_SECONDS 가 지나면
+     별도 커넥션에서 KILL QUERY <connection_id>
+- 요청 취소: db_request_scope() 가 만든 QueryScope 에 실행 중인 쿼리의 connection_id 를 등록해 두고,
+  클라이언트 연결 종료 등으로 요청 작업이 취소되면 scope.cancel() 로 모두 KILL QUERY.
+  (run_in_db 는 contextvars 를 워커 스레드로 복사하므로 워커에서도 같은 scope 가 보인다)
+- 중단/취소 건수는 get_query_control_stats() (→ /metrics 의 db_statements).
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# MySQL 에러 코드
+ER_QUERY_TIMEOUT = 3024       # maximum statement execution time exceeded
+ER_QUERY_INTERRUPTED = 1317   # KILL QUERY 로 중단됨
+
+
+class QueryTimeoutError(TimeoutError):
+    """쿼리가 DB_STATEMENT_TIMEOUT_SECONDS 를 넘겨 중단됨"""
+
+
+class QueryCancelledError(Exception):
+    """요청이 취소되어(클라이언트 연결 종료 등) 쿼리를 중단함"""
+
+
+class _QueryControlStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.timed_out = 0
+        self.cancelled = 0
+        self.kills_sent = 0
+        self.kill_failures = 0
+        self.running = 0
+
+    def inc(self, name: str, delta: int = 1) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "timeout_seconds": settings.DB_STATEMENT_TIMEOUT_SECONDS,
+                "started": self.started,
+                "running": self.running,
+                "timed_out": self.timed_out,
+                "cancelled": self.cancelled,
+                "cut_off": self.timed_out + self.cancelled,
+                "kills_sent": self.kills_sent,
+                "kill_failures": self.kill_failures,
+            }
+
+
+_stats = _QueryControlStats()
+
+# KILL 전용 엔진 (풀이 고갈돼도 KILL 은 나가야 하므로 NullPool)
+# 쿼리가 돌고 있는 서버(primary / replica)로 보내야 하므로 DB URL 별로 하나씩
+_kill_engines: Dict[str, Engine] = {}
+_kill_engine_lock = threading.Lock()
+
+
+def _get_kill_engine(url: Optional[URL] = None) -> Engine:
+    key = url.render_as_string(hide_password=False) if url is not None else settings.SQLALCHEMY_DATABASE_URI
+    with _kill_engine_lock:
+        engine = _kill_engines.get(key)
+        if engine is None:
+            engine = _kill_engines[key] = create_engine(
+                key,
+                poolclass=NullPool,
+                connect_args={"charset": "utf8mb4"},
+            )
+    return engine
+
+
+def kill_query(connection_id: int, url: Optional[URL] = None) -> bool:
+    try:
+        with _get_kill_engine(url).connect() as conn:
+            conn.execute(text(f"KILL QUERY {int(connection_id)}"))
+        _stats.inc("kills_sent")
+        return True
+    except Exception as e:
+        _stats.inc("kill_failures")
+        print(f"[query_control] KILL QUERY {connection_id} failed: {e}")
+        return False
+
+
+class QueryScope:
+    """
+    한 요청에서 실행 중인 쿼리(connection_id) 목록. cancel() 시 모두 KILL QUERY.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._running: Dict[int, Tuple[int, Optional[URL]]] = {}   # 등록 토큰 → (connection_id, DB URL)
+        self._next = 0
+        self.cancelled = False
+
+    def register(self, connection_id: int, url: Optional[URL] = None) -> int:
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("요청이 취소되어 쿼리를 실행하지 않습니다.")
+            self._next += 1
+            self._running[self._next] = (connection_id, url)
+            return self._next
+
+    @property
+    def running(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def unregister(self, token: int) -> None:
+        with self._lock:
+            self._running.pop(token, None)
+
+    def cancel(self) -> int:
+        with self._lock:
+            self.cancelled = True
+            targets = list(self._running.values())
+        for connection_id, url in targets:
+            kill_query(connection_id, url)
+        return len(targets)
+
+
+_current_scope: contextvars.ContextVar[Optional[QueryScope]] = contextvars.ContextVar(
+    "db_query_scope", default=None
+)
+
+
+def current_query_scope() -> Optional[QueryScope]:
+    return _current_scope.get()
+
+
+def set_query_scope(scope: Optional[QueryScope]) -> contextvars.Token:
+    return _current_scope.set(scope)
+
+
+def reset_query_scope(token: contextvars.Token) -> None:
+    _current_scope.reset(token)
+
+
+def _connection_id(db: Session) -> int:
+    # 풀 커넥션마다 한 번만 조회해서 connection.info 에 저장
+    info = db.connection().connection.info
+    if "mysql_connection_id" not in info:
+        info["mysql_connection_id"] = int(db.execute(text("SELECT CONNECTION_ID()")).scalar())
+    return info["mysql_connection_id"]
+
+
+def _error_code(e: DBAPIError) -> Optional[int]:
+    args = getattr(e.orig, "args", None) or ()
+    return args[0] if args and isinstance(args[0], int) else None
+
+
+@contextmanager
+def statement_timeout(db: Session, timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    with statement_timeout(db):
+        db.execute(...)
+
+    - timeout(초, 기본 DB_STATEMENT_TIMEOUT_SECONDS) + DB_KILL_GRACE_SECONDS 안에 끝나지 않으면 KILL QUERY
+    - 서버 중단(3024) → QueryTimeoutError, 요청 취소로 KILL(1317) → QueryCancelledError
+    - MySQL 이 아니면 아무것도 하지 않는다
+    """
+    limit = settings.DB_STATEMENT_TIMEOUT_SECONDS if timeout is None else timeout
+    scope = current_query_scope()
+    if db.get_bind().dialect.name != "mysql" or (limit <= 0 and scope is None):
+        if scope is not None and scope.cancelled:
+            raise QueryCancelledError("요청이 취소되어 쿼리를 실행하지 않습니다.")
+        yield
+        return
+
+    connection_id = _connection_id(db)
+    url = db.get_bind().url
+    token = scope.register(connection_id, url) if scope is not None else None
+    watchdog_fired = threading.Event()
+
+    def on_deadline() -> None:
+        watchdog_fired.set()
+        kill_query(connection_id, url)
+
+    timer = None
+    if limit > 0:
+        timer = threading.Timer(limit + settings.DB_KILL_GRACE_SECONDS, on_deadline)
+        timer.daemon = True
+        timer.start()
+
+    _stats.inc("started")
+    _stats.inc("running")
+    started = time.perf_counter()
+    try:
+        yield
+    except DBAPIError as e:
+        code = _error_code(e)
+        elapsed = round(time.perf_counter() - started, 2)
+        if code == ER_QUERY_TIMEOUT or (code == ER_QUERY_INTERRUPTED and watchdog_fired.is_set()):
+            _stats.inc("timed_out")
+            raise QueryTimeoutError(
+                f"쿼리가 실행 시간 제한({limit:g}초)을 넘겨 중단되었습니다. ({elapsed}초)"
+            ) from e
+        if code == ER_QUERY_INTERRUPTED and scope is not None and scope.cancelled:
+            _stats.inc("cancelled")
+            raise QueryCancelledError("요청이 취소되어 쿼리를 중단했습니다.") from e
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if token is not None:
+            scope.unregister(token)
+        _stats.inc("running", -1)
+
+
+def get_query_control_stats() -> Dict[str, Any]:
+    return _stats.snapshot()
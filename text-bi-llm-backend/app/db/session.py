@@ -1,17 +1,113 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, Session
+# app/db/session.py
+"""
+DB 엔진/세션.
+
+- engine (primary): 쓰기 + 일반 조회. SessionLocal / get_db
+- read_engine (replica): BI 조회 전용. ReadSessionLocal / get_read_db
+  SQLALCHEMY_READ_DATABASE_URI 가 없으면 primary 엔진을 그대로 쓴다.
+- 풀 크기/overflow/recycle/격리 수준은 Settings(DB_POOL_*, DB_ISOLATION_LEVEL) 로 조정.
+- pre-ping 은 DB_POOL_PRE_PING:
+  매 체크아웃마다 ping 하면 쿼리마다 왕복이 하나 늘어나므로, 기본(idle)은
+  DB_POOL_PING_IDLE_SECONDS 이상 풀에서 쉬었던 커넥션만 ping 한다.
+  (끊긴 커넥션이면 DisconnectionError → 풀이 새 커넥션으로 다시 시도)
+- 체크아웃 대기 히스토그램은 app/db/pool_metrics.py (→ /metrics 의 db_pool)
+"""
+
+import time
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DisconnectionError
+from sqlalchemy.orm import Session, sessionmaker
+
 from app.core.config import get_settings
+from app.db.pool_metrics import PoolCheckoutMetrics, timed_pool_class
 
 settings = get_settings()
 
-engine = create_engine(
+_CHECKED_IN_AT = "checked_in_at"
+
+
+def _install_idle_ping(engine: Engine, metrics: PoolCheckoutMetrics) -> None:
+    idle_seconds = settings.DB_POOL_PING_IDLE_SECONDS
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection: Any, record: Any) -> None:
+        record.info[_CHECKED_IN_AT] = time.monotonic()
+
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection: Any, record: Any, proxy: Any) -> None:
+        last = record.info.get(_CHECKED_IN_AT)
+        if last is None or time.monotonic() - last < idle_seconds:
+            return
+        metrics.inc("pings")
+        try:
+            engine.dialect.do_ping(dbapi_connection)
+        except Exception:
+            metrics.inc("ping_failures")
+            raise DisconnectionError(f"[{metrics.name}] idle connection ping failed")
+
+
+def _set_read_only(engine: Engine) -> None:
+    # replica 커넥션은 세션 단위로 읽기 전용 (실수로 쓰기 쿼리가 와도 서버가 거부)
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: Any, record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("SET SESSION TRANSACTION READ ONLY")
+        finally:
+            cursor.close()
+
+
+def build_engine(uri: str, name: str, isolation_level: Optional[str] = None, read_only: bool = False) -> Engine:
+    url = make_url(uri)
+    kwargs: Dict[str, Any] = {"echo": False}
+    if isolation_level:
+        kwargs["isolation_level"] = isolation_level
+
+    if url.get_backend_name() == "sqlite":
+        # 로컬 테스트용: sqlite 기본 풀 그대로
+        return create_engine(url, pool_pre_ping=settings.DB_POOL_PRE_PING == "always", **kwargs)
+
+    pool_class = timed_pool_class(name)
+    engine = create_engine(
+        url,
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING == "always",
+        connect_args={"charset": "utf8mb4"},
+        **kwargs,
+    )
+    if settings.DB_POOL_PRE_PING == "idle":
+        _install_idle_ping(engine, pool_class.metrics)
+    if read_only and url.get_backend_name() == "mysql":
+        _set_read_only(engine)
+    return engine
+
+
+engine = build_engine(
     settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
-    echo=False,
-    connect_args={"charset": "utf8mb4"},
+    "primary",
+    isolation_level=settings.DB_ISOLATION_LEVEL,
 )
 
+if settings.SQLALCHEMY_READ_DATABASE_URI:
+    read_engine = build_engine(
+        settings.SQLALCHEMY_READ_DATABASE_URI,
+        "replica",
+        isolation_level=settings.DB_READ_ISOLATION_LEVEL,
+        read_only=True,
+    )
+else:
+    read_engine = engine
+
 SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autocommit=False, autoflush=False)
+
 
 def get_db() -> Session:
     db = SessionLocal()
@@ -19,3 +115,14 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Session:
+    """
+    BI 조회용 세션 (replica 가 설정돼 있으면 replica)
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
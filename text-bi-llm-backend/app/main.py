@@ -1,5 +1,7 @@
 # app/main.py
 
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -7,11 +9,43 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.api.v1.router import api_router
+from app.core.config import get_settings
+from app.core.llm_client import llm_client
+from app.db.executor import shutdown_db_executor
+from app.services.local_router import local_router
+from app.services.schema_catalog import refresh_schema_catalog, schema_catalog_refresh_loop
+from order_pdf import shutdown_pdf_pool
+
+
+# ---------------------------------------------------------
+# startup / shutdown 훅
+# - LLMClient 커넥션 풀을 앱 수명 동안 유지
+# - 시작 시 스키마 카탈로그(information_schema) 로딩 + 주기적 갱신
+# - 시작 시 로컬 라우터 n-gram 모델 학습 (첫 요청이 이벤트 루프에서 파일을 읽지 않게)
+# - 종료 시 DB 스레드풀 / 발주서 PDF 스레드풀 정리
+# ---------------------------------------------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await llm_client.startup()
+    await refresh_schema_catalog()
+    if get_settings().ROUTER_LOCAL_ENABLED:
+        await asyncio.to_thread(local_router.reload)
+    catalog_task = asyncio.create_task(schema_catalog_refresh_loop())
+    try:
+        yield
+    finally:
+        catalog_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await catalog_task
+        await llm_client.shutdown()
+        shutdown_db_executor()
+        shutdown_pdf_pool()
 
 
 app = FastAPI(
     title="Text BI LLM Backend",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------
@@ -1,5 +1,6 @@
 # app/schemas/ask.py
-from typing import Any, Dict, List, Optional
+from datetime import date
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -8,6 +9,14 @@ from app.schemas.analysis import ChartSpec
 
 class AskRequest(BaseModel):
     question: str
+    # 고정 리포트(구매오더 미결 등)용 기간/기준일. 없으면 서버 기본값 사용
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    base_date: Optional[date] = None
+    # "columnar" 면 rows 를 {"columns": [...], "data": [[...]]} 로 받는다 (넓은 결과용)
+    row_format: Literal["records", "columnar"] = "records"
+    # "fast" 면 인사이트 LLM 을 부르지 않고 로컬 통계 요약문 + 로컬 chart_spec 으로 바로 응답
+    insight_mode: Literal["full", "fast"] = "full"
 
 
 class SubAnalysis(BaseModel):
@@ -28,3 +37,14 @@ class AskResponse(BaseModel):
     sub_analyses: List[SubAnalysis] = Field(default_factory=list)
     kpis: Dict[str, Any] = Field(default_factory=dict)
     report_text: Optional[str] = None
+    # rows 는 첫 페이지. 더 있으면 GET /ask/{query_id}/rows?cursor=next_cursor
+    query_id: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class AskRowsPage(BaseModel):
+    query_id: str
+    offset: int = 0
+    rows: List[Dict[str, Any]] = Field(default_factory=list)
+    row_count: int = 0
+    next_cursor: Optional[str] = None
@@ -1,10 +1,17 @@
 # app/schemas/po.py
-from typing import List, Optional, Any
+from typing import List, Literal, Optional, Any
 from pydantic import BaseModel
 
 class GeneratePORequest(BaseModel):
     date: str  # "2025-11-24" 형식
 
+class RequirementsRequest(BaseModel):
+    date: str  # "2025-11-24" 형식 (all_plan 기준일 + BOM 효력일)
+    basis: Literal["shortage", "plan"] = "shortage"  # shortage: D0_D1부족, plan: 계획량
+    plant: Optional[str] = None
+    procurement: Optional[str] = None  # 예: "F" (구매품만)
+    limit: int = 200
+
 class PDFInfo(BaseModel):
     vendor_name: str
     po_date: str
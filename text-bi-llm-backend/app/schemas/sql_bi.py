@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 
 class SQLBIRequest(BaseModel):
     question: str
@@ -7,8 +7,14 @@ class SQLBIRequest(BaseModel):
 class SQLBIResponse(BaseModel):
     question: str
     sql: str
-    rows: List[Dict[str, Any]]
+    rows: Optional[List[Dict[str, Any]]] = None
     row_count: int
+    # 컬럼형 결과 (run_sql_bi(columnar=True) 일 때 rows 대신 채워짐)
+    columns: Optional[List[str]] = None
+    data: Optional[List[List[Any]]] = None
+    # 첫 페이지 뒤에 행이 더 있으면 GET /ask/{query_id}/rows?cursor=next_cursor 로 이어 받는다
+    query_id: Optional[str] = None
+    next_cursor: Optional[str] = None
 
 class SqlBiRequest(BaseModel):
     question: str
@@ -0,0 +1,352 @@
+# app/services/bom_graph.py
+"""
+다단계 BOM 전개 그래프 (NumPy 배열, 메모리 캐시).
+
+- bom 테이블은 완성품(.0) 행 다음에 하위 구성품 행이 전개 순서대로 이어진다.
+  전개번호('..1', '...2', '...3')로 레벨을 읽고, 각 행의 부모 = 앞쪽에서 가장 가까운 "더 낮은 레벨" 행.
+- 그래프는 행(노드) 단위 배열로 들고 있다.
+  * parent / level / qty_per(= 소요량_구성품 × 단위량, 부모 1단위당) / 효력시작일·효력종료일(YYYYMMDD 정수)
+  * 완성품 자재번호 → 구성품 노드 목록은 CSR (top_codes, indptr, indices)
+- 누적 소요량: 완성품 1단위당 = 경로 위 qty_per 의 곱. 효력 기간 밖인 노드는 그 아래 전체가 빠진다.
+  기준일별로 한 번 계산(레벨 수만큼의 벡터 연산)해서 BOM_GRAPH_MAX_CACHED_DATES 개까지 보관.
+- 원본 bom 은 reference_snapshot 스냅샷(타입 정리된 DataFrame)에서 받는다.
+  스냅샷 버전(information_schema CREATE_TIME/UPDATE_TIME/TABLE_ROWS)이 그래프를 만든 버전과 같으면 그래프 재사용,
+  다르면 다시 만든다. 버전 확인 주기는 REF_SNAPSHOT_CHECK_INTERVAL_SECONDS.
+  MySQL 이 아니면 버전을 알 수 없으므로 스냅샷 객체가 같을 때만 재사용.
+  스냅샷은 약한 참조로만 들고 있어서, 스냅샷 저장소가 내린(또는 상한 초과로 캐시하지 않은) bom 원본을
+  그래프 캐시가 붙잡아 두지 않는다. 그래프 자체 크기는 reference_snapshots 의 상한/통계(derived_bytes)에 포함.
+- 사용처: make_order2.generate_po_docs (발주), make_order2.component_requirements (/po/requirements)
+"""
+
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.services.reference_snapshot import Snapshot, reference_snapshots
+
+settings = get_settings()
+
+# 노드별로 그대로 들고 있다가 전개 결과에 붙이는 속성 컬럼
+NODE_ATTR_COLUMNS = ["자재번호", "구성요소내역", "단위", "조달유형", "공급업체", "공급업체명", "특별조달유형", "평가클래스"]
+
+_NO_START = 0
+_NO_END = 99991231
+
+
+def parse_levels(expl: pd.Series) -> np.ndarray:
+    """
+    전개번호 → 레벨. 끝자리 숫자가 있으면 그 숫자('.0' → 0, '..1' → 1), 없으면 점 개수 - 1
+    """
+    s = expl.astype(str).str.strip()
+    digits = pd.to_numeric(s.str.extract(r"(\d+)$")[0], errors="coerce")
+    dots = s.str.len() - s.str.lstrip(".").str.len() - 1
+    return digits.fillna(dots).clip(lower=0).to_numpy(dtype=np.int16)
+
+
+def resolve_parents(levels: np.ndarray) -> np.ndarray:
+    """
+    각 행의 부모 행 위치 (완성품/첫 완성품 이전 행은 -1).
+    부모 = 앞쪽에서 가장 가까운, 자기보다 레벨이 낮은 행 (전개 순서 스택과 같음; 레벨이 건너뛰어도 동작)
+    """
+    n = len(levels)
+    parent = np.full(n, -1, dtype=np.int32)
+    for lv in range(1, int(levels.max(initial=0)) + 1):
+        idx = np.flatnonzero(levels == lv)
+        if idx.size == 0:
+            continue
+        lower = np.flatnonzero(levels < lv)
+        j = np.searchsorted(lower, idx) - 1
+        parent[idx] = np.where(j >= 0, lower[np.maximum(j, 0)], -1)
+    return parent
+
+
+def _clean_attr(values: pd.Series) -> pd.Series:
+    """
+    노드 속성 정리(공백 제거, NULL/'nan'/'None' → ''). category 는 카테고리 값만 정리해서 category 로 유지
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        cleaned = _clean_attr(pd.Series(values.cat.categories.astype(str)))
+        codes = values.cat.codes.to_numpy()
+        labels = np.append(cleaned.to_numpy(dtype=object), "")
+        return pd.Series(pd.Categorical(labels[codes]), index=values.index)
+    return values.fillna("").astype(str).str.strip().replace(["nan", "None"], "")
+
+
+def _date_keys(values: pd.Series, default: int) -> np.ndarray:
+    # '2025-01-31' / date / datetime / '9999-12-31' → 20250131 (datetime64[ns] 범위 밖 날짜도 그대로)
+    digits = values.astype(str).str.replace(r"\D", "", regex=True).str[:8]
+    keys = pd.to_numeric(digits.where(digits.str.len() == 8), errors="coerce")
+    return keys.fillna(default).to_numpy(dtype=np.int32)
+
+
+def date_key(as_of: Optional[str]) -> int:
+    if not as_of:
+        return int(time.strftime("%Y%m%d"))
+    return int(str(as_of).replace("-", "")[:8])
+
+
+def concat_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    [starts[i], starts[i] + lengths[i]) 구간들을 이어붙인 인덱스 배열
+    """
+    lengths = lengths.astype(np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts.astype(np.int64), lengths) + np.arange(total, dtype=np.int64) - offsets
+
+
+@dataclass
+class BomGraph:
+    version: Optional[str]
+    level: np.ndarray       # int16
+    parent: np.ndarray      # int32, -1 = 없음
+    qty_per: np.ndarray     # float64, 부모 1단위당 소요량
+    eff_from: np.ndarray    # int32 YYYYMMDD
+    eff_to: np.ndarray      # int32 YYYYMMDD
+    top_codes: np.ndarray   # 완성품 자재번호 (정렬)
+    indptr: np.ndarray      # int64, len(top_codes) + 1
+    indices: np.ndarray     # int32, 완성품별 구성품 노드
+    attrs: pd.DataFrame     # 노드별 속성 (NODE_ATTR_COLUMNS)
+    build_ms: float = 0.0
+    max_cached_dates: int = 8
+    _by_level: Tuple[np.ndarray, ...] = field(default=(), repr=False)
+    _multipliers: "OrderedDict[int, Tuple[np.ndarray, np.ndarray]]" = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def build(cls, df_bom: pd.DataFrame, version: Optional[str] = None, max_cached_dates: int = 8) -> "BomGraph":
+        """
+        bom 테이블(전개 순서 그대로) → 그래프
+        """
+        started = time.perf_counter()
+        df = df_bom.reset_index(drop=True)
+        n = len(df)
+        level = parse_levels(df["전개번호"]) if n else np.empty(0, dtype=np.int16)
+        parent = resolve_parents(level)
+
+        qty_per = (
+            pd.to_numeric(df["소요량_구성품"], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+            * pd.to_numeric(df["단위량"], errors="coerce").fillna(1).to_numpy(dtype=np.float64)
+        )
+        eff_from = _date_keys(df["효력시작일"], _NO_START) if "효력시작일" in df else np.full(n, _NO_START, np.int32)
+        eff_to = _date_keys(df["효력종료일"], _NO_END) if "효력종료일" in df else np.full(n, _NO_END, np.int32)
+
+        attrs = pd.DataFrame(index=pd.RangeIndex(n))
+        for col in NODE_ATTR_COLUMNS:
+            values = df[col] if col in df else pd.Series("", index=df.index)
+            attrs[col] = _clean_attr(values)
+        special = attrs["특별조달유형"].astype(str).str.lower().replace("none", "")
+        attrs["특별조달유형"] = special.astype("category")
+
+        # 완성품(.0) 하나의 구성품 = 다음 완성품 전까지의 행. 같은 완성품 자재번호가 여러 번 나오면(버전) 합친다
+        top_nodes = np.flatnonzero(level == 0)
+        ends = np.append(top_nodes[1:], n)
+        lengths = ends - top_nodes - 1
+        top_material = attrs["자재번호"].to_numpy(dtype=object)[top_nodes].astype(str)
+        order = np.argsort(top_material, kind="stable")
+        top_codes, inverse = np.unique(top_material[order], return_inverse=True)
+        counts = np.bincount(inverse, weights=lengths[order], minlength=len(top_codes)).astype(np.int64)
+        indptr = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        indices = concat_ranges(top_nodes[order] + 1, lengths[order]).astype(np.int32)
+
+        # 첫 완성품 이전 행(부모 없는 하위 레벨)은 전개에서 제외
+        reachable = parent >= 0
+        by_level = tuple(
+            np.flatnonzero((level == lv) & reachable) for lv in range(1, int(level.max(initial=0)) + 1)
+        )
+        graph = cls(
+            version=version,
+            level=level,
+            parent=parent,
+            qty_per=qty_per,
+            eff_from=eff_from,
+            eff_to=eff_to,
+            top_codes=top_codes,
+            indptr=indptr,
+            indices=indices,
+            attrs=attrs,
+            max_cached_dates=max_cached_dates,
+            _by_level=by_level,
+        )
+        graph.build_ms = (time.perf_counter() - started) * 1000.0
+        return graph
+
+    @property
+    def nodes(self) -> int:
+        return len(self.level)
+
+    def nbytes(self) -> int:
+        """
+        그래프가 들고 있는 메모리: 노드 배열 + CSR + 노드 속성(attrs, deep) + 기준일별 누적 소요량 캐시
+        """
+        arrays = [self.level, self.parent, self.qty_per, self.eff_from, self.eff_to, self.top_codes, self.indptr, self.indices]
+        arrays.extend(self._by_level)
+        with self._lock:
+            for cached in self._multipliers.values():
+                arrays.extend(cached)
+        return int(sum(a.nbytes for a in arrays)) + int(self.attrs.memory_usage(deep=True).sum())
+
+    def multipliers(self, as_of: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        기준일의 (완성품 1단위당 누적 소요량, 유효 여부) 노드 배열
+        """
+        key = date_key(as_of)
+        with self._lock:
+            cached = self._multipliers.get(key)
+            if cached is not None:
+                self._multipliers.move_to_end(key)
+                return cached
+
+        active = (self.eff_from <= key) & (key <= self.eff_to)
+        cum = np.where(self.level == 0, 1.0, 0.0)
+        # 부모가 항상 앞 레벨이므로 레벨 순서로 한 번씩만 훑으면 된다
+        for idx in self._by_level:
+            p = self.parent[idx]
+            active[idx] &= active[p]
+            cum[idx] = cum[p] * self.qty_per[idx]
+        active[(self.level > 0) & (self.parent < 0)] = False
+
+        with self._lock:
+            self._multipliers[key] = (cum, active)
+            while len(self._multipliers) > self.max_cached_dates:
+                self._multipliers.popitem(last=False)
+        return cum, active
+
+    def explode(
+        self,
+        demand: pd.DataFrame,
+        fg_col: str = "자재번호",
+        qty_col: str = "완성품부족",
+        as_of: Optional[str] = None,
+    ) -> pd.DataFrame:
+        """
+        완성품 수요(행마다 fg_col 자재 qty_col 개) → 전 레벨 구성품 소요 행.
+
+        반환 컬럼: demand 의 나머지 컬럼 + 완성품자재, 전개레벨, NODE_ATTR_COLUMNS(자재번호 = 구성품),
+                  누적소요량(완성품 1단위당), 필요구성품수량(= qty × 누적소요량)
+        """
+        codes = demand[fg_col].astype(str).to_numpy(dtype=str)
+        slot = np.searchsorted(self.top_codes, codes)
+        found = slot < len(self.top_codes)
+        found[found] = self.top_codes[slot[found]] == codes[found]
+        starts = np.where(found, self.indptr[np.minimum(slot, len(self.top_codes))], 0)
+        lengths = np.where(found, self.indptr[np.minimum(slot + 1, len(self.top_codes))] - starts, 0)
+
+        nodes = self.indices[concat_ranges(starts, lengths)]
+        rows = np.repeat(np.arange(len(demand)), lengths)
+        cum, active = self.multipliers(as_of)
+        keep = active[nodes]
+        nodes, rows = nodes[keep], rows[keep]
+
+        out = demand.drop(columns=[fg_col]).iloc[rows].reset_index(drop=True)
+        out["완성품자재"] = codes[rows]
+        out["전개레벨"] = self.level[nodes]
+        attrs = self.attrs.iloc[nodes].reset_index(drop=True)
+        for col in NODE_ATTR_COLUMNS:
+            # 전개 결과는 기존 merge/groupby 코드로 넘어가므로 category 를 일반 문자열로 푼다
+            out[col] = attrs[col].to_numpy(dtype=object)
+        out["누적소요량"] = cum[nodes]
+        qty = pd.to_numeric(demand[qty_col], errors="coerce").fillna(0).to_numpy(dtype=np.float64)
+        out["필요구성품수량"] = qty[rows] * cum[nodes]
+        return out
+
+
+class BomGraphCache:
+    def __init__(self, enabled: bool = True, max_cached_dates: int = 8):
+        self.enabled = enabled
+        self.max_cached_dates = max_cached_dates
+        self._graph: Optional[BomGraph] = None
+        # 그래프를 만든 스냅샷 (원본 DataFrame 을 붙잡지 않도록 약한 참조 + source/version 만)
+        self._snapshot_ref: Optional["weakref.ReferenceType[Snapshot]"] = None
+        self._source: Optional[str] = None
+        self._version: Optional[str] = None
+        # 빌드는 한 번에 하나만
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+        self.stale = 0
+        self.last_build_ms = 0.0
+
+    def _is_current(self, snap: Snapshot) -> bool:
+        if self._graph is None or self._source != snap.source:
+            return False
+        if self._snapshot_ref is not None and self._snapshot_ref() is snap:
+            return True
+        return snap.version is not None and snap.version == self._version
+
+    def get(self, engine: Engine, snapshot: Optional[Snapshot] = None) -> BomGraph:
+        """
+        engine 의 bom 테이블 그래프 (bom 스냅샷 버전이 그대로면 캐시).
+        snapshot 을 이미 받아 둔 호출 측은 넘겨서 스냅샷 조회를 한 번 줄인다
+        """
+        snap = snapshot or reference_snapshots.get_snapshot("bom", engine)
+        with self._lock:
+            if self.enabled and self._is_current(snap):
+                self.hits += 1
+                return self._graph
+            if self._graph is not None:
+                self.stale += 1
+
+            graph = BomGraph.build(snap.frame, version=snap.version, max_cached_dates=self.max_cached_dates)
+            self.last_build_ms = graph.build_ms
+            self.builds += 1
+            print(
+                f"[bom_graph] built: nodes={graph.nodes:,}, finished_goods={len(graph.top_codes):,}, "
+                f"build={graph.build_ms:.0f}ms"
+            )
+            if self.enabled:
+                self._graph = graph
+                self._snapshot_ref = weakref.ref(snap)
+                self._source, self._version = snap.source, snap.version
+            return graph
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._graph = None
+            self._snapshot_ref = None
+            self._source = self._version = None
+
+    def nbytes(self) -> int:
+        # 빌드 중인 락을 기다리지 않도록 현재 그래프만 읽는다
+        graph = self._graph
+        return graph.nbytes() if graph is not None else 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            graph = self._graph
+            return {
+                "enabled": self.enabled,
+                "loaded": graph is not None,
+                "version": graph.version if graph else None,
+                "nodes": graph.nodes if graph else 0,
+                "finished_goods": len(graph.top_codes) if graph else 0,
+                "bytes": graph.nbytes() if graph else 0,
+                "cached_dates": len(graph._multipliers) if graph else 0,
+                "hits": self.hits,
+                "builds": self.builds,
+                "stale": self.stale,
+                "last_build_ms": round(self.last_build_ms, 1),
+            }
+
+
+bom_graph_cache = BomGraphCache(
+    enabled=settings.BOM_GRAPH_CACHE_ENABLED,
+    max_cached_dates=settings.BOM_GRAPH_MAX_CACHED_DATES,
+)
+
+
+reference_snapshots.register_derived("bom_graph", bom_graph_cache.nbytes)
+
+
+def get_bom_graph_stats() -> Dict[str, Any]:
+    return bom_graph_cache.stats()
@@ -1,26 +1,50 @@
 # app/services/insight_service.py
 
 import json
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 from app.core.llm_client import llm_client
 from app.core.config import get_settings
+from app.schemas.analysis import ChartSpec
+from app.services.local_insight import infer_chart_spec, summarize_profile
+from app.services.result_profile import ProfileRows, exemplar_rows, profile_rows
+from app.services.sql_bi_service import ColumnarRows
 
 settings = get_settings()
 
-# 🔥 인사이트 + 차트 스펙 생성용 시스템 프롬프트
-INSIGHT_SYSTEM_PROMPT = """
+# 인사이트 프롬프트에 넣는 결과 행 수 (토큰 절약, INSIGHT_PROFILE_ENABLED=False 일 때)
+MAX_PREVIEW_ROWS = 50
+
+_INSIGHT_PERSONA = """
 너는 자동차 1차 협력사(일지테크)의 구매·생산·재고·판매 데이터를 분석하는
 BI 인사이트 생성 AI이다.
+"""
 
-입력으로 SQL 조회 결과(행 리스트)를 받으면,
-다음 두 가지를 반드시 JSON으로만 반환한다.
+_INPUT_FORMAT_GUIDE = """[입력 형식]
+- profile 이 있으면: 결과 전체의 컬럼별 통계 요약 + rows_sample(예시 몇 행)
+  * columns: 컬럼별 type(number/category/date), min/max/sum/mean, 빈도 top
+  * measure: 대표 수치 컬럼
+  * breakdown: 대표 범주별 measure 합계 Top-K 와 전체 대비 비중(share, 0~1)
+  * trend: 날짜 컬럼 기준 기간별 measure 합계의 기울기(slope_per_period), 처음 대비 마지막 증감률(change_pct, %)
+  * truncated 가 true 면 결과가 더 있고 통계는 앞부분 기준이다
+  수치는 예시 행이 아니라 profile 의 합계/비중/추세 값을 근거로 언급하라.
+- profile 이 없으면: rows_preview(결과 행 일부)
+"""
 
-1) insight_text
+_INSIGHT_TEXT_GUIDE = """1) insight_text
    - 한국어로 3~6줄 정도의 핵심 인사이트 요약
    - 경영진/구매팀장이 바로 이해할 수 있는 수준으로 작성
    - 수치/변동 방향/리스크/액션 포인트를 간단히 언급
+"""
+
+# 🔥 인사이트 + 차트 스펙 생성용 시스템 프롬프트
+INSIGHT_SYSTEM_PROMPT = _INSIGHT_PERSONA + """
+입력으로 SQL 조회 결과를 받으면,
+다음 두 가지를 반드시 JSON으로만 반환한다.
 
+""" + _INPUT_FORMAT_GUIDE + """
+""" + _INSIGHT_TEXT_GUIDE + """
 2) chart_spec
    - 프론트엔드에서 공통 차트 컴포넌트로 사용하기 위한 메타 정보
    - 형식:
@@ -56,45 +80,106 @@ BI 인사이트 생성 AI이다.
 }
 """
 
+# 차트를 로컬(local_insight)에서 정한 경우: insight_text 만 생성
+INSIGHT_TEXT_SYSTEM_PROMPT = _INSIGHT_PERSONA + """
+입력으로 SQL 조회 결과와 이미 정해진 차트(chart_spec)를 받으면,
+insight_text 하나만 반드시 JSON으로만 반환한다.
+차트 설명은 쓰지 말고 데이터가 말하는 내용에 집중하라.
 
-async def generate_insight_and_chart(
-    rows: List[Dict[str, Any]],
+""" + _INPUT_FORMAT_GUIDE + """
+""" + _INSIGHT_TEXT_GUIDE + """
+[출력 형식 (중요)]
+- 반드시 {"insight_text": "..."} JSON "하나만" 반환한다.
+- 자연어 설명, 마크다운, 코드블록, 다른 텍스트를 절대 섞지 마라.
+"""
+
+
+def _profile_or_none(rows: ProfileRows) -> Optional[Dict[str, Any]]:
+    if not settings.INSIGHT_PROFILE_ENABLED:
+        return None
+    try:
+        return profile_rows(rows)
+    except Exception as e:
+        # 통계 계산이 실패해도 인사이트는 원래 방식(행 미리보기)으로 만든다
+        print(f"[insight_service] profiling failed, sending raw rows: {e}")
+        return None
+
+
+def prepare_insight(
+    rows: ProfileRows,
     question: Optional[str] = None,
-    max_preview_rows: int = 50,
-) -> Dict[str, Any]:
+) -> Tuple[Optional[Dict[str, Any]], Optional[ChartSpec]]:
     """
-    SQL 결과 rows + (옵션) 원 질문을 기반으로
-    - insight_text
-    - chart_spec
-    를 생성해서 dict로 반환.
+    LLM 호출 전에 로컬에서 끝나는 부분: (통계 요약, chart_spec).
+    chart_spec 을 정하지 못하면 None → LLM 이 차트까지 고른다.
+    """
+    profile = _profile_or_none(rows)
+    chart_spec = infer_chart_spec(profile, question) if settings.INSIGHT_LOCAL_CHART_ENABLED else None
+    return profile, chart_spec
 
-    반환 예:
-    {
-      "insight_text": "...",
-      "chart_spec": { "type": "bar", "x_field": "...", "y_field": "...", "title": "..." }
-    }
+
+def fast_insight(profile: Optional[Dict[str, Any]], chart_spec: Optional[ChartSpec]) -> Dict[str, Any]:
     """
-    # rows가 너무 많으면 앞에서 일부만 잘라서 보냄 (토큰 절약)
-    preview_rows = rows[:max_preview_rows]
+    fast 모드: LLM 없이 통계 요약문 + 로컬 chart_spec
+    """
+    return _finish_result({"insight_text": summarize_profile(profile), "chart_spec": None}, profile, chart_spec)
 
-    payload = {
-        "question": question,
-        "rows_preview": preview_rows,
-    }
 
-    user_content = (
-        "다음은 BI 분석용 SQL 조회 결과 일부이다.\n"
-        "이 데이터를 보고 핵심 인사이트와 차트 스펙을 JSON으로 생성해라.\n\n"
-        + json.dumps(payload, ensure_ascii=False)
-    )
+def _finish_result(
+    result: Dict[str, Any],
+    profile: Optional[Dict[str, Any]],
+    chart_spec: Optional[ChartSpec],
+) -> Dict[str, Any]:
+    if chart_spec is not None:
+        result["chart_spec"] = chart_spec.model_dump()
+    if profile is not None:
+        result["kpis"] = profile
+    return result
 
-    messages = [
-        {"role": "system", "content": INSIGHT_SYSTEM_PROMPT},
+
+def _build_insight_messages(
+    rows: ProfileRows,
+    question: Optional[str],
+    max_preview_rows: int,
+    profile: Optional[Dict[str, Any]] = None,
+    chart_spec: Optional[ChartSpec] = None,
+) -> List[Dict[str, str]]:
+    if profile is not None:
+        payload = {
+            "question": question,
+            "profile": profile,
+            "rows_sample": exemplar_rows(rows, profile),
+        }
+        header = "다음은 BI 분석용 SQL 조회 결과의 통계 요약과 예시 행이다.\n"
+    else:
+        # rows가 너무 많으면 앞에서 일부만 잘라서 보냄 (토큰 절약)
+        if isinstance(rows, ColumnarRows):
+            preview_rows = rows.to_records(limit=max_preview_rows)
+        else:
+            preview_rows = list(rows[:max_preview_rows])
+        payload = {
+            "question": question,
+            "rows_preview": preview_rows,
+        }
+        header = "다음은 BI 분석용 SQL 조회 결과 일부이다.\n"
+
+    if chart_spec is not None:
+        payload["chart_spec"] = chart_spec.model_dump()
+        system_prompt = INSIGHT_TEXT_SYSTEM_PROMPT
+        instruction = "이 데이터를 보고 핵심 인사이트를 JSON으로 생성해라. (차트는 chart_spec 으로 정해져 있다)\n\n"
+    else:
+        system_prompt = INSIGHT_SYSTEM_PROMPT
+        instruction = "이 데이터를 보고 핵심 인사이트와 차트 스펙을 JSON으로 생성해라.\n\n"
+
+    user_content = header + instruction + json.dumps(payload, ensure_ascii=False, default=str)
+
+    return [
+        {"role": "system", "content": system_prompt},
         {"role": "user", "content": user_content},
     ]
 
-    raw = await llm_client.chat(messages, model=settings.OPENAI_INSIGHT_MODEL)
 
+def _parse_insight_raw(raw: str) -> Dict[str, Any]:
     # 기본 반환값
     result: Dict[str, Any] = {
         "insight_text": "",
@@ -114,3 +199,106 @@ async def generate_insight_and_chart(
         result["insight_text"] = raw.strip()
 
     return result
+
+
+async def generate_insight_and_chart(
+    rows: ProfileRows,
+    question: Optional[str] = None,
+    max_preview_rows: int = MAX_PREVIEW_ROWS,
+    profile: Optional[Dict[str, Any]] = None,
+    chart_spec: Optional[ChartSpec] = None,
+) -> Dict[str, Any]:
+    """
+    SQL 결과 rows(dict 리스트 또는 ColumnarRows) + (옵션) 원 질문을 기반으로
+    - insight_text
+    - chart_spec (로컬에서 정할 수 있으면 로컬, 아니면 LLM)
+    - kpis (로컬 통계 요약, INSIGHT_PROFILE_ENABLED 일 때)
+    를 생성해서 dict로 반환.
+    profile/chart_spec 을 이미 prepare_insight() 로 구했으면 넘겨서 재계산을 생략한다.
+
+    반환 예:
+    {
+      "insight_text": "...",
+      "chart_spec": { "type": "bar", "x_field": "...", "y_field": "...", "title": "..." }
+    }
+    """
+    if profile is None and chart_spec is None:
+        profile, chart_spec = prepare_insight(rows, question)
+    messages = _build_insight_messages(rows, question, max_preview_rows, profile, chart_spec)
+    raw = await llm_client.chat(messages, model=settings.OPENAI_INSIGHT_MODEL)
+    return _finish_result(_parse_insight_raw(raw), profile, chart_spec)
+
+
+# ---------------------------------------------------------
+# 스트리밍 (/ask/stream)
+# ---------------------------------------------------------
+_INSIGHT_TEXT_START_RE = re.compile(r'"insight_text"\s*:\s*"')
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+def _partial_insight_text(raw: str) -> str:
+    """
+    아직 다 오지 않은 JSON 문자열(raw)에서 insight_text 값의 "지금까지 확정된 앞부분"을 디코딩한다.
+    (끝에 잘린 이스케이프 시퀀스는 다음 조각이 올 때까지 보류)
+    """
+    m = _INSIGHT_TEXT_START_RE.search(raw)
+    if m is None:
+        return ""
+    out: List[str] = []
+    i, n = m.end(), len(raw)
+    while i < n:
+        ch = raw[i]
+        if ch == '"':
+            break
+        if ch != "\\":
+            out.append(ch)
+            i += 1
+            continue
+        if i + 1 >= n:
+            break
+        esc = raw[i + 1]
+        if esc == "u":
+            if i + 6 > n:
+                break
+            try:
+                out.append(chr(int(raw[i + 2:i + 6], 16)))
+            except ValueError:
+                pass
+            i += 6
+            continue
+        out.append(_JSON_ESCAPES.get(esc, esc))
+        i += 2
+    return "".join(out)
+
+
+async def stream_insight_and_chart(
+    rows: ProfileRows,
+    question: Optional[str] = None,
+    max_preview_rows: int = MAX_PREVIEW_ROWS,
+    profile: Optional[Dict[str, Any]] = None,
+    chart_spec: Optional[ChartSpec] = None,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    generate_insight_and_chart 의 스트리밍 버전.
+    - ("delta", str): insight_text 에 새로 추가된 부분 (모델이 토큰을 내보내는 대로)
+    - ("result", dict): 마지막에 한 번, generate_insight_and_chart 와 같은 형태의 최종 결과
+    """
+    if profile is None and chart_spec is None:
+        profile, chart_spec = prepare_insight(rows, question)
+    messages = _build_insight_messages(rows, question, max_preview_rows, profile, chart_spec)
+
+    raw = ""
+    streamed = ""
+    async for piece in llm_client.chat_stream(messages, model=settings.OPENAI_INSIGHT_MODEL):
+        raw += piece
+        text = _partial_insight_text(raw)
+        if len(text) > len(streamed):
+            yield "delta", text[len(streamed):]
+            streamed = text
+
+    result = _parse_insight_raw(raw)
+    # JSON 이 아니어서 delta 가 하나도 안 나간 경우 등, 남은 부분을 마저 보낸다
+    final_text = result.get("insight_text") or ""
+    if final_text.startswith(streamed) and len(final_text) > len(streamed):
+        yield "delta", final_text[len(streamed):]
+    yield "result", _finish_result(result, profile, chart_spec)
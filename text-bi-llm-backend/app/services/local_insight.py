@@ -0,0 +1,97 @@
+# app/services/local_insight.py
+"""
+인사이트 LLM 앞단의 로컬 차트/요약 생성기.
+
+- INSIGHT_SYSTEM_PROMPT 의 차트 규칙(기간 → line, 범주 비교 → bar, 비중 → pie)은 기계적이므로
+  result_profile 의 컬럼 통계로 chart_spec 을 바로 정한다 (infer_chart_spec).
+  → 차트는 rows 와 함께 즉시 내보내고, LLM 은 insight_text 만 쓴다.
+- fast 모드(AskRequest.insight_mode="fast")에서는 LLM 을 아예 부르지 않고
+  통계로 만든 짧은 요약문(summarize_profile)을 insight_text 로 쓴다.
+- 정할 수 없으면(수치 컬럼 없음 등) None → 호출 측이 기존처럼 LLM 에 차트 선택까지 맡긴다.
+"""
+
+import re
+from typing import Any, Dict, List, Optional
+
+from app.schemas.analysis import ChartSpec
+
+# 질문에 이런 표현이 있으면 범주 비교를 pie 로
+_SHARE_RE = re.compile(r"비중|구성비|점유율|비율|차지|share|ratio|portion", re.IGNORECASE)
+# pie 로 그릴 최대 조각 수 (넘으면 bar)
+PIE_MAX_SLICES = 8
+
+
+def _columns_of(profile: Dict[str, Any], kind: str) -> List[str]:
+    return [
+        name for name, info in profile.get("columns", {}).items()
+        if info.get("type") == kind and info.get("distinct", 0) > 1
+    ]
+
+
+def infer_chart_spec(profile: Optional[Dict[str, Any]], question: Optional[str] = None) -> Optional[ChartSpec]:
+    """
+    result_profile.profile_rows() 결과 → ChartSpec (정할 수 없으면 None)
+    """
+    if not profile or not profile.get("measure"):
+        return None
+    measure = profile["measure"]
+
+    # 1) 기간 추세 → line
+    dates = _columns_of(profile, "date")
+    if dates:
+        x_field = profile.get("trend", {}).get("date") or dates[0]
+        return ChartSpec(type="line", x_field=x_field, y_field=measure, title=f"{x_field}별 {measure} 추이")
+
+    # 2) 범주 비교 → bar, 질문이 비중을 묻고 조각 수가 적으면 pie
+    categories = _columns_of(profile, "category") + _columns_of(profile, "other")
+    if not categories:
+        return None
+    breakdown = profile.get("breakdown") or {}
+    x_field = breakdown.get("by") or categories[0]
+    groups = breakdown.get("groups") or profile["columns"][x_field].get("distinct", 0)
+    if question and _SHARE_RE.search(question) and groups <= PIE_MAX_SLICES:
+        return ChartSpec(type="pie", x_field=x_field, y_field=measure, title=f"{x_field}별 {measure} 비중")
+    return ChartSpec(type="bar", x_field=x_field, y_field=measure, title=f"{x_field}별 {measure}")
+
+
+def _fmt(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return f"{value:,.0f}" if abs(value) >= 100 else f"{value:,.2f}".rstrip("0").rstrip(".")
+
+
+def summarize_profile(profile: Optional[Dict[str, Any]]) -> str:
+    """
+    fast 모드용 통계 요약문 (LLM 없이)
+    """
+    if not profile:
+        return ""
+    n = profile.get("row_count", 0)
+    if n == 0:
+        return "조회 결과가 없습니다."
+
+    lines = [f"조회 결과 {n:,}행" + (" (앞부분 기준 통계)" if profile.get("truncated") else "") + "입니다."]
+    measure = profile.get("measure")
+    if measure:
+        info = profile["columns"][measure]
+        lines.append(
+            f"{measure} 합계 {_fmt(info.get('sum'))}, 평균 {_fmt(info.get('mean'))} "
+            f"(최소 {_fmt(info.get('min'))} ~ 최대 {_fmt(info.get('max'))})."
+        )
+
+    breakdown = profile.get("breakdown")
+    if breakdown and breakdown.get("top"):
+        top = breakdown["top"][0]
+        detail = _fmt(top.get("sum"))
+        if top.get("share") is not None:
+            detail += f", 전체의 {top['share'] * 100:.1f}%"
+        lines.append(f"{breakdown['by']} 기준 1위는 '{top['value']}'({detail})입니다. ({breakdown['groups']}개 그룹)")
+
+    trend = profile.get("trend")
+    if trend:
+        line = f"{trend['first_period']}~{trend['last_period']} {measure}: {_fmt(trend['first'])} → {_fmt(trend['last'])}"
+        if trend.get("change_pct") is not None:
+            direction = "증가" if trend["change_pct"] > 0 else "감소" if trend["change_pct"] < 0 else "변동 없음"
+            line += f" ({trend['change_pct']:+.1f}%, {direction})"
+        lines.append(line + f", 최고 시점은 {trend['peak_period']}입니다.")
+    return "\n".join(lines)
@@ -0,0 +1,264 @@
+# app/services/local_router.py
+"""
+Router LLM 앞단의 로컬 분류기 (sql_bi / report / help).
+
+- PO_OPEN_KEYWORDS 처럼 뻔한 질문은 LLM 왕복 없이 바로 분류한다.
+- 1단계: 키워드/정규식 규칙 점수 → (action, confidence)
+- 2단계(선택): ROUTER_LOCAL_TRAINING_PATH 의 로그 질문(JSONL: {"question", "action"})으로
+  만든 문자 n-gram TF-IDF 센트로이드 모델. 규칙이 애매할 때만 사용.
+- confidence 가 ROUTER_LOCAL_MIN_CONFIDENCE 미만이면 None 을 돌려주고,
+  호출 측(router_service)이 OPENAI_ROUTER_MODEL 로 넘긴다.
+  LLM 이 분류한 결과는 같은 파일에 적재되어 다음 학습 데이터가 된다.
+- 재학습: 적재가 ROUTER_LOCAL_RELOAD_EVERY 건 쌓이거나, 마지막 재학습 후
+  ROUTER_LOCAL_RELOAD_INTERVAL_SECONDS 가 지난 뒤 적재가 있으면 record() 안에서 다시 만든다.
+  record() 는 파일 I/O 라 호출 측에서 asyncio.to_thread 로 부른다.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import get_settings
+from app.services.sql_cache import normalize_question
+
+settings = get_settings()
+
+ACTIONS = ("sql_bi", "report", "help")
+
+
+@dataclass
+class RouteDecision:
+    action: str
+    confidence: float
+    source: str  # "rules" | "ngram"
+
+
+# ---------------------------------------------------------
+# 1) 규칙
+# ---------------------------------------------------------
+# (action, 패턴, 가중치). 패턴은 normalize_question 결과(소문자, 문장부호 제거)에 적용
+_RULES: List[Tuple[str, str, float]] = [
+    # 도움말: 시스템 자체/사용법
+    ("help", r"(뭘|뭐|무엇을?) ?할 ?수 ?있", 2.0),
+    ("help", r"사용법|사용 방법|도움말|매뉴얼|메뉴 안내|기능 설명", 2.0),
+    ("help", r"어떤 질문", 2.0),
+    ("help", r"질문 예시|예시 (질문|보여)", 1.5),
+    ("help", r"너 (뭐|누구)|넌 (뭐|누구)|(시스템|bi|ai)(가|는|이란|란) (뭐|무엇)", 2.0),
+    ("help", r"\bhelp\b|how to use", 2.0),
+    # 보고서: 이미 있는 결과를 형식만 바꾸기
+    ("report", r"(위|앞|이전|방금)(의|에서)? ?(분석|결과|내용|데이터|인사이트)", 2.0),
+    ("report", r"보고서|보고용|보고 자료|회의 ?자료|슬라이드|ppt", 1.5),
+    ("report", r"이?메일|메일 (형식|로)", 1.5),
+    ("report", r"(요약|정리)(해|해서|하여|문)", 1.0),
+    ("report", r"형식으로|양식으로|(작성|써) ?(줘|주세요)", 1.0),
+    # SQL BI: 데이터 조회
+    ("sql_bi", r"재고|발주|구매|생산|판매|수주|입고|부족|소요량|리드타임|안전재고|단가|bom", 1.0),
+    ("sql_bi", r"플랜트|공장|차종|자재|품번|공급업체|업체별|구매그룹", 1.0),
+    ("sql_bi", r"금액|수량|대수|건수|합계|평균|비율|증감|추이", 1.0),
+    ("sql_bi", r"\btop ?\d*|상위|하위|순위|월별|일별|주별|연도별|별로|\S+별", 1.0),
+    ("sql_bi", r"보여|알려|조회|비교|뽑아|몇 ?(개|건|대)|얼마", 0.5),
+    ("sql_bi", r"\d", 0.5),
+]
+_COMPILED_RULES = [(action, re.compile(pattern), weight) for action, pattern, weight in _RULES]
+
+# 규칙 점수가 이 값 이상이어야 confidence 가 1 에 도달 (근거가 하나뿐이면 확신하지 않음)
+_RULE_SATURATION = 2.5
+
+
+def score_rules(question: str) -> Dict[str, float]:
+    q = normalize_question(question)
+    scores = {a: 0.0 for a in ACTIONS}
+    for action, pattern, weight in _COMPILED_RULES:
+        if pattern.search(q):
+            scores[action] += weight
+    return scores
+
+
+def _decide(scores: Dict[str, float], source: str, saturation: float) -> Optional[RouteDecision]:
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    (top_action, top), (_, second) = ranked[0], ranked[1]
+    if top <= 0:
+        return None
+    # 다른 라벨과의 차이(margin) × 근거의 양(strength)
+    margin = (top - second) / top
+    strength = min(1.0, top / saturation)
+    return RouteDecision(action=top_action, confidence=round(margin * strength, 4), source=source)
+
+
+def classify_rules(question: str) -> Optional[RouteDecision]:
+    return _decide(score_rules(question), "rules", _RULE_SATURATION)
+
+
+# ---------------------------------------------------------
+# 2) 문자 n-gram 모델 (선택)
+# ---------------------------------------------------------
+def _char_ngrams(text: str, sizes: Sequence[int] = (2, 3)) -> Counter:
+    s = f" {normalize_question(text)} "
+    grams: Counter = Counter()
+    for n in sizes:
+        for i in range(len(s) - n + 1):
+            grams[s[i:i + n]] += 1
+    return grams
+
+
+def _l2_normalize(vec: Dict[str, float]) -> Dict[str, float]:
+    norm = math.sqrt(sum(v * v for v in vec.values()))
+    return {k: v / norm for k, v in vec.items()} if norm else {}
+
+
+class CharNgramRouter:
+    """
+    라벨별 TF-IDF 센트로이드와의 코사인 유사도로 분류하는 초경량 모델.
+    (scikit-learn 없이 동작, 라벨이 3개뿐이라 예측 비용은 질문 길이에 비례)
+    """
+
+    def __init__(self, samples: Sequence[Tuple[str, str]]):
+        docs = [(_char_ngrams(q), a) for q, a in samples if a in ACTIONS]
+        df: Counter = Counter()
+        for grams, _ in docs:
+            df.update(grams.keys())
+        n_docs = len(docs)
+        self.idf = {g: math.log((1 + n_docs) / (1 + c)) + 1.0 for g, c in df.items()}
+
+        sums: Dict[str, Counter] = {a: Counter() for a in ACTIONS}
+        for grams, action in docs:
+            for g, w in self._tfidf(grams).items():
+                sums[action][g] += w
+        self.centroids = {a: _l2_normalize(dict(c)) for a, c in sums.items() if c}
+        self.size = n_docs
+
+    def _tfidf(self, grams: Counter) -> Dict[str, float]:
+        return _l2_normalize({g: (1.0 + math.log(tf)) * self.idf[g] for g, tf in grams.items() if g in self.idf})
+
+    def classify(self, question: str) -> Optional[RouteDecision]:
+        if len(self.centroids) < 2:
+            return None
+        vec = self._tfidf(_char_ngrams(question))
+        scores = {
+            a: sum(w * centroid.get(g, 0.0) for g, w in vec.items())
+            for a, centroid in self.centroids.items()
+        }
+        for a in ACTIONS:
+            scores.setdefault(a, 0.0)
+        # 유사도 0.5 이상이면 근거 충분으로 본다
+        return _decide(scores, "ngram", 0.5)
+
+
+def load_training_samples(path: Optional[str]) -> List[Tuple[str, str]]:
+    if not path or not os.path.exists(path):
+        return []
+    samples: List[Tuple[str, str]] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(item, dict) and item.get("action") in ACTIONS and item.get("question"):
+                samples.append((str(item["question"]), item["action"]))
+    return samples
+
+
+# ---------------------------------------------------------
+# 진입점
+# ---------------------------------------------------------
+class LocalRouter:
+    def __init__(
+        self,
+        training_path: Optional[str] = None,
+        min_confidence: float = 0.8,
+        reload_every: int = 50,
+        reload_interval: float = 600.0,
+    ):
+        self.training_path = training_path
+        self.min_confidence = min_confidence
+        self.reload_every = reload_every
+        self.reload_interval = reload_interval
+        self._model: Optional[CharNgramRouter] = None
+        self._loaded = False
+        self._loaded_at = 0.0
+        self._pending = 0  # 마지막 재학습 이후 적재 건수
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.reloads = 0
+
+    def reload(self) -> int:
+        """
+        로그 질문으로 n-gram 모델을 다시 만든다. 반환: 학습 샘플 수
+        """
+        with self._reload_lock:
+            with self._lock:
+                pending = self._pending
+            samples = load_training_samples(self.training_path)
+            model = CharNgramRouter(samples) if samples else None
+            with self._lock:
+                self._model = model
+                self._loaded = True
+                self._loaded_at = time.monotonic()
+                # 읽는 동안 적재된 건은 다음 재학습 대상으로 남긴다
+                self._pending -= pending
+                self.reloads += 1
+        return len(samples)
+
+    def _reload_due(self) -> bool:
+        if self._pending <= 0:
+            return False
+        if self.reload_every > 0 and self._pending >= self.reload_every:
+            return True
+        return self.reload_interval > 0 and time.monotonic() - self._loaded_at >= self.reload_interval
+
+    def _get_model(self) -> Optional[CharNgramRouter]:
+        if not self._loaded:
+            self.reload()
+        return self._model
+
+    def classify(self, question: str) -> Optional[RouteDecision]:
+        """
+        확신도가 min_confidence 이상인 결정만 반환 (아니면 None → LLM 라우터 사용)
+        """
+        decision = classify_rules(question)
+        if decision is not None and decision.confidence >= self.min_confidence:
+            return decision
+
+        model = self._get_model()
+        if model is not None:
+            decision = model.classify(question)
+            if decision is not None and decision.confidence >= self.min_confidence:
+                return decision
+        return None
+
+    def record(self, question: str, action: str) -> None:
+        """
+        LLM 라우터 결과를 학습 파일에 적재하고, 재학습 조건이 되면 모델을 다시 만든다.
+        (블로킹 I/O — 이벤트 루프에서는 asyncio.to_thread 로 호출)
+        """
+        if not self.training_path or action not in ACTIONS:
+            return
+        line = json.dumps({"question": question, "action": action}, ensure_ascii=False)
+        try:
+            with self._lock:
+                with open(self.training_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self._pending += 1
+                due = self._loaded and self._reload_due()
+        except OSError as e:
+            print(f"[local_router] 학습 로그 기록 실패: {e}")
+            return
+        # 이미 다른 스레드가 재학습 중이면 그쪽 결과를 쓴다
+        if due and not self._reload_lock.locked():
+            n = self.reload()
+            print(f"[local_router] n-gram 모델 재학습: samples={n}")
+
+
+local_router = LocalRouter(
+    training_path=settings.ROUTER_LOCAL_TRAINING_PATH,
+    min_confidence=settings.ROUTER_LOCAL_MIN_CONFIDENCE,
+    reload_every=settings.ROUTER_LOCAL_RELOAD_EVERY,
+    reload_interval=settings.ROUTER_LOCAL_RELOAD_INTERVAL_SECONDS,
+)
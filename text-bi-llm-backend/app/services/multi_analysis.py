@@ -1,8 +1,10 @@
 # app/services/multi_analysis.py
+from functools import partial
 from typing import List
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from app.db.executor import fan_out_db
 from app.schemas.analysis import AnalysisResult, ChartSpec
 
 
@@ -17,6 +19,43 @@ def _rows_from_result(result) -> List[dict]:
     return rows
 
 
+def _query_rows(sql, db: Session) -> List[dict]:
+    """
+    동기 실행 + dict 변환 (fan_out_db 로 DB 스레드풀에서 호출)
+    """
+    return _rows_from_result(db.execute(sql))
+
+
+# 여기서는 예시로 stock_check 테이블 사용
+# 필요하면 stock_check_11_24 등으로 변경 가능
+SQL_PLANT_STOCK_TOP5 = text("""
+    SELECT
+        플랜트,
+        SUM(재고수량)      AS 재고수량합계,
+        SUM(재고금액)      AS 재고금액합계
+    FROM stock_check
+    GROUP BY 플랜트
+    ORDER BY 재고금액합계 DESC
+    LIMIT 5
+""")
+
+SQL_PLANT_SHORTAGE_TOP5 = text("""
+    SELECT
+        플랜트,
+        SUM(
+            CASE
+                WHEN D0_D1부족 < 0 THEN -D0_D1부족
+                ELSE 0
+            END
+        ) AS 이틀부족수량
+    FROM all_plan
+    GROUP BY 플랜트
+    HAVING 이틀부족수량 > 0
+    ORDER BY 이틀부족수량 DESC
+    LIMIT 5
+""")
+
+
 async def build_multi_analysis(
     db: Session,
     question: str,
@@ -30,6 +69,7 @@ async def build_multi_analysis(
       - 플랜트별 재고금액 TOP 5
       - 플랜트별 D0_D1 부족 수량 TOP 5
     두 개 서브 분석을 붙여 준다.
+    (두 쿼리는 서로 독립적이므로 별도 커넥션으로 동시에 실행한다)
     """
     q = question or ""
     sub_results: List[AnalysisResult] = []
@@ -38,92 +78,60 @@ async def build_multi_analysis(
     if ("플랜트" not in q) and ("공장" not in q):
         return sub_results
 
+    res_stock, res_shortage = await fan_out_db([
+        ("plant_inventory_top5", partial(_query_rows, SQL_PLANT_STOCK_TOP5)),
+        ("plant_shortage_top5", partial(_query_rows, SQL_PLANT_SHORTAGE_TOP5)),
+    ])
+
     # ---------------------------
     # 1) 플랜트별 재고금액 TOP 5
     # ---------------------------
-    try:
-        # 여기서는 예시로 stock_check 테이블 사용
-        # 필요하면 stock_check_11_24 등으로 변경 가능
-        sql_stock = text("""
-            SELECT
-                플랜트,
-                SUM(재고수량)      AS 재고수량합계,
-                SUM(재고금액)      AS 재고금액합계
-            FROM stock_check
-            GROUP BY 플랜트
-            ORDER BY 재고금액합계 DESC
-            LIMIT 5
-        """)
-        result_stock = db.execute(sql_stock)
-        rows_stock = _rows_from_result(result_stock)
-
-        if rows_stock:
-            sub_results.append(
-                AnalysisResult(
-                    name="plant_inventory_top5",
-                    sql_list=[str(sql_stock)],
-                    rows=rows_stock,
-                    row_count=len(rows_stock),
-                    insight_text=(
-                        "플랜트별 재고금액 TOP 5 현황입니다. "
-                        "재고금액이 높은 플랜트는 재고부담/캐시플로우 관점에서 추가 점검이 필요할 수 있습니다."
-                    ),
-                    chart_spec=ChartSpec(
-                        type="bar",
-                        x_field="플랜트",
-                        y_field="재고금액합계",
-                        title="플랜트별 재고금액 TOP 5"
-                    ),
-                    kpis={}
-                )
+    # 에러/시간 초과가 나도 전체 ask는 죽지 않도록 (fan_out_db 에서 로그만 찍고) 넘어간다
+    rows_stock = res_stock.value if res_stock.ok else None
+    if rows_stock:
+        sub_results.append(
+            AnalysisResult(
+                name="plant_inventory_top5",
+                sql_list=[str(SQL_PLANT_STOCK_TOP5)],
+                rows=rows_stock,
+                row_count=len(rows_stock),
+                insight_text=(
+                    "플랜트별 재고금액 TOP 5 현황입니다. "
+                    "재고금액이 높은 플랜트는 재고부담/캐시플로우 관점에서 추가 점검이 필요할 수 있습니다."
+                ),
+                chart_spec=ChartSpec(
+                    type="bar",
+                    x_field="플랜트",
+                    y_field="재고금액합계",
+                    title="플랜트별 재고금액 TOP 5"
+                ),
+                kpis={}
             )
-    except Exception as e:
-        # 에러 나도 전체 ask는 죽지 않도록 로그만 찍고 넘어간다
-        print("[multi_analysis] plant_inventory_top5 error:", e)
+        )
 
     # ---------------------------
     # 2) 플랜트별 2일 기준 부족 수량(D0_D1부족) TOP 5
     # ---------------------------
-    try:
-        sql_shortage = text("""
-            SELECT
-                플랜트,
-                SUM(
-                    CASE
-                        WHEN D0_D1부족 < 0 THEN -D0_D1부족
-                        ELSE 0
-                    END
-                ) AS 이틀부족수량
-            FROM all_plan
-            GROUP BY 플랜트
-            HAVING 이틀부족수량 > 0
-            ORDER BY 이틀부족수량 DESC
-            LIMIT 5
-        """)
-        result_shortage = db.execute(sql_shortage)
-        rows_shortage = _rows_from_result(result_shortage)
-
-        if rows_shortage:
-            sub_results.append(
-                AnalysisResult(
-                    name="plant_shortage_top5",
-                    sql_list=[str(sql_shortage)],
-                    rows=rows_shortage,
-                    row_count=len(rows_shortage),
-                    insight_text=(
-                        "플랜트별 2일 기준 부족 수량 상위 5개입니다. "
-                        "이 구간은 생산·납기 리스크가 높은 구간으로, 사전 발주/증산 여부 검토가 필요합니다."
-                    ),
-                    chart_spec=ChartSpec(
-                        type="bar",
-                        x_field="플랜트",
-                        y_field="이틀부족수량",
-                        title="플랜트별 2일 기준 부족 수량 TOP 5"
-                    ),
-                    kpis={}
-                )
+    rows_shortage = res_shortage.value if res_shortage.ok else None
+    if rows_shortage:
+        sub_results.append(
+            AnalysisResult(
+                name="plant_shortage_top5",
+                sql_list=[str(SQL_PLANT_SHORTAGE_TOP5)],
+                rows=rows_shortage,
+                row_count=len(rows_shortage),
+                insight_text=(
+                    "플랜트별 2일 기준 부족 수량 상위 5개입니다. "
+                    "이 구간은 생산·납기 리스크가 높은 구간으로, 사전 발주/증산 여부 검토가 필요합니다."
+                ),
+                chart_spec=ChartSpec(
+                    type="bar",
+                    x_field="플랜트",
+                    y_field="이틀부족수량",
+                    title="플랜트별 2일 기준 부족 수량 TOP 5"
+                ),
+                kpis={}
             )
-    except Exception as e:
-        print("[multi_analysis] plant_shortage_top5 error:", e)
+        )
 
     return sub_results
@@ -0,0 +1,395 @@
+# app/services/po_open_agg.py
+"""
+구매오더 미결 리포트용 일자별 사전집계 (po_open_daily_agg).
+
+- 분기/연간처럼 긴 기간 리포트는 migyul 원본 대신 이 테이블을 읽는다.
+  (짧은 기간은 fetch_live_aggregates 로 같은 집계를 migyul 에서 바로 GROUP BY)
+- 집계 단위: 생성일자 × 상태 × 플랜트명 × 생성자명 × 대표차종 → 건수
+  (알림등급/경과일수는 생성일자와 기준일만으로 정해지므로 조회 시점에 계산)
+- 증분 갱신: 일자별 지문(건수, MAX(생성일), CRC32 합)을 po_open_daily_agg_state 에 저장해 두고,
+  지문이 달라진(신규/변경/삭제) 일자만 다시 집계한다. 지문 확인도 단계별로 줄인다.
+  1) migyul 테이블 버전(information_schema)이 지난 확인 때와 같으면 스캔 없이 끝
+  2) 일자별 COUNT/MAX(생성일) 만 조회 (생성일 인덱스만 읽음) → 건수/최종생성일이 바뀐 일자
+  3) CRC32 지문(행 전체 읽기)은 2)에서 걸린 일자 + 아직 미결 건이 남은 일자만
+  미결 → 완료 상태 변경은 미결이 남은 일자에서만 일어나므로 3)에서 잡힌다.
+  (미결이 하나도 없는 과거 일자의 행을 건수 변화 없이 고치는 경우는 refresh(force) 로 반영)
+- 지문 확인은 PO_OPEN_AGG_REFRESH_INTERVAL_SECONDS 동안은 건너뛴다.
+- 경고 상세 목록도 사전집계의 일자별 경고 건수로 필요한 가장 최근 일자까지만 원본을 읽는다.
+"""
+
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.services.reference_snapshot import probe_table_version
+
+settings = get_settings()
+
+AGG_TABLE = "po_open_daily_agg"
+STATE_TABLE = "po_open_daily_agg_state"
+AGG_LOCK_NAME = "po_open_daily_agg_refresh"
+
+AGG_COLUMNS = ["생성일자", "상태", "플랜트명", "생성자명", "대표차종", "건수"]
+
+_CREATE_AGG_SQL = f"""
+CREATE TABLE IF NOT EXISTS {AGG_TABLE} (
+  `생성일자` DATE NOT NULL,
+  `상태` VARCHAR(16) NULL,
+  `플랜트명` VARCHAR(100) NULL,
+  `생성자명` VARCHAR(100) NOT NULL,
+  `대표차종` VARCHAR(100) NOT NULL,
+  `건수` INT NOT NULL,
+  KEY idx_po_open_daily_agg_day (`생성일자`)
+) DEFAULT CHARSET=utf8mb4
+"""
+
+_CREATE_STATE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+  `생성일자` DATE NOT NULL PRIMARY KEY,
+  `row_cnt` BIGINT NOT NULL,
+  `checksum` BIGINT NOT NULL,
+  `max_created` DATETIME NULL,
+  `refreshed_at` DATETIME NOT NULL
+) DEFAULT CHARSET=utf8mb4
+"""
+
+# 이전 버전에서 만든 상태 테이블에는 max_created 가 없다 (NULL → 다음 갱신 때 지문을 다시 계산)
+_HAS_MAX_CREATED_SQL = text(
+    f"""
+SELECT COUNT(*)
+FROM information_schema.columns
+WHERE table_schema = DATABASE()
+  AND table_name = '{STATE_TABLE}'
+  AND column_name = 'max_created'
+"""
+)
+_ADD_MAX_CREATED_SQL = text(f"ALTER TABLE {STATE_TABLE} ADD COLUMN `max_created` DATETIME NULL AFTER `checksum`")
+
+_RANGE_WHERE = "`생성일` >= :start_dt AND `생성일` < DATE_ADD(:end_dt, INTERVAL 1 DAY)"
+
+# 1단계: 생성일 컬럼만 읽는 가벼운 지문
+_COUNT_SQL = text(
+    f"""
+SELECT DATE(`생성일`) AS `생성일자`, COUNT(*) AS row_cnt, MAX(`생성일`) AS max_created
+FROM migyul
+WHERE {_RANGE_WHERE}
+GROUP BY DATE(`생성일`)
+"""
+)
+
+# 2단계: 후보 일자만 행 내용 CRC32 (start_dt/end_dt 는 후보 일자의 최소/최대로 좁혀서 넘긴다)
+_CHECKSUM_SQL = text(
+    f"""
+SELECT
+  DATE(`생성일`) AS `생성일자`,
+  SUM(CRC32(CONCAT_WS('|', `상태`, `플랜트명`, `생성자명`, `대표차종`, `구매오더`, `구매오더품목`))) AS checksum
+FROM migyul
+WHERE {_RANGE_WHERE}
+  AND DATE(`생성일`) IN :days
+GROUP BY DATE(`생성일`)
+"""
+).bindparams(bindparam("days", expanding=True))
+
+_STATE_SQL = text(
+    f"""
+SELECT `생성일자`, row_cnt, checksum, max_created
+FROM {STATE_TABLE}
+WHERE `생성일자` BETWEEN :start_dt AND :end_dt
+"""
+)
+
+_OPEN_DAYS_SQL = text(
+    f"""
+SELECT DISTINCT `생성일자`
+FROM {AGG_TABLE}
+WHERE `생성일자` BETWEEN :start_dt AND :end_dt
+  AND `상태` = '@5D@'
+"""
+)
+
+_DELETE_AGG_SQL = text(f"DELETE FROM {AGG_TABLE} WHERE `생성일자` IN :days").bindparams(
+    bindparam("days", expanding=True)
+)
+_DELETE_STATE_SQL = text(f"DELETE FROM {STATE_TABLE} WHERE `생성일자` IN :days").bindparams(
+    bindparam("days", expanding=True)
+)
+
+# migyul → (생성일자, 상태, 플랜트명, 생성자명, 대표차종, 건수) 집계 (사전집계 적재/실시간 조회 공용)
+_AGG_SELECT = f"""
+SELECT
+  DATE(`생성일`) AS `생성일자`,
+  `상태`,
+  `플랜트명`,
+  COALESCE(NULLIF(TRIM(`생성자명`), ''), '(미상)') AS `생성자명`,
+  COALESCE(NULLIF(TRIM(`대표차종`), ''), '(미상)') AS `대표차종`,
+  COUNT(*) AS `건수`
+FROM migyul
+WHERE {_RANGE_WHERE}
+"""
+
+_LIVE_AGG_SQL = text(_AGG_SELECT + "GROUP BY 1, 2, 3, 4, 5")
+
+_INSERT_AGG_SQL = text(
+    f"INSERT INTO {AGG_TABLE} (`생성일자`, `상태`, `플랜트명`, `생성자명`, `대표차종`, `건수`)\n"
+    + _AGG_SELECT
+    + "  AND DATE(`생성일`) IN :days\nGROUP BY 1, 2, 3, 4, 5"
+).bindparams(bindparam("days", expanding=True))
+
+_INSERT_STATE_SQL = text(
+    f"""
+INSERT INTO {STATE_TABLE} (`생성일자`, row_cnt, checksum, max_created, refreshed_at)
+VALUES (:day, :row_cnt, :checksum, :max_created, NOW())
+"""
+)
+
+_SELECT_AGG_SQL = text(
+    f"""
+SELECT `생성일자`, `상태`, `플랜트명`, `생성자명`, `대표차종`, `건수`
+FROM {AGG_TABLE}
+WHERE `생성일자` BETWEEN :start_dt AND :end_dt
+"""
+)
+
+# 일자별 경고(미결 + 경과일수 >= warn_days) 건수, 오래된 일자부터
+_WARN_DAYS_SQL = text(
+    f"""
+SELECT `생성일자`, SUM(`건수`) AS `건수`
+FROM {AGG_TABLE}
+WHERE `생성일자` BETWEEN :start_dt AND :end_dt
+  AND `상태` = '@5D@'
+  AND `생성일자` < :warn_cutoff
+GROUP BY `생성일자`
+ORDER BY `생성일자`
+"""
+)
+
+_WARN_LIST_SQL = text(
+    f"""
+SELECT
+  `플랜트명`,
+  `대표차종`,
+  `구매오더`,
+  `구매오더품목`,
+  `공급업체명`,
+  `자재번호`,
+  `내역`,
+  `생성일`,
+  DATEDIFF(:base_date, DATE(`생성일`)) AS `경과일수`,
+  `납품요청일`,
+  `오더수량`
+FROM migyul
+WHERE {_RANGE_WHERE}
+  AND `상태` = '@5D@'
+  AND `생성일` < :warn_cutoff
+ORDER BY `경과일수` DESC, `플랜트명`, `대표차종`
+LIMIT :limit
+"""
+)
+
+_ensured = False
+_ensure_lock = threading.Lock()
+# (기간) → (확인 시각, 확인 당시 migyul 버전)
+_last_checked: Dict[Tuple[date, date], Tuple[float, Optional[str]]] = {}
+_last_checked_lock = threading.Lock()
+
+
+def ensure_agg_tables(db: Session) -> None:
+    global _ensured
+    if _ensured:
+        return
+    with _ensure_lock:
+        if not _ensured:
+            db.execute(text(_CREATE_AGG_SQL))
+            db.execute(text(_CREATE_STATE_SQL))
+            if not db.execute(_HAS_MAX_CREATED_SQL).scalar():
+                db.execute(_ADD_MAX_CREATED_SQL)
+            db.commit()
+            _ensured = True
+
+
+def _range_params(start_date: date, end_date: date) -> Dict[str, Any]:
+    return {"start_dt": start_date.isoformat(), "end_dt": end_date.isoformat()}
+
+
+def _day(value: Any) -> date:
+    return value if isinstance(value, date) else date.fromisoformat(str(value)[:10])
+
+
+def _stamp(value: Any) -> Optional[str]:
+    # DATETIME/문자열 생성일 모두 같은 형태로 비교
+    return None if value is None else str(value)
+
+
+def checksum_candidates(
+    current: Dict[date, Tuple[int, Optional[str]]],
+    stored: Dict[date, Tuple[int, int, Optional[str]]],
+    open_days: Iterable[date],
+) -> List[date]:
+    """
+    CRC32 지문을 다시 계산할 일자.
+    current: 일자 → (건수, MAX(생성일)), stored: 일자 → (건수, CRC32 합, MAX(생성일))
+    - 건수/최종생성일이 저장값과 다른 일자 (신규 포함)
+    - 저장된 집계에 미결 건이 남아 있는 일자 (상태 변경 가능)
+    """
+    open_set: Set[date] = set(open_days)
+    return sorted(
+        d
+        for d, (row_cnt, max_created) in current.items()
+        if d in open_set or d not in stored or (stored[d][0], stored[d][2]) != (row_cnt, max_created)
+    )
+
+
+def refresh_daily_aggregates(db: Session, start_date: date, end_date: date, force: bool = False) -> int:
+    """
+    기간 내 신규/변경/삭제된 일자만 다시 집계한다. 반환: 갱신된 일자 수
+    """
+    key = (start_date, end_date)
+    now = time.monotonic()
+    with _last_checked_lock:
+        last = _last_checked.get(key)
+    if not force and last is not None and now - last[0] < settings.PO_OPEN_AGG_REFRESH_INTERVAL_SECONDS:
+        return 0
+
+    # 지문 스캔 전에 버전을 읽어 둔다 (스캔 중에 바뀌면 다음 확인 때 버전이 달라 다시 본다)
+    version = probe_table_version(db.get_bind(), "migyul")
+    if not force and last is not None and version is not None and version == last[1]:
+        with _last_checked_lock:
+            _last_checked[key] = (now, version)
+        return 0
+
+    ensure_agg_tables(db)
+    params = _range_params(start_date, end_date)
+
+    # 여러 워커가 같은 일자를 동시에 다시 쓰지 않도록 DB 레벨 잠금
+    got_lock = db.execute(text("SELECT GET_LOCK(:name, 30)"), {"name": AGG_LOCK_NAME}).scalar()
+    if not got_lock:
+        raise TimeoutError("po_open_daily_agg 갱신 잠금을 얻지 못했습니다.")
+    try:
+        current = {
+            _day(row[0]): (int(row[1]), _stamp(row[2]))
+            for row in db.execute(_COUNT_SQL, params).fetchall()
+        }
+        stored = {
+            _day(row[0]): (int(row[1]), int(row[2]), _stamp(row[3]))
+            for row in db.execute(_STATE_SQL, params).fetchall()
+        }
+        open_days = [_day(row[0]) for row in db.execute(_OPEN_DAYS_SQL, params).fetchall()]
+
+        candidates = sorted(current) if force else checksum_candidates(current, stored, open_days)
+        checksums: Dict[date, int] = {}
+        if candidates:
+            checksums = {
+                _day(row[0]): int(row[1] or 0)
+                for row in db.execute(
+                    _CHECKSUM_SQL,
+                    {**_range_params(candidates[0], candidates[-1]), "days": candidates},
+                ).fetchall()
+            }
+
+        changed = [
+            d for d in candidates
+            if stored.get(d) != (current[d][0], checksums.get(d, 0), current[d][1])
+        ]
+        removed = [d for d in stored if d not in current]
+        stale = changed + removed
+
+        if stale:
+            db.execute(_DELETE_AGG_SQL, {"days": stale})
+            db.execute(_DELETE_STATE_SQL, {"days": stale})
+        if changed:
+            db.execute(_INSERT_AGG_SQL, {**params, "days": changed})
+            db.execute(
+                _INSERT_STATE_SQL,
+                [
+                    {"day": d, "row_cnt": current[d][0], "checksum": checksums.get(d, 0), "max_created": current[d][1]}
+                    for d in changed
+                ],
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": AGG_LOCK_NAME})
+
+    with _last_checked_lock:
+        _last_checked[key] = (now, version)
+    print(
+        f"[po_open_agg] {start_date}~{end_date}: {len(current)} day(s), "
+        f"checksummed {len(candidates)}, refreshed {len(stale)}"
+    )
+    return len(stale)
+
+
+def fetch_live_aggregates(db: Session, start_date: date, end_date: date) -> List[Tuple[Any, ...]]:
+    """
+    사전집계 없이 migyul 에서 바로 GROUP BY (짧은 기간용). 반환 형식은 fetch_daily_aggregates 와 동일
+    """
+    return [tuple(r) for r in db.execute(_LIVE_AGG_SQL, _range_params(start_date, end_date)).fetchall()]
+
+
+def fetch_daily_aggregates(db: Session, start_date: date, end_date: date) -> List[Tuple[Any, ...]]:
+    """
+    AGG_COLUMNS 순서의 (생성일자, 상태, 플랜트명, 생성자명, 대표차종, 건수) 튜플 리스트
+    """
+    return [tuple(r) for r in db.execute(_SELECT_AGG_SQL, _range_params(start_date, end_date)).fetchall()]
+
+
+def warn_list_end(day_counts: Iterable[Tuple[Any, Any]], limit: int) -> Optional[date]:
+    """
+    오래된 일자부터 경고 건수를 누적해 limit 건을 채우는 가장 최근 일자 (못 채우면 None)
+    """
+    total = 0
+    for day, cnt in day_counts:
+        total += int(cnt or 0)
+        if total >= limit:
+            return _day(day)
+    return None
+
+
+def fetch_warn_list(
+    db: Session,
+    start_date: date,
+    end_date: date,
+    base_date: date,
+    warn_days: int,
+    limit: int = 50,
+    use_aggregates: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    경고(미결 + 경과일수 >= warn_days) 상세 Top N. 상세 컬럼이 필요해 원본에서 조회하되,
+    use_aggregates 이면 사전집계의 일자별 경고 건수로 Top N 이 들어 있는 일자까지만 읽는다.
+    (경과일수 내림차순 = 생성일 오름차순이므로 그 일자까지 N 건 이상이면 Top N 은 모두 그 안에 있다.
+     집계가 갱신 전이라 N 건이 안 나오면 전체 기간으로 다시 조회)
+    """
+    # DATEDIFF(base, DATE(생성일)) >= warn_days  ⇔  생성일 < base - (warn_days - 1)일
+    warn_cutoff = (base_date - timedelta(days=warn_days - 1)).isoformat()
+    params = {
+        **_range_params(start_date, end_date),
+        "base_date": base_date.isoformat(),
+        "warn_cutoff": warn_cutoff,
+        "limit": limit,
+    }
+
+    def run(end_dt: str) -> List[Dict[str, Any]]:
+        result = db.execute(_WARN_LIST_SQL, {**params, "end_dt": end_dt})
+        keys = list(result.keys())
+        return [dict(zip(keys, row)) for row in result.fetchall()]
+
+    if use_aggregates:
+        try:
+            bound = warn_list_end(db.execute(_WARN_DAYS_SQL, params).fetchall(), limit)
+        except Exception as e:
+            # replica 에 집계 테이블이 아직 없는 경우 등
+            print(f"[po_open_agg] warn list bound from aggregates failed: {e}")
+            bound = None
+        if bound is not None and bound < end_date:
+            rows = run(bound.isoformat())
+            if len(rows) >= limit:
+                return rows
+    return run(params["end_dt"])
@@ -2,15 +2,27 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import date, datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from sqlalchemy import text
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
 
+from app.core.config import get_settings
+from app.db.executor import fan_out_db
 from app.schemas.analysis import ChartSpec
 from app.schemas.ask import SubAnalysis
+from app.services.po_open_agg import (
+    AGG_COLUMNS,
+    fetch_daily_aggregates,
+    fetch_live_aggregates,
+    fetch_warn_list,
+    refresh_daily_aggregates,
+)
+
+settings = get_settings()
 
 
 PO_OPEN_KEYWORDS = [
@@ -43,51 +55,206 @@ def _as_date(value: Any) -> date:
     raise TypeError(f"Unsupported date type: {type(value)}")
 
 
-def _rows_from_result(result) -> List[Dict[str, Any]]:
-    keys = list(result.keys())
-    return [dict(zip(keys, row)) for row in result.fetchall()]
-
-
-def _po_open_base_cte_sql() -> str:
-    # NOTE: 테이블/컬럼명은 실제 DB(migyul) 기준으로 작성.
-    # - 상태: @5B@ (완료), @5D@ (미결)
-    # - 사유(비고) 컬럼은 현재 DB 인코딩 이슈로 SQL에서 직접 처리하지 않고(=0으로 고정),
-    #   리포트 룰은 "미결 + 경과일수" 기준으로만 분류한다.
-    return """
-WITH base AS (
-  SELECT
-    `상태`,
-    DATE(`생성일`) AS `생성일자`,
-    `생성일`,
-    `플랜트`,
-    `플랜트명`,
-    `구매오더`,
-    `구매오더품목`,
-    `생성자`,
-    `생성자명`,
-    `공급업체`,
-    `공급업체명`,
-    `대표차종`,
-    `자재번호`,
-    `내역`,
-    `납품요청일`,
-    `오더수량`,
-    0 AS `사유있음`,
-    DATEDIFF(:base_date, DATE(`생성일`)) AS `경과일수`,
-    CASE
-      WHEN `상태` = '@5B@' THEN '정상'
-      WHEN `상태` = '@5D@' AND DATEDIFF(:base_date, DATE(`생성일`)) >= 14
-        THEN '경고'
-      WHEN `상태` = '@5D@' AND DATEDIFF(:base_date, DATE(`생성일`)) < 14
-        THEN '확인필요'
-      WHEN `상태` = '@5D@' THEN '확인필요'
-      ELSE '기타'
-    END AS `알림등급`
-  FROM migyul
-  WHERE `생성일` >= :start_dt
-    AND `생성일` < DATE_ADD(:end_dt, INTERVAL 1 DAY)
-)
-"""
+GRADE_ORDER = ["정상", "확인필요", "경고", "기타"]
+WARN_ELAPSED_DAYS = 14
+
+def _native(value: Any) -> Any:
+    # numpy/pandas 스칼라 → 파이썬 기본 타입 (JSON 직렬화용), NaN/NaT → None
+    if value is None:
+        return None
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    if value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+        if isinstance(value, float) and np.isnan(value):
+            return None
+    return value
+
+
+def _frame_to_rows(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    cols = list(df.columns)
+    return [
+        {col: _native(val) for col, val in zip(cols, row)}
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+def _label_or_unknown(series: pd.Series) -> pd.Series:
+    # SQL: COALESCE(NULLIF(TRIM(x), ''), '(미상)')
+    s = series.astype("string").str.strip()
+    return s.mask(s.isna() | (s == ""), "(미상)").astype(object)
+
+
+def _warn_top(
+    df: pd.DataFrame,
+    key: pd.Series,
+    key_name: str,
+    having: str,
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    key 별 경고건수/미결건수/경고비율(미결대비) Top N.
+    having: "경고건수" 또는 "미결건수" (해당 값 > 0 인 그룹만)
+    """
+    grouped = (
+        pd.DataFrame({key_name: key, "경고건수": df["warn_w"], "미결건수": df["open_w"]})
+        .groupby(key_name, dropna=False, sort=True)
+        .sum()
+        .reset_index()
+    )
+    grouped = grouped[grouped[having] > 0]
+    grouped["경고비율(미결대비)"] = (
+        grouped["경고건수"] / grouped["미결건수"].where(grouped["미결건수"] > 0)
+    ).round(4)
+    grouped = grouped.sort_values("경고건수", ascending=False, kind="stable").head(limit)
+    return _frame_to_rows(grouped)
+
+
+def _sum_by(df: pd.DataFrame, weight: str, key: str, value_name: str) -> List[Dict[str, Any]]:
+    sums = df.loc[df[weight] > 0].groupby(key, sort=True)[weight].sum()
+    return [{key: _native(k), value_name: int(v)} for k, v in sums.items()]
+
+
+def _prepare_frame(df: pd.DataFrame, base_date: date) -> pd.DataFrame:
+    """
+    (상태, 생성일자, 건수 ...) 프레임에 경과일수/알림등급과 가중치 컬럼을 붙인다.
+    건수: 원본 행이면 1, 일자별 사전집계 행이면 해당 그룹 건수.
+    """
+    created = pd.to_datetime(df["생성일자"])
+    df["경과일수"] = (pd.Timestamp(base_date) - created).dt.days.astype("int64")
+
+    status = df["상태"]
+    is_done = (status == "@5B@").to_numpy()
+    is_open = (status == "@5D@").to_numpy()
+    is_warn = is_open & (df["경과일수"].to_numpy() >= WARN_ELAPSED_DAYS)
+    is_check = is_open & ~is_warn
+    df["알림등급"] = np.select([is_done, is_warn, is_check], ["정상", "경고", "확인필요"], default="기타")
+
+    weight = df["건수"].to_numpy(dtype="int64")
+    df["done_w"] = weight * is_done
+    df["open_w"] = weight * is_open
+    df["warn_w"] = weight * is_warn
+    df["check_w"] = weight * is_check
+    return df
+
+
+def _sections_from_frame(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    _prepare_frame 을 거친 프레임에서 경고 리스트를 제외한 모든 섹션을 계산한다.
+    (기존 8개 쿼리의 SQL 의미를 그대로 따른다)
+    """
+    grade_counts = df.groupby("알림등급")["건수"].sum()
+    grade_rows = [{"알림등급": g, "건수": int(grade_counts[g])} for g in GRADE_ORDER if g in grade_counts]
+
+    counts = {
+        "total_cnt": int(df["건수"].sum()),
+        "done_cnt": int(df["done_w"].sum()),
+        "open_cnt": int(df["open_w"].sum()),
+        "warn_cnt": int(df["warn_w"].sum()),
+        "check_cnt": int(df["check_w"].sum()),
+        # 사유(비고) 미사용 → 0 고정
+        "open_reason_cnt": 0,
+    }
+
+    return {
+        "grade_dist": grade_rows,
+        "counts": counts,
+        "daily_open": _sum_by(df, "open_w", "생성일자", "미결건수"),
+        "daily_warn": _sum_by(df, "warn_w", "생성일자", "경고건수"),
+        "elapsed_hist": _sum_by(df, "open_w", "경과일수", "건수"),
+        "plant_warn": _warn_top(df, df["플랜트명"], "플랜트명", having="미결건수"),
+        "creator_warn": _warn_top(df, _label_or_unknown(df["생성자명"]), "생성자명", having="경고건수"),
+        "model_warn": _warn_top(df, _label_or_unknown(df["대표차종"]), "대표차종", having="미결건수"),
+    }
+
+
+def _sections_from_agg_rows(agg_rows: List[Tuple[Any, ...]], base_date: date) -> Dict[str, Any]:
+    df = pd.DataFrame.from_records(agg_rows, columns=AGG_COLUMNS) if agg_rows else pd.DataFrame(columns=AGG_COLUMNS)
+    return _sections_from_frame(_prepare_frame(df, base_date))
+
+
+def _uses_aggregates(config: POOpenConfig) -> bool:
+    period_days = (config.end_date - config.start_date).days + 1
+    return settings.PO_OPEN_AGG_ENABLED and period_days > settings.PO_OPEN_AGG_MIN_DAYS
+
+
+def _po_open_tasks(config: POOpenConfig) -> List[Tuple[str, Callable[[Session], Any]]]:
+    """
+    리포트를 구성하는 서로 독립적인 DB 작업 2개.
+    - summary: (생성일자, 상태, 플랜트명, 생성자명, 대표차종) 별 건수 → 경고 리스트 외 모든 섹션
+      * 기본: migyul 에서 GROUP BY 1회
+      * 긴 기간: 일자별 사전집계(po_open_daily_agg)를 증분 갱신 후 조회
+    - warn_list: 경고 상세 Top 50 (원본 migyul, 긴 기간은 사전집계로 읽을 일자 범위를 좁힘)
+    """
+    use_aggregates = _uses_aggregates(config)
+
+    def summary(db: Session) -> Dict[str, Any]:
+        if use_aggregates:
+            refresh_daily_aggregates(db, config.start_date, config.end_date)
+            agg_rows = fetch_daily_aggregates(db, config.start_date, config.end_date)
+        else:
+            agg_rows = fetch_live_aggregates(db, config.start_date, config.end_date)
+        return _sections_from_agg_rows(agg_rows, config.base_date)
+
+    def warn_list(db: Session) -> List[Dict[str, Any]]:
+        return fetch_warn_list(
+            db,
+            config.start_date,
+            config.end_date,
+            config.base_date,
+            WARN_ELAPSED_DAYS,
+            use_aggregates=use_aggregates,
+        )
+
+    return [("summary", summary), ("warn_list", warn_list)]
+
+
+def _po_open_read_only_tasks(config: POOpenConfig) -> Tuple[str, ...]:
+    # 사전집계를 갱신하는 summary 는 primary 에서 (replica 로 가면 쓰기가 거부되고, 갱신 직후 조회도 지연된다)
+    return ("warn_list",) if _uses_aggregates(config) else ("summary", "warn_list")
+
+
+def default_po_open_config() -> POOpenConfig:
+    return POOpenConfig(
+        start_date=settings.PO_OPEN_DEFAULT_START_DATE,
+        end_date=settings.PO_OPEN_DEFAULT_END_DATE,
+        base_date=settings.PO_OPEN_DEFAULT_BASE_DATE or settings.PO_OPEN_DEFAULT_END_DATE,
+    )
+
+
+def make_po_open_config(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    base_date: Optional[date] = None,
+) -> POOpenConfig:
+    """
+    요청 값으로 POOpenConfig 생성.
+    - 기간 미지정 시 기본 설정 기간 사용 (start/end 는 함께 지정)
+    - 기준일 미지정 시 종료일을 기준일로 사용
+    """
+    if start_date is None and end_date is None:
+        default = default_po_open_config()
+        if base_date is None:
+            return default
+        return replace(default, base_date=_as_date(base_date))
+
+    if start_date is None or end_date is None:
+        raise ValueError("start_date 와 end_date 는 함께 지정해야 합니다.")
+
+    start, end = _as_date(start_date), _as_date(end_date)
+    if end < start:
+        raise ValueError(f"종료일({end})이 시작일({start})보다 빠릅니다.")
+    base = _as_date(base_date) if base_date else end
+    return POOpenConfig(start_date=start, end_date=end, base_date=base)
+
+
+def _period_label(config: POOpenConfig) -> str:
+    s, e = config.start_date, config.end_date
+    if (s.year, s.month) == (e.year, e.month) and s.day == 1:
+        return f"{s.month}월"
+    return f"{s.isoformat()}~{e.isoformat()}"
 
 
 def build_po_open_report(
@@ -95,59 +262,71 @@ def build_po_open_report(
     config: Optional[POOpenConfig] = None,
 ) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any], List[SubAnalysis]]:
     """
-    구매오더 미결(PO Open) 보고서용 고정 분석.
+    구매오더 미결(PO Open) 보고서용 고정 분석 (동기, 하나의 세션에서 순차 실행).
 
     return:
       sql_hint, main_rows, insight_obj(dict), sub_analyses
     """
     if config is None:
-        config = POOpenConfig(
-            start_date=date(2025, 11, 1),
-            end_date=date(2025, 11, 30),
-            base_date=date(2025, 11, 30),
-        )
+        config = default_po_open_config()
 
-    params = {
-        "start_dt": config.start_date.isoformat(),
-        "end_dt": config.end_date.isoformat(),
-        "base_date": config.base_date.isoformat(),
-    }
+    results = {name: fn(db) for name, fn in _po_open_tasks(config)}
+    return _assemble_po_open_report(config, results["summary"], results["warn_list"])
 
-    cte = _po_open_base_cte_sql()
 
-    # 1) KPI / 등급 분포 (메인 차트)
-    sql_grade_dist = (
-        cte
-        + """
-SELECT `알림등급`, COUNT(*) AS `건수`
-FROM base
-GROUP BY `알림등급`
-ORDER BY FIELD(`알림등급`, '정상', '확인필요', '경고', '기타');
-"""
+async def build_po_open_report_concurrent(
+    config: Optional[POOpenConfig] = None,
+    timeout: Optional[float] = None,
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any], List[SubAnalysis]]:
+    """
+    build_po_open_report 의 동시 실행 버전 (/ask 에서 사용).
+    - 각 작업을 별도 풀 커넥션으로 동시에 실행 (fan_out_db, 조회만 하는 작업은 replica)
+    - 작업별 timeout: 경고 리스트가 늦으면 비워서 먼저 응답, summary 실패 시 예외
+    """
+    if config is None:
+        config = default_po_open_config()
+
+    summary_res, warn_res = await fan_out_db(
+        _po_open_tasks(config),
+        timeout=timeout,
+        read_only=_po_open_read_only_tasks(config),
+    )
+    print(
+        f"[po_open_report] summary={summary_res.elapsed_ms}ms "
+        f"warn_list={warn_res.elapsed_ms}ms (timed_out={warn_res.timed_out})"
     )
-    main_rows = _rows_from_result(db.execute(text(sql_grade_dist), params))
+
+    if summary_res.timed_out:
+        raise TimeoutError("구매오더 미결 리포트 집계 조회 시간이 초과되었습니다.")
+    if summary_res.error is not None:
+        raise summary_res.error
+
+    warn_list = warn_res.value if warn_res.ok else None
+    return _assemble_po_open_report(config, summary_res.value, warn_list)
+
+
+def _assemble_po_open_report(
+    config: POOpenConfig,
+    sections: Dict[str, Any],
+    warn_list: Optional[List[Dict[str, Any]]],
+) -> Tuple[str, List[Dict[str, Any]], Dict[str, Any], List[SubAnalysis]]:
+    """
+    계산된 섹션들을 (sql_hint, main_rows, insight_obj, sub_analyses) 로 조립한다.
+    warn_list 가 None 이면 (조회 실패/시간 초과) 빈 목록으로 표시한다.
+    """
+    use_aggregates = _uses_aggregates(config)
+
+    # 1) KPI / 등급 분포 (메인 차트)
+    main_rows = sections["grade_dist"]
 
     # 2) 핵심 카운트
-    sql_counts = (
-        cte
-        + """
-SELECT
-  COUNT(*) AS total_cnt,
-  SUM(CASE WHEN `상태`='@5B@' THEN 1 ELSE 0 END) AS done_cnt,
-  SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END) AS open_cnt,
-  SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) AS warn_cnt,
-  SUM(CASE WHEN `알림등급`='확인필요' THEN 1 ELSE 0 END) AS check_cnt,
-  SUM(CASE WHEN `상태`='@5D@' AND `사유있음`=1 THEN 1 ELSE 0 END) AS open_reason_cnt
-FROM base;
-"""
-    )
-    counts = dict(db.execute(text(sql_counts), params).mappings().first() or {})
-    total_cnt = int(counts.get("total_cnt") or 0)
-    done_cnt = int(counts.get("done_cnt") or 0)
-    open_cnt = int(counts.get("open_cnt") or 0)
-    warn_cnt = int(counts.get("warn_cnt") or 0)
-    check_cnt = int(counts.get("check_cnt") or 0)
-    open_reason_cnt = int(counts.get("open_reason_cnt") or 0)
+    counts = sections["counts"]
+    total_cnt = counts["total_cnt"]
+    done_cnt = counts["done_cnt"]
+    open_cnt = counts["open_cnt"]
+    warn_cnt = counts["warn_cnt"]
+    check_cnt = counts["check_cnt"]
+    open_reason_cnt = counts["open_reason_cnt"]
 
     def pct(n: int, d: int) -> float:
         return round((n / d * 100.0), 2) if d else 0.0
@@ -162,7 +341,7 @@ FROM base;
 
     insight_obj: Dict[str, Any] = {
         "insight_text": insight_text,
-        "chart_spec": ChartSpec(type="bar", x_field="알림등급", y_field="건수", title="11월 구매오더 알림등급 분포").model_dump(),
+        "chart_spec": ChartSpec(type="bar", x_field="알림등급", y_field="건수", title=f"{_period_label(config)} 구매오더 알림등급 분포").model_dump(),
         "kpis": {
             "period_start": config.start_date.isoformat(),
             "period_end": config.end_date.isoformat(),
@@ -184,17 +363,7 @@ FROM base;
     sub_analyses: List[SubAnalysis] = []
 
     # 3-1. 일별 미결 건수
-    sql_daily_open = (
-        cte
-        + """
-SELECT `생성일자`, COUNT(*) AS `미결건수`
-FROM base
-WHERE `상태`='@5D@'
-GROUP BY `생성일자`
-ORDER BY `생성일자`;
-"""
-    )
-    rows_daily_open = _rows_from_result(db.execute(text(sql_daily_open), params))
+    rows_daily_open = sections["daily_open"]
     sub_analyses.append(
         SubAnalysis(
             name="일별 미결 추이",
@@ -205,17 +374,7 @@ ORDER BY `생성일자`;
     )
 
     # 3-2. 일별 경고 건수
-    sql_daily_warn = (
-        cte
-        + """
-SELECT `생성일자`, COUNT(*) AS `경고건수`
-FROM base
-WHERE `알림등급`='경고'
-GROUP BY `생성일자`
-ORDER BY `생성일자`;
-"""
-    )
-    rows_daily_warn = _rows_from_result(db.execute(text(sql_daily_warn), params))
+    rows_daily_warn = sections["daily_warn"]
     sub_analyses.append(
         SubAnalysis(
             name="일별 경고 추이",
@@ -226,17 +385,7 @@ ORDER BY `생성일자`;
     )
 
     # 3-3. 경과일수 분포 (미결만)
-    sql_elapsed_hist = (
-        cte
-        + """
-SELECT `경과일수`, COUNT(*) AS `건수`
-FROM base
-WHERE `상태`='@5D@'
-GROUP BY `경과일수`
-ORDER BY `경과일수`;
-"""
-    )
-    rows_elapsed = _rows_from_result(db.execute(text(sql_elapsed_hist), params))
+    rows_elapsed = sections["elapsed_hist"]
     sub_analyses.append(
         SubAnalysis(
             name="미결 경과일수 분포",
@@ -247,25 +396,7 @@ ORDER BY `경과일수`;
     )
 
     # 3-4. 플랜트별 경고 물량 TOP
-    sql_plant_warn = (
-        cte
-        + """
-SELECT
-  `플랜트명`,
-  SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) AS `경고건수`,
-  SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END) AS `미결건수`,
-  ROUND(
-    SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) / NULLIF(SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END), 0),
-    4
-  ) AS `경고비율(미결대비)`
-FROM base
-GROUP BY `플랜트명`
-HAVING `미결건수` > 0
-ORDER BY `경고건수` DESC
-LIMIT 10;
-"""
-    )
-    rows_plant_warn = _rows_from_result(db.execute(text(sql_plant_warn), params))
+    rows_plant_warn = sections["plant_warn"]
     sub_analyses.append(
         SubAnalysis(
             name="플랜트별 경고 Top 10",
@@ -276,25 +407,7 @@ LIMIT 10;
     )
 
     # 3-5. 생성자별 경고 Top (파레토 근사: 막대 Top 10)
-    sql_creator_warn = (
-        cte
-        + """
-SELECT
-  COALESCE(NULLIF(TRIM(`생성자명`), ''), '(미상)') AS `생성자명`,
-  SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) AS `경고건수`,
-  SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END) AS `미결건수`,
-  ROUND(
-    SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) / NULLIF(SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END), 0),
-    4
-  ) AS `경고비율(미결대비)`
-FROM base
-GROUP BY COALESCE(NULLIF(TRIM(`생성자명`), ''), '(미상)')
-HAVING `경고건수` > 0
-ORDER BY `경고건수` DESC
-LIMIT 10;
-"""
-    )
-    rows_creator_warn = _rows_from_result(db.execute(text(sql_creator_warn), params))
+    rows_creator_warn = sections["creator_warn"]
     sub_analyses.append(
         SubAnalysis(
             name="생성자별 경고 Top 10",
@@ -305,25 +418,7 @@ LIMIT 10;
     )
 
     # 3-6. 대표차종별 경고 Top
-    sql_model_warn = (
-        cte
-        + """
-SELECT
-  COALESCE(NULLIF(TRIM(`대표차종`), ''), '(미상)') AS `대표차종`,
-  SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) AS `경고건수`,
-  SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END) AS `미결건수`,
-  ROUND(
-    SUM(CASE WHEN `알림등급`='경고' THEN 1 ELSE 0 END) / NULLIF(SUM(CASE WHEN `상태`='@5D@' THEN 1 ELSE 0 END), 0),
-    4
-  ) AS `경고비율(미결대비)`
-FROM base
-GROUP BY COALESCE(NULLIF(TRIM(`대표차종`), ''), '(미상)')
-HAVING `미결건수` > 0
-ORDER BY `경고건수` DESC
-LIMIT 10;
-"""
-    )
-    rows_model_warn = _rows_from_result(db.execute(text(sql_model_warn), params))
+    rows_model_warn = sections["model_warn"]
     sub_analyses.append(
         SubAnalysis(
             name="대표차종별 경고 Top 10",
@@ -334,32 +429,14 @@ LIMIT 10;
     )
 
     # 3-7. 경고 리스트 (업무 처리용 Top 50)
-    sql_warn_list = (
-        cte
-        + """
-SELECT
-  `플랜트명`,
-  `대표차종`,
-  `구매오더`,
-  `구매오더품목`,
-  `공급업체명`,
-  `자재번호`,
-  `내역`,
-  `생성일`,
-  `경과일수`,
-  `납품요청일`,
-  `오더수량`
-FROM base
-WHERE `알림등급`='경고'
-ORDER BY `경과일수` DESC, `플랜트명`, `대표차종`
-LIMIT 50;
-"""
-    )
-    rows_warn_list = _rows_from_result(db.execute(text(sql_warn_list), params))
+    warn_list_text = "즉시 확인/처리 대상(경고) 상세 목록입니다. 경과일수 기준으로 우선순위를 부여합니다."
+    if warn_list is None:
+        warn_list_text += " (상세 목록 조회가 지연되어 이번 응답에서는 생략되었습니다)"
+    rows_warn_list = warn_list or []
     sub_analyses.append(
         SubAnalysis(
             name="경고 리스트 (Top 50)",
-            insight_text="즉시 확인/처리 대상(경고) 상세 목록입니다. 경과일수 기준으로 우선순위를 부여합니다.",
+            insight_text=warn_list_text,
             chart_spec=None,
             rows=rows_warn_list,
         )
@@ -368,7 +445,7 @@ LIMIT 50;
     sql_hint = (
         f"-- 구매오더 미결 관리 리포트\n"
         f"-- 기간: {config.start_date} ~ {config.end_date} / 기준일: {config.base_date}\n"
-        f"-- 테이블: migyul / 상태: @5B@(완료), @5D@(미결)\n"
+        f"-- 테이블: {'po_open_daily_agg (일자별 사전집계) + migyul' if use_aggregates else 'migyul'} / 상태: @5B@(완료), @5D@(미결)\n"
         f"-- 알림등급(현 버전): 미결 + 경과>=14 => 경고 / 미결 + 경과<14 => 확인필요\n"
     )
 
@@ -0,0 +1,324 @@
+# app/services/reference_snapshot.py
+"""
+기준정보 테이블(bom, standard_info, purchase order) 메모리 스냅샷.
+
+- 하루에 한 번 바뀔까 말까 한 테이블을 /po/generate_po 마다 MySQL 에서 다시 읽지 않도록
+  한 번 읽어서 타입을 정리한 DataFrame 으로 들고 있는다.
+  * 반복 값이 많은 코드/문자열(자재번호, 플랜트, 단위, 조달유형, 공급업체 ...)은 category, 수량/단가는 float64
+  * category/문자열은 DB 타입과 상관없이 정리된 str (앞뒤 공백 제거, NULL/'nan'/'None' → '',
+    NULL 이 섞여 float 로 읽힌 정수 코드 1010.0 → '1010'). 자재번호가 INT 인 DB 에서도 str 코드로 조회된다.
+- 무효화: 테이블 버전(information_schema 의 CREATE_TIME/UPDATE_TIME/TABLE_ROWS, result_cache 와 같은 방식)을
+  REF_SNAPSHOT_CHECK_INTERVAL_SECONDS 마다 확인해서 바뀌었으면 다시 읽는다.
+  MySQL 이 아니면 버전을 알 수 없으므로 refresh() 전까지 그대로 쓴다.
+- 메모리 상한: REF_SNAPSHOT_MAX_BYTES (memory_usage(deep=True) 합 + 스냅샷에서 만든 파생 캐시).
+  파생 캐시(bom_graph 등)는 register_derived 로 크기를 알려 주고, 합계가 넘으면 가장 오래 안 쓴
+  스냅샷부터 내린다. 혼자서 상한을 넘는 테이블은 캐시하지 않는다.
+- 사용처
+  * make_order2: 기준정보/단가 조회 (select), bom_graph: BOM 그래프 원본
+  * BI/API: GET /api/v1/reference (스냅샷 상태), POST /api/v1/reference/refresh
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.services.result_cache import fresh_table_stats
+
+settings = get_settings()
+
+_VERSION_SQL = text(
+    """
+SELECT CREATE_TIME, UPDATE_TIME, TABLE_ROWS
+FROM information_schema.tables
+WHERE table_schema = DATABASE()
+  AND table_name = :name
+"""
+)
+
+
+@dataclass(frozen=True)
+class ReferenceTable:
+    name: str
+    sql: str
+    categories: Tuple[str, ...] = ()   # category 로 들고 있을 컬럼
+    numbers: Tuple[str, ...] = ()      # float64 로 바꿀 컬럼 (변환 실패 → NaN)
+    texts: Tuple[str, ...] = ()        # 공백 제거한 문자열로 둘 컬럼
+
+
+# 행 순서를 그대로 쓰는 곳이 있다 (bom: .0 아래 전개 순서, purchase order: 자재번호별 마지막 단가)
+REFERENCE_TABLES: Dict[str, ReferenceTable] = {
+    t.name: t
+    for t in (
+        ReferenceTable(
+            name="bom",
+            sql="""
+SELECT 전개번호, 자재번호, 구성요소내역, 소요량_구성품, 단위량, 단위, 조달유형,
+       공급업체, 공급업체명, 특별조달유형, 평가클래스, 효력시작일, 효력종료일
+FROM bom
+""",
+            categories=("자재번호", "구성요소내역", "단위", "조달유형", "공급업체", "공급업체명", "특별조달유형", "평가클래스"),
+            numbers=("소요량_구성품", "단위량"),
+            texts=("전개번호", "효력시작일", "효력종료일"),
+        ),
+        ReferenceTable(
+            name="standard_info",
+            sql="SELECT 플랜트, 자재번호, 적입수량, 최소재고, 구매처 FROM standard_info",
+            categories=("플랜트", "자재번호", "구매처"),
+            numbers=("적입수량", "최소재고"),
+        ),
+        ReferenceTable(
+            name="purchase order",
+            sql="SELECT 자재번호, 단가 FROM `purchase order`",
+            categories=("자재번호",),
+            numbers=("단가",),
+        ),
+    )
+}
+
+
+def _clean_text(values: pd.Series) -> pd.Series:
+    if pd.api.types.is_float_dtype(values):
+        # NULL 이 섞인 정수 코드 컬럼은 float 로 읽힌다 (1010.0 → "1010")
+        present = values.dropna()
+        if (present == present.round()).all():
+            values = values.astype("Int64")
+    return values.astype(object).where(values.notna(), "").astype(str).str.strip().replace(["nan", "None"], "")
+
+
+def _to_category(values: pd.Series) -> pd.Series:
+    # 숫자 코드(플랜트 1010, INT 자재번호 등)도 str 로 맞춰서 category (select_rows 는 str 코드로 조회)
+    return _clean_text(values).astype("category")
+
+
+def typed_frame(table: ReferenceTable, df: pd.DataFrame) -> pd.DataFrame:
+    out = pd.DataFrame(index=pd.RangeIndex(len(df)))
+    for col in df.columns:
+        values = df[col].reset_index(drop=True)
+        if col in table.categories:
+            out[col] = _to_category(values)
+        elif col in table.numbers:
+            out[col] = pd.to_numeric(values, errors="coerce").astype("float64")
+        elif col in table.texts:
+            out[col] = _clean_text(values)
+        else:
+            out[col] = values
+    return out
+
+
+def decode_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    category 컬럼을 원래 값 타입으로 되돌린 복사본 (merge/groupby 하는 기존 코드에 넘길 때)
+    """
+    out = df.copy()
+    for col in out.columns:
+        if isinstance(out[col].dtype, pd.CategoricalDtype):
+            out[col] = out[col].astype(out[col].cat.categories.dtype)
+    return out
+
+
+def select_rows(frame: pd.DataFrame, column: str, values: Iterable[Any]) -> pd.DataFrame:
+    """
+    스냅샷에서 column 값이 values 에 있는 행만 (category 는 일반 컬럼으로 풀어서).
+    category 컬럼은 str 로 저장되어 있으므로 values 도 정리된 str 로 맞춰서 비교한다
+    """
+    col = frame[column]
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        values = _clean_text(pd.Series(list(values), dtype=object)).tolist()
+    else:
+        values = list(values)
+    return decode_frame(frame[col.isin(values)].reset_index(drop=True))
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def probe_table_version(engine: Engine, name: str) -> Optional[str]:
+    if engine.dialect.name != "mysql":
+        return None
+    with engine.connect() as conn, fresh_table_stats(conn):
+        row = conn.execute(_VERSION_SQL, {"name": name}).first()
+    return None if row is None else f"{row[0]}|{row[1]}|{row[2]}"
+
+
+@dataclass
+class Snapshot:
+    name: str
+    source: str
+    frame: pd.DataFrame
+    version: Optional[str]
+    nbytes: int
+    loaded_at: float
+    load_ms: float
+    checked_at: float
+
+
+class ReferenceSnapshotStore:
+    def __init__(self, enabled: bool = True, check_interval: float = 30.0, max_bytes: int = 512 * 1024 * 1024):
+        self.enabled = enabled
+        self.check_interval = check_interval
+        self.max_bytes = max_bytes
+        self._snapshots: "OrderedDict[Tuple[str, str], Snapshot]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 테이블별 로드는 하나씩 (동시에 미스가 나도 한 번만 읽는다)
+        self._load_locks: Dict[Tuple[str, str], threading.Lock] = {}
+        # 스냅샷에서 만든 파생 캐시 이름 → 현재 크기(bytes) 함수 (max_bytes 와 stats 에 포함)
+        self._derived: Dict[str, Callable[[], int]] = {}
+        self.hits = 0
+        self.loads = 0
+        self.stale = 0
+        self.probes = 0
+        self.evictions = 0
+        self.oversize = 0
+        self.loads_by_table: Dict[str, int] = {}
+
+    def register_derived(self, name: str, nbytes: Callable[[], int]) -> None:
+        """
+        스냅샷으로 만든 캐시(예: bom_graph)의 메모리를 상한/통계에 포함시킨다.
+        nbytes 는 이 저장소의 락 밖에서 호출된다.
+        """
+        with self._lock:
+            self._derived[name] = nbytes
+
+    def _derived_bytes(self) -> Dict[str, int]:
+        with self._lock:
+            derived = dict(self._derived)
+        return {name: int(nbytes()) for name, nbytes in derived.items()}
+
+    def _load_lock(self, key: Tuple[str, str]) -> threading.Lock:
+        with self._lock:
+            return self._load_locks.setdefault(key, threading.Lock())
+
+    def _load(self, engine: Engine, table: ReferenceTable, source: str, version: Optional[str]) -> Snapshot:
+        started = time.perf_counter()
+        frame = typed_frame(table, pd.read_sql(text(table.sql), engine))
+        load_ms = (time.perf_counter() - started) * 1000.0
+        now = time.monotonic()
+        snap = Snapshot(table.name, source, frame, version, _frame_bytes(frame), time.time(), load_ms, now)
+        with self._lock:
+            self.loads += 1
+            self.loads_by_table[table.name] = self.loads_by_table.get(table.name, 0) + 1
+        print(f"[reference_snapshot] loaded {table.name}: rows={len(frame):,}, bytes={snap.nbytes:,}, {load_ms:.0f}ms")
+        return snap
+
+    def _store(self, key: Tuple[str, str], snap: Snapshot) -> None:
+        derived = sum(self._derived_bytes().values())
+        with self._lock:
+            self._snapshots.pop(key, None)
+            if snap.nbytes > self.max_bytes:
+                self.oversize += 1
+                print(f"[reference_snapshot] {snap.name} ({snap.nbytes:,} bytes) exceeds REF_SNAPSHOT_MAX_BYTES, not cached")
+                return
+            self._snapshots[key] = snap
+            total = sum(s.nbytes for s in self._snapshots.values()) + derived
+            # 방금 넣은 스냅샷은 남긴다 (파생 캐시만으로 상한을 넘는 경우)
+            while total > self.max_bytes and len(self._snapshots) > 1:
+                _, evicted = self._snapshots.popitem(last=False)
+                total -= evicted.nbytes
+                self.evictions += 1
+
+    def get_snapshot(self, name: str, engine: Engine) -> Snapshot:
+        """
+        name 테이블 스냅샷 (버전이 바뀌었거나 없으면 다시 읽음)
+        """
+        table = REFERENCE_TABLES[name]
+        source = engine.url.render_as_string(hide_password=True)
+        key = (source, name)
+        with self._load_lock(key):
+            with self._lock:
+                snap = self._snapshots.get(key) if self.enabled else None
+                if snap is not None:
+                    self._snapshots.move_to_end(key)
+            now = time.monotonic()
+            if snap is not None and now - snap.checked_at < self.check_interval:
+                with self._lock:
+                    self.hits += 1
+                return snap
+
+            version = probe_table_version(engine, name)
+            with self._lock:
+                self.probes += 1
+            if snap is not None and (version is None or version == snap.version):
+                snap.checked_at = now
+                with self._lock:
+                    self.hits += 1
+                return snap
+            if snap is not None:
+                with self._lock:
+                    self.stale += 1
+
+            snap = self._load(engine, table, source, version)
+            if self.enabled:
+                self._store(key, snap)
+            return snap
+
+    def get(self, name: str, engine: Engine) -> pd.DataFrame:
+        return self.get_snapshot(name, engine).frame
+
+    def select(self, name: str, engine: Engine, column: str, values: Iterable[Any]) -> pd.DataFrame:
+        return select_rows(self.get(name, engine), column, values)
+
+    def table_loads(self, name: str) -> int:
+        with self._lock:
+            return self.loads_by_table.get(name, 0)
+
+    def refresh(self, name: Optional[str] = None) -> None:
+        """
+        스냅샷 삭제 (다음 조회 때 다시 읽음). name 이 없으면 전체
+        """
+        with self._lock:
+            for key in [k for k in self._snapshots if name is None or k[1] == name]:
+                del self._snapshots[key]
+
+    def describe(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            snaps = list(self._snapshots.values())
+        return [
+            {
+                "table": s.name,
+                "rows": len(s.frame),
+                "bytes": s.nbytes,
+                "version": s.version,
+                "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(s.loaded_at)),
+                "load_ms": round(s.load_ms, 1),
+                "dtypes": {c: str(t) for c, t in s.frame.dtypes.items()},
+            }
+            for s in snaps
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        derived = self._derived_bytes()
+        with self._lock:
+            snapshot_bytes = sum(s.nbytes for s in self._snapshots.values())
+            return {
+                "enabled": self.enabled,
+                "tables": [k[1] for k in self._snapshots],
+                "bytes": snapshot_bytes,
+                "derived_bytes": derived,
+                "total_bytes": snapshot_bytes + sum(derived.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "loads": self.loads,
+                "stale": self.stale,
+                "probes": self.probes,
+                "evictions": self.evictions,
+                "oversize": self.oversize,
+            }
+
+
+reference_snapshots = ReferenceSnapshotStore(
+    enabled=settings.REF_SNAPSHOT_ENABLED,
+    check_interval=settings.REF_SNAPSHOT_CHECK_INTERVAL_SECONDS,
+    max_bytes=settings.REF_SNAPSHOT_MAX_BYTES,
+)
+
+
+def get_reference_snapshot_stats() -> Dict[str, Any]:
+    return reference_snapshots.stats()
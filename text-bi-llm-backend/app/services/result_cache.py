@@ -0,0 +1,286 @@
+# app/services/result_cache.py
+"""
+execute_sql 앞단의 쿼리 결과 캐시.
+
+- 키: 공백 정규화된 SQL + 바인드 파라미터 + limit
+- 무효화: 블라인드 TTL 대신, SQL이 참조하는 테이블(all_plan, bom, stock_check, migyul ...)의
+  버전(information_schema.tables 의 UPDATE_TIME/CREATE_TIME/TABLE_ROWS)을 같이 저장해 두고,
+  조회 시 버전이 달라졌으면 미스로 처리한다.
+- 버전 조회(probe)도 DB 왕복이므로 RESULT_CACHE_PROBE_INTERVAL_SECONDS 동안은 재사용한다.
+- 값은 dict 리스트 대신 (columns, [tuple...]) 형태로 압축 저장하고, 히트 시 dict로 복원한다.
+- MySQL 이외(테스트용 sqlite 등)나 테이블을 못 찾은 SQL은 캐시하지 않는다.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+Columns = Tuple[str, ...]
+RawRows = List[Tuple[Any, ...]]
+Versions = Tuple[Tuple[str, str], ...]
+
+
+# ---------------------------------------------------------
+# SQL 정규화 / 테이블 추출
+# ---------------------------------------------------------
+# 따옴표/백틱 리터럴은 그대로 두고, 그 밖의 공백만 1칸으로 축약
+_SQL_TOKEN_RE = re.compile(r"('(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`)|(\s+)")
+_IDENT = r"(?:`[^`]+`|[\w$]+)"
+_TABLE = rf"{_IDENT}(?:\s*\.\s*{_IDENT})?"
+# FROM a [AS] x, b y ... / JOIN c
+_TABLE_REF_RE = re.compile(
+    rf"\b(FROM|JOIN)\s+({_TABLE}(?:\s+(?:AS\s+)?{_IDENT})?(?:\s*,\s*{_TABLE}(?:\s+(?:AS\s+)?{_IDENT})?)*)",
+    re.IGNORECASE,
+)
+_TABLE_HEAD_RE = re.compile(rf"\s*({_TABLE})")
+_CTE_NAME_RE = re.compile(r"(?:\bWITH(?:\s+RECURSIVE)?|,)\s*(`[^`]+`|[\w$]+)\s+AS\s*\(", re.IGNORECASE)
+# 문자열 리터럴/주석 (테이블 추출 전에 같은 길이 공백으로 가림, 백틱 식별자는 유지)
+_STRING_OR_COMMENT_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|--[^\n]*|#[^\n]*|/\*.*?\*/", re.S)
+_SCOPE_TOKEN_RE = re.compile(r"[()]|\bSELECT\b", re.IGNORECASE)
+
+
+def canonicalize_sql(sql: str) -> str:
+    def repl(m: "re.Match[str]") -> str:
+        return m.group(1) if m.group(1) is not None else " "
+
+    return _SQL_TOKEN_RE.sub(repl, (sql or "").strip())
+
+
+def _strip_ident(name: str) -> str:
+    return name.strip().strip("`")
+
+
+def _is_select_from(sql: str, pos: int) -> bool:
+    """
+    pos 의 FROM 이 SELECT 절의 FROM 인지 (같은 괄호 깊이에 앞선 SELECT 가 있는지).
+    EXTRACT(YEAR FROM d), TRIM(LEADING '0' FROM s), SUBSTRING(s FROM 2) 같은 함수 인자의 FROM 은 제외.
+    """
+    depth = 0
+    for tok in reversed(_SCOPE_TOKEN_RE.findall(sql, 0, pos)):
+        if tok == ")":
+            depth += 1
+        elif tok == "(":
+            if depth == 0:
+                return False
+            depth -= 1
+        elif depth == 0:
+            return True
+    return False
+
+
+def extract_tables(sql: str) -> List[str]:
+    """
+    FROM / JOIN 뒤의 테이블명을 추출한다 (CTE 이름, 서브쿼리, 함수 인자의 FROM 은 제외).
+    schema.table 형태는 table 부분만 사용.
+    """
+    sql = _STRING_OR_COMMENT_RE.sub(lambda m: " " * len(m.group(0)), sql or "")
+    cte_names = {_strip_ident(n).lower() for n in _CTE_NAME_RE.findall(sql)}
+    tables: List[str] = []
+    for m in _TABLE_REF_RE.finditer(sql):
+        keyword, refs = m.group(1), m.group(2)
+        if keyword.upper() == "FROM" and not _is_select_from(sql, m.start()):
+            continue
+        parts = refs.split(",") if keyword.upper() == "FROM" else [refs]
+        for part in parts:
+            m = _TABLE_HEAD_RE.match(part)
+            if m is None:
+                continue
+            name = _strip_ident(re.split(r"\s*\.\s*", m.group(1))[-1])
+            if not name or name.lower() in cte_names or name.upper() == "DUAL":
+                continue
+            if name not in tables:
+                tables.append(name)
+    return tables
+
+
+def make_result_key(sql: str, params: Optional[Dict[str, Any]], limit: int) -> str:
+    raw = json.dumps(
+        [canonicalize_sql(sql), sorted((params or {}).items()), limit],
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ---------------------------------------------------------
+# 테이블 버전 probe
+# ---------------------------------------------------------
+_VERSION_SQL = text(
+    """
+SELECT TABLE_NAME, CREATE_TIME, UPDATE_TIME, TABLE_ROWS
+FROM information_schema.tables
+WHERE table_schema = DATABASE()
+  AND table_name IN :names
+"""
+).bindparams(bindparam("names", expanding=True))
+
+
+@contextmanager
+def fresh_table_stats(conn: Connection) -> Iterator[None]:
+    """
+    MySQL 8 은 information_schema 통계를 기본 24h 캐시하므로 probe 동안만 세션 단위로 끄고,
+    끝나면 DEFAULT(글로벌 값)로 되돌린다. 풀에 돌아간 연결에서 이후 쿼리가 매번
+    통계를 다시 계산하지 않게 하기 위함. 되돌리지 못한 연결은 풀에서 버린다. (5.7은 변수 없음)
+    conn 은 probe 전용 연결(engine.connect())이어야 한다 (요청 세션 연결을 버리면 그 트랜잭션이 깨진다).
+    """
+    try:
+        conn.execute(text("SET SESSION information_schema_stats_expiry = 0"))
+    except Exception:
+        yield
+        return
+    try:
+        yield
+    finally:
+        try:
+            conn.execute(text("SET SESSION information_schema_stats_expiry = DEFAULT"))
+        except Exception:
+            conn.invalidate()
+
+
+class QueryResultCache:
+    def __init__(
+        self,
+        max_entries: int = 256,
+        max_rows_per_entry: int = 5000,
+        probe_interval: float = 5.0,
+    ):
+        self.max_entries = max_entries
+        self.max_rows_per_entry = max_rows_per_entry
+        self.probe_interval = probe_interval
+        self._entries: "OrderedDict[str, Tuple[Versions, Columns, RawRows]]" = OrderedDict()
+        # 테이블 조합 → (조회 시각, 버전). 조합 수만큼 늘어나므로 max_entries 로 LRU 제한
+        self._probe_cache: "OrderedDict[Tuple[str, ...], Tuple[float, Versions]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.probes = 0
+        self.uncacheable = 0
+
+    # ---------- version ----------
+    def _probe_versions(self, db: Session, tables: Sequence[str]) -> Optional[Versions]:
+        if db.get_bind().dialect.name != "mysql":
+            return None
+
+        probe_key = tuple(sorted(t.lower() for t in tables))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._probe_cache.get(probe_key)
+            if cached is not None:
+                self._probe_cache.move_to_end(probe_key)
+        if cached is not None and now - cached[0] < self.probe_interval:
+            return cached[1]
+
+        # 요청 세션의 트랜잭션과 분리된 별도 연결에서 (세션 변수를 못 되돌리면 이 연결만 버린다)
+        with db.get_bind().connect() as conn, fresh_table_stats(conn):
+            rows = conn.execute(_VERSION_SQL, {"names": list(probe_key)}).fetchall()
+        found = {
+            str(r[0]).lower(): f"{r[1]}|{r[2]}|{r[3]}"
+            for r in rows
+        }
+        if len(found) != len(probe_key):
+            # 뷰/임시테이블 등 버전을 알 수 없는 테이블이 섞이면 캐시하지 않음
+            return None
+        versions: Versions = tuple((name, found[name]) for name in probe_key)
+
+        with self._lock:
+            self.probes += 1
+            self._probe_cache[probe_key] = (now, versions)
+            self._probe_cache.move_to_end(probe_key)
+            while len(self._probe_cache) > self.max_entries:
+                self._probe_cache.popitem(last=False)
+        return versions
+
+    # ---------- main ----------
+    def query(
+        self,
+        db: Session,
+        sql: str,
+        params: Optional[Dict[str, Any]],
+        limit: int,
+        run: Callable[[], Tuple[Columns, RawRows]],
+    ) -> Tuple[Columns, RawRows]:
+        """
+        캐시를 거쳐 run() 결과 (columns, raw_rows) 를 반환한다.
+        """
+        tables = extract_tables(sql)
+        versions = self._probe_versions(db, tables) if tables else None
+        if versions is None:
+            with self._lock:
+                self.uncacheable += 1
+            return run()
+
+        key = make_result_key(sql, params, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == versions:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                # 참조 테이블이 바뀜 → 폐기
+                del self._entries[key]
+                self.stale += 1
+            self.misses += 1
+
+        # probe 이후에 테이블이 바뀌더라도 (실행 전) 버전으로 저장되므로 다음 probe에서 미스가 난다
+        columns, raw_rows = run()
+        if len(raw_rows) <= self.max_rows_per_entry:
+            with self._lock:
+                self._entries[key] = (versions, tuple(columns), list(raw_rows))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return columns, raw_rows
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        """
+        table 지정 시 해당 테이블을 참조하는 항목만, 없으면 전체 삭제.
+        """
+        with self._lock:
+            if table is None:
+                self._entries.clear()
+                self._probe_cache.clear()
+                return
+            name = table.lower()
+            for key in [k for k, v in self._entries.items() if any(t == name for t, _ in v[0])]:
+                del self._entries[key]
+            for pkey in [k for k in self._probe_cache if name in k]:
+                del self._probe_cache[pkey]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "uncacheable": self.uncacheable,
+                "probes": self.probes,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+result_cache = QueryResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_rows_per_entry=settings.RESULT_CACHE_MAX_ROWS_PER_ENTRY,
+    probe_interval=settings.RESULT_CACHE_PROBE_INTERVAL_SECONDS,
+)
+
+
+def get_result_cache_stats() -> Dict[str, Any]:
+    return result_cache.stats()
@@ -0,0 +1,110 @@
+# app/services/result_pages.py
+"""
+/ask 결과 페이지네이션용 쿼리 핸들 저장소.
+
+- /ask 는 첫 페이지(SQL_PAGE_SIZE 행)만 조회해서 돌려주고, 뒤에 행이 더 있으면
+  실행한 SQL 을 query_id 로 등록해 next_cursor 와 함께 내려준다.
+- GET /api/v1/ask/{query_id}/rows?cursor=... 는 저장된 SQL 에
+  LIMIT/OFFSET 을 붙여 해당 페이지만 다시 조회한다 (결과 캐시를 거침).
+- 커서는 (query_id, offset) 을 담은 불투명 토큰. 다른 쿼리의 커서는 거부한다.
+- 핸들은 메모리 LRU + TTL (SQL_PAGE_HANDLE_MAX_ENTRIES, SQL_PAGE_HANDLE_TTL_SECONDS).
+"""
+
+import base64
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class QueryHandle:
+    query_id: str
+    sql: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    created_at: float = 0.0
+
+
+class QueryPageStore:
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 1800.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, QueryHandle]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.registered = 0
+        self.page_hits = 0
+        self.expired = 0
+
+    def register(self, sql: str, params: Optional[Dict[str, Any]] = None) -> str:
+        handle = QueryHandle(
+            query_id=uuid.uuid4().hex,
+            sql=sql,
+            params=dict(params or {}),
+            created_at=time.monotonic(),
+        )
+        with self._lock:
+            self._entries[handle.query_id] = handle
+            self.registered += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return handle.query_id
+
+    def get(self, query_id: str) -> Optional[QueryHandle]:
+        with self._lock:
+            handle = self._entries.get(query_id)
+            if handle is None:
+                return None
+            if self.ttl_seconds > 0 and time.monotonic() - handle.created_at > self.ttl_seconds:
+                del self._entries[query_id]
+                self.expired += 1
+                return None
+            self._entries.move_to_end(query_id)
+            self.page_hits += 1
+            return handle
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "registered": self.registered,
+                "page_hits": self.page_hits,
+                "expired": self.expired,
+            }
+
+
+def encode_cursor(query_id: str, offset: int) -> str:
+    raw = f"{query_id}:{offset}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(query_id: str, cursor: Optional[str]) -> int:
+    """
+    커서 → offset. 커서가 없으면 0 (첫 페이지). 형식이 틀리거나 다른 쿼리의 커서면 ValueError
+    """
+    if not cursor:
+        return 0
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        owner, offset = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii").split(":", 1)
+        value = int(offset)
+    except Exception:
+        raise ValueError("잘못된 cursor 입니다.")
+    if owner != query_id or value < 0:
+        raise ValueError("이 쿼리의 cursor 가 아닙니다.")
+    return value
+
+
+query_pages = QueryPageStore(
+    max_entries=settings.SQL_PAGE_HANDLE_MAX_ENTRIES,
+    ttl_seconds=settings.SQL_PAGE_HANDLE_TTL_SECONDS,
+)
+
+
+def get_query_page_stats() -> Dict[str, Any]:
+    return query_pages.stats()
@@ -0,0 +1,199 @@
+# app/services/result_profile.py
+"""
+SQL 결과 로컬 프로파일링 (NumPy).
+
+- 인사이트 프롬프트에 결과 행을 그대로(최대 50행 JSON) 넣는 대신,
+  컬럼별 통계 요약 + 예시 몇 행만 보내 프롬프트를 줄인다.
+- 계산 항목
+  * 숫자 컬럼: min / max / sum / mean / null 수
+  * 범주 컬럼: 고유값 수, 빈도 Top-K
+  * 날짜 컬럼(ISO 문자열, 이름이 기간인 연도 숫자/문자열): 시작/끝
+  * breakdown: 대표 범주 컬럼별 대표 수치 합계 Top-K + 전체 대비 비중(share)
+  * trend: 날짜 컬럼 기준 대표 수치의 기간별 합계 → 기울기(기간당 증감), 처음 대비 마지막 증감률
+- 결과는 인사이트 프롬프트에 들어가고, 응답의 kpis 로도 그대로 내려간다.
+- 통계는 /ask 가 받은 첫 페이지 기준이다 (truncated=True 면 뒤에 행이 더 있음).
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.core.config import get_settings
+from app.services.sql_bi_service import ColumnarRows
+
+settings = get_settings()
+
+# 2025 / 2025-01 / 2025-01-31 / 2025-01-31T09:00:00
+_DATE_RE = re.compile(r"^\d{4}(-\d{2}(-\d{2}([ T][\d:.]+)?)?)?$")
+_PERIOD_NAME_RE = re.compile(r"(year|month|date|day|period|년|연도|월|일자|기간)", re.IGNORECASE)
+
+ProfileRows = Union[Sequence[Dict[str, Any]], ColumnarRows]
+
+
+def _num(value: float, digits: int = 4) -> Optional[float]:
+    if value is None or not np.isfinite(value):
+        return None
+    value = float(value)
+    return int(value) if value.is_integer() and abs(value) < 2 ** 53 else round(value, digits)
+
+
+def _column_kind(name: str, values: List[Any]) -> str:
+    if not values:
+        return "empty"
+    if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        # 연도(2024, 2025 ...)처럼 기간을 뜻하는 정수 컬럼은 수치가 아니라 날짜로 본다
+        if _PERIOD_NAME_RE.search(name) and all(isinstance(v, int) and 1900 <= v <= 2100 for v in values):
+            return "date"
+        return "number"
+    if all(isinstance(v, str) for v in values):
+        if all(_DATE_RE.match(v) for v in values):
+            # "1010" 같은 4자리 코드(플랜트 등)는 연도처럼 보이므로, 연도만 있으면 컬럼명이 기간일 때만 날짜
+            if any(len(v) > 4 for v in values) or (
+                _PERIOD_NAME_RE.search(name) and all(1900 <= int(v) <= 2100 for v in values)
+            ):
+                return "date"
+        return "category"
+    return "other"
+
+
+def _date_keys(values: List[Any]) -> np.ndarray:
+    # 같은 컬럼 안의 날짜 문자열은 형식이 같으므로 문자열 정렬 = 시간 정렬
+    return np.asarray([str(v) for v in values])
+
+
+def _top_counts(values: List[Any], top_k: int) -> Tuple[int, List[Dict[str, Any]]]:
+    labels, counts = np.unique(np.asarray(values, dtype=object).astype(str), return_counts=True)
+    order = np.argsort(-counts, kind="stable")[:top_k]
+    return len(labels), [{"value": str(labels[i]), "count": int(counts[i])} for i in order]
+
+
+def _pick_measure(numbers: Dict[str, np.ndarray]) -> Optional[str]:
+    # 대표 수치: 절대값 합이 가장 큰 숫자 컬럼 (금액/수량이 보통 가장 크다)
+    best, best_total = None, -1.0
+    for name, arr in numbers.items():
+        total = float(np.nansum(np.abs(arr)))
+        if total > best_total:
+            best, best_total = name, total
+    return best
+
+
+def _breakdown(labels: np.ndarray, measure: np.ndarray, top_k: int) -> Dict[str, Any]:
+    keys, inverse = np.unique(labels, return_inverse=True)
+    sums = np.bincount(inverse, weights=np.nan_to_num(measure), minlength=len(keys))
+    total = float(sums.sum())
+    order = np.argsort(-sums, kind="stable")[:top_k]
+    return {
+        "total": _num(total),
+        "groups": len(keys),
+        "top": [
+            {
+                "value": str(keys[i]),
+                "sum": _num(sums[i]),
+                "share": _num(sums[i] / total, 4) if total else None,
+            }
+            for i in order
+        ],
+    }
+
+
+def _trend(dates: np.ndarray, measure: np.ndarray) -> Optional[Dict[str, Any]]:
+    periods, inverse = np.unique(dates, return_inverse=True)
+    if len(periods) < 2:
+        return None
+    sums = np.bincount(inverse, weights=np.nan_to_num(measure), minlength=len(periods))
+    slope = np.polyfit(np.arange(len(periods), dtype=float), sums, 1)[0]
+    first, last = float(sums[0]), float(sums[-1])
+    return {
+        "periods": len(periods),
+        "first_period": str(periods[0]),
+        "last_period": str(periods[-1]),
+        "first": _num(first),
+        "last": _num(last),
+        "slope_per_period": _num(slope),
+        "change_pct": _num((last - first) / abs(first) * 100.0, 2) if first else None,
+        "peak_period": str(periods[int(np.argmax(sums))]),
+    }
+
+
+def _as_table(rows: ProfileRows) -> ColumnarRows:
+    return rows if isinstance(rows, ColumnarRows) else ColumnarRows.from_records(list(rows))
+
+
+def profile_rows(rows: ProfileRows, top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    조회 결과 → 컬럼별 통계 요약 dict (JSON 직렬화 가능)
+    """
+    top_k = settings.INSIGHT_PROFILE_TOP_K if top_k is None else top_k
+    table = _as_table(rows)
+    n = len(table)
+    profile: Dict[str, Any] = {"row_count": n, "truncated": table.has_more, "columns": {}}
+    if n == 0:
+        return profile
+
+    numbers: Dict[str, np.ndarray] = {}
+    categories: Dict[str, np.ndarray] = {}
+    dates: Dict[str, np.ndarray] = {}
+    for idx, name in enumerate(table.columns):
+        raw = [r[idx] for r in table.data]
+        present = [v for v in raw if v is not None]
+        kind = _column_kind(name, present)
+        info: Dict[str, Any] = {"type": kind, "nulls": n - len(present)}
+
+        if kind == "number":
+            arr = np.asarray([np.nan if v is None else v for v in raw], dtype=float)
+            numbers[name] = arr
+            info.update(
+                min=_num(np.nanmin(arr)),
+                max=_num(np.nanmax(arr)),
+                sum=_num(np.nansum(arr)),
+                mean=_num(np.nanmean(arr)),
+            )
+        elif kind == "date":
+            periods = np.unique(_date_keys(present))
+            info.update(min=str(periods[0]), max=str(periods[-1]), distinct=len(periods))
+            if not info["nulls"]:
+                dates[name] = _date_keys(raw)
+        elif kind in ("category", "other"):
+            distinct, top = _top_counts(present, top_k)
+            info.update(distinct=distinct, top=top)
+            if distinct > 1:
+                categories[name] = np.asarray(["(null)" if v is None else str(v) for v in raw])
+        profile["columns"][name] = info
+
+    measure = _pick_measure(numbers)
+    if measure is None:
+        return profile
+    profile["measure"] = measure
+    values = numbers[measure]
+
+    if categories:
+        # 대표 범주: 그룹 수가 가장 적은(= 요약이 잘 되는) 범주 컬럼
+        by = min(categories, key=lambda c: profile["columns"][c]["distinct"])
+        profile["breakdown"] = {"by": by, **_breakdown(categories[by], values, top_k)}
+    if dates:
+        date_col = next(iter(dates))
+        trend = _trend(dates[date_col], values)
+        if trend is not None:
+            profile["trend"] = {"date": date_col, **trend}
+    return profile
+
+
+def exemplar_rows(rows: ProfileRows, profile: Dict[str, Any], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    프롬프트에 같이 넣을 예시 행: 앞쪽 몇 행 + 대표 수치 최대/최소 행
+    """
+    limit = settings.INSIGHT_EXEMPLAR_ROWS if limit is None else limit
+    table = _as_table(rows)
+    if not table.data or limit <= 0:
+        return []
+    picks = list(range(min(limit, len(table.data))))
+    measure = profile.get("measure")
+    if measure in table.columns and len(table.data) > limit:
+        idx = table.columns.index(measure)
+        arr = np.asarray([np.nan if r[idx] is None else r[idx] for r in table.data], dtype=float)
+        if not np.all(np.isnan(arr)):
+            for extreme in (int(np.nanargmax(arr)), int(np.nanargmin(arr))):
+                if extreme not in picks:
+                    picks.append(extreme)
+    return [dict(zip(table.columns, table.data[i])) for i in picks]
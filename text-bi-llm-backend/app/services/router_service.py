@@ -1,7 +1,11 @@
 # app/services/router_service.py
 
+import asyncio
 import json
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from contextlib import aclosing, contextmanager
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple, Union
 
 from sqlalchemy.orm import Session
 
@@ -9,12 +13,110 @@ from app.core.llm_client import llm_client
 from app.core.config import get_settings
 from app.schemas.sql_bi import SQLBIRequest, SQLBIResponse
 from app.schemas.insight import InsightResult
-from app.services.sql_bi_service import run_sql_bi
-from app.services.insight_service import generate_insight_and_chart
-from app.services.po_open_report import PO_OPEN_KEYWORDS, build_po_open_report
+from app.services.sql_bi_service import ColumnarRows, generate_sql, run_sql_bi
+from app.services.insight_service import (
+    fast_insight,
+    generate_insight_and_chart,
+    prepare_insight,
+    stream_insight_and_chart,
+)
+from app.services.local_router import local_router
+from app.services.po_open_report import PO_OPEN_KEYWORDS, POOpenConfig, build_po_open_report_concurrent
 
 settings = get_settings()
 
+
+class _PipelineStats:
+    """
+    /ask 파이프라인 단계별 소요시간 + 투기적(speculative) SQL 생성 결과 지표.
+    - stages: router_local / router / sql_gen / sql_exec / insight_local / insight / total
+    - speculative_used: 미리 생성한 SQL 을 그대로 사용
+    - speculative_discarded: 라우팅 결과가 sql_bi 가 아니어서 취소/폐기
+    - routed_local / routed_llm: 로컬 분류기로 끝난 요청 / Router LLM 까지 간 요청
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Dict[str, float]] = {}
+        self.speculative_used = 0
+        self.speculative_discarded = 0
+        self.routed_local = 0
+        self.routed_llm = 0
+
+    def record(self, stage: str, elapsed_ms: float) -> None:
+        with self._lock:
+            s = self._stages.setdefault(stage, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            s["count"] += 1
+            s["total_ms"] += elapsed_ms
+            s["max_ms"] = max(s["max_ms"], elapsed_ms)
+
+    def on_speculative(self, used: bool) -> None:
+        with self._lock:
+            if used:
+                self.speculative_used += 1
+            else:
+                self.speculative_discarded += 1
+
+    def on_route(self, local: bool) -> None:
+        with self._lock:
+            if local:
+                self.routed_local += 1
+            else:
+                self.routed_llm += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            routed = self.routed_local + self.routed_llm
+            return {
+                "routed_local": self.routed_local,
+                "routed_llm": self.routed_llm,
+                "local_route_rate": round(self.routed_local / routed, 4) if routed else 0.0,
+                "speculative_sql": settings.ROUTER_SPECULATIVE_SQL,
+                "speculative_used": self.speculative_used,
+                "speculative_discarded": self.speculative_discarded,
+                "stages": {
+                    name: {
+                        "count": int(s["count"]),
+                        "avg_ms": round(s["total_ms"] / s["count"], 2) if s["count"] else 0.0,
+                        "max_ms": round(s["max_ms"], 2),
+                    }
+                    for name, s in self._stages.items()
+                },
+            }
+
+
+_stats = _PipelineStats()
+
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    return _stats.snapshot()
+
+
+@contextmanager
+def _stage(timings: Dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        timings[name] = round(elapsed_ms, 2)
+        _stats.record(name, elapsed_ms)
+
+
+async def _discard_task(task: "asyncio.Task[Any]") -> None:
+    # 취소 후 결과/예외를 회수해 "exception was never retrieved" 경고를 막는다
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        # 버리는 task 의 취소는 삼키되, 기다리는 쪽(현재 task)이 취소된 거라면 그대로 전파
+        current = asyncio.current_task()
+        if current is not None and current.cancelling():
+            raise
+    except Exception:
+        pass
+
+
 # 🔥 Router LLM용 시스템 프롬프트 (사용자가 준 버전 그대로)
 ROUTER_SYSTEM_PROMPT = """
 너는 '구매·생산·재고·판매 BI 시스템'에서 들어오는 사용자의 질문을
@@ -69,7 +171,7 @@ ROUTER_SYSTEM_PROMPT = """
 
 async def route_question(question: str) -> str:
     """
-    자연어 질문을 받아서 처리 action을 결정한다.
+    자연어 질문을 받아서 처리 action을 결정한다. (Router LLM 호출)
     반환값 예: "sql_bi", "report", "help"
     """
     messages = [
@@ -91,47 +193,189 @@ async def route_question(question: str) -> str:
         # JSON 아니면 그냥 기본값 유지
         pass
 
+    # 파일 적재(+ 주기적 재학습)는 이벤트 루프 밖에서
+    await asyncio.to_thread(local_router.record, question, action)
     return action
 
 
+# rows: dict 리스트 (columnar=True 로 실행한 sql_bi 는 ColumnarRows)
+RouteRows = Union[List[Dict[str, Any]], ColumnarRows]
+RouteResult = Tuple[str, Optional[str], Optional[RouteRows], Optional[Any], List[Dict[str, Any]]]
+
+
 async def route_and_run(
     db: Session,
     question: str,
-) -> Tuple[str, Optional[str], Optional[List[Dict[str, Any]]], Optional[InsightResult], List[Dict[str, Any]]]:
+    po_open_config: Optional[POOpenConfig] = None,
+    columnar: bool = False,
+    fast_insight_mode: bool = False,
+) -> RouteResult:
     """
-    - router LLM으로 action을 결정하고
+    - 로컬 분류기(확신도 부족 시 router LLM)로 action을 결정하고
     - sql_bi면 SQL 생성 + 실행 + 인사이트 생성까지 수행
     - report/help이면 간단한 InsightResult만 만들어서 반환
+    - po_open_config: 구매오더 미결 리포트 기간/기준일 (None이면 기본값)
+    - columnar: True 면 sql_bi 결과 rows 를 ColumnarRows 로 반환 (행별 dict 생략)
+    - fast_insight_mode: True 면 인사이트 LLM 없이 로컬 통계 요약 + 로컬 chart_spec
 
     반환:
-      (action, sql, rows, insight_obj)
+      (action, sql, rows, insight_obj, sub_analyses)
+    """
+    # result 에서 바로 빠져나가도 제너레이터의 finally(남은 SQL task 정리)가 지금 실행되도록 aclosing
+    async with aclosing(
+        route_and_run_events(db, question, po_open_config, columnar=columnar, fast_insight_mode=fast_insight_mode)
+    ) as events:
+        async for event, data in events:
+            if event == "result":
+                return data
+    raise RuntimeError("route_and_run_events 가 result 이벤트 없이 종료되었습니다.")
+
+
+async def route_and_run_events(
+    db: Session,
+    question: str,
+    po_open_config: Optional[POOpenConfig] = None,
+    stream_insight: bool = False,
+    columnar: bool = False,
+    fast_insight_mode: bool = False,
+) -> AsyncIterator[Tuple[str, Any]]:
+    """
+    route_and_run 의 단계별 버전. 각 단계가 끝나는 대로 (event, data) 를 내보낸다.
+      ("action", str) → ("sql", str | None) → ("rows", list | ColumnarRows) →
+      ("page", {"query_id", "next_cursor"}) (뒤에 행이 더 있을 때만) →
+      ("chart", {"chart_spec", "kpis"}) (로컬에서 정해지면, 인사이트 LLM 전에) →
+      ("insight_delta", str)* (stream_insight=True 일 때) → ("insight", obj) →
+      ("sub_analyses", list) → ("result", route_and_run 반환 튜플)
+    /ask/stream (SSE) 와 route_and_run 이 같이 사용한다.
     """
     # 0) 고정 리포트류는 Router LLM 없이 바로 처리 (OPENAI 키 없이도 동작하도록)
     q_lower = question.lower()
     if any(k.lower() in q_lower for k in PO_OPEN_KEYWORDS):
-        sql_hint, main_rows, insight_obj, sub_analyses = build_po_open_report(db)
-        return "po_open_report", sql_hint, main_rows, insight_obj, [s.model_dump() for s in sub_analyses]
+        yield "action", "po_open_report"
+        sql_hint, main_rows, insight_obj, sub_analyses = await build_po_open_report_concurrent(po_open_config)
+        subs = [s.model_dump() for s in sub_analyses]
+        yield "sql", sql_hint
+        yield "rows", main_rows
+        yield "insight", insight_obj
+        yield "sub_analyses", subs
+        yield "result", ("po_open_report", sql_hint, main_rows, insight_obj, subs)
+        return
 
-    action = await route_question(question)
-    print(f"[router_service] action={action} question={question}")
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
 
-    # 1) SQL BI 분석 모드
-    if action == "sql_bi":
-        bi_req = SQLBIRequest(question=question)
-        bi_res: SQLBIResponse = await run_sql_bi(db, bi_req)
+    # 뻔한 질문은 로컬 분류기(규칙 + n-gram)로 바로 결정 → Router LLM / 투기적 SQL 생성 불필요
+    decision = None
+    if settings.ROUTER_LOCAL_ENABLED:
+        with _stage(timings, "router_local"):
+            decision = local_router.classify(question)
 
-        # rows가 없을 수도 있으니 방어적으로 처리
-        rows = bi_res.rows or []
+    sql_task: Optional["asyncio.Task[str]"] = None
+    sql_started = 0.0
+    try:
+        if decision is not None:
+            action = decision.action
+            _stats.on_route(local=True)
+            print(
+                f"[router_service] action={action} (local {decision.source}, "
+                f"confidence={decision.confidence}) question={question}"
+            )
+        else:
+            # Router 가 대부분 sql_bi 를 돌려주므로, 켜져 있으면 SQL 생성을 라우팅과 동시에 시작한다
+            if settings.ROUTER_SPECULATIVE_SQL:
+                sql_started = time.perf_counter()
+                sql_task = asyncio.create_task(generate_sql(question))
 
-        # LLM 기반 인사이트 + 차트 스펙 생성
-        # generate_insight_and_chart 함수 시그니처에 맞게 sql 인자 제거
-        insight_obj = await generate_insight_and_chart(
-            rows=rows,
-            question=question,
-        )
+            with _stage(timings, "router"):
+                action = await route_question(question)
+            _stats.on_route(local=False)
+            print(f"[router_service] action={action} question={question}")
+
+            if sql_task is not None and action != "sql_bi":
+                await _discard_task(sql_task)
+                _stats.on_speculative(used=False)
+                sql_task = None
+
+        yield "action", action
 
-        sub_analyses: List[Dict[str, Any]] = []
-        return action, bi_res.sql, bi_res.rows, insight_obj, sub_analyses
+        # 1) SQL BI 분석 모드
+        if action == "sql_bi":
+            if sql_task is not None:
+                # 라우팅 이후 남은 SQL 생성 대기시간만 sql_gen 으로 기록
+                with _stage(timings, "sql_gen"):
+                    sql = await sql_task
+                sql_task = None
+                _stats.on_speculative(used=True)
+                timings["sql_gen_total"] = round((time.perf_counter() - sql_started) * 1000.0, 2)
+            else:
+                with _stage(timings, "sql_gen"):
+                    sql = await generate_sql(question)
+            yield "sql", sql
+
+            bi_req = SQLBIRequest(question=question)
+            with _stage(timings, "sql_exec"):
+                bi_res: SQLBIResponse = await run_sql_bi(db, bi_req, sql=sql, columnar=columnar)
+            if bi_res.sql != sql:
+                # 실행 오류로 SQL 이 자동 수정된 경우 최종 SQL 을 다시 알린다
+                yield "sql", bi_res.sql
+
+            # rows가 없을 수도 있으니 방어적으로 처리
+            rows: RouteRows
+            has_more = bool(bi_res.query_id)
+            if columnar:
+                rows = ColumnarRows(columns=bi_res.columns or [], data=bi_res.data or [], has_more=has_more)
+                insight_rows = rows
+            else:
+                rows = bi_res.rows or []
+                # 인사이트용 통계(result_profile)는 컬럼 단위로 계산하므로 열 형태로 넘긴다
+                insight_rows = ColumnarRows.from_records(rows)
+                insight_rows.has_more = has_more
+            yield "rows", rows
+            if bi_res.query_id:
+                yield "page", {"query_id": bi_res.query_id, "next_cursor": bi_res.next_cursor}
+
+            # 통계 요약 + 차트는 로컬에서 먼저 정해 바로 내보내고, LLM 은 insight_text 만 쓴다
+            with _stage(timings, "insight_local"):
+                profile, chart_spec = prepare_insight(insight_rows, question)
+            if chart_spec is not None:
+                yield "chart", {"chart_spec": chart_spec.model_dump(), "kpis": profile or {}}
+
+            if fast_insight_mode:
+                insight_obj = fast_insight(profile, chart_spec)
+            elif stream_insight:
+                insight_obj = None
+                insight_started = time.perf_counter()
+                async for kind, value in stream_insight_and_chart(
+                    rows=insight_rows, question=question, profile=profile, chart_spec=chart_spec
+                ):
+                    if kind == "delta":
+                        yield "insight_delta", value
+                    else:
+                        insight_obj = value
+                insight_ms = (time.perf_counter() - insight_started) * 1000.0
+                timings["insight"] = round(insight_ms, 2)
+                _stats.record("insight", insight_ms)
+            else:
+                with _stage(timings, "insight"):
+                    insight_obj = await generate_insight_and_chart(
+                        rows=insight_rows,
+                        question=question,
+                        profile=profile,
+                        chart_spec=chart_spec,
+                    )
+            yield "insight", insight_obj
+
+            _stats.record("total", (time.perf_counter() - started) * 1000.0)
+            print(f"[router_service] timings(ms)={timings} speculative={settings.ROUTER_SPECULATIVE_SQL}")
+
+            sub_analyses: List[Dict[str, Any]] = []
+            yield "sub_analyses", sub_analyses
+            yield "result", (action, bi_res.sql, rows, insight_obj, sub_analyses)
+            return
+    finally:
+        # 에러/클라이언트 연결 종료로 중간에 끝나도 투기적 SQL 생성은 정리한다
+        if sql_task is not None:
+            await _discard_task(sql_task)
 
     # 2) 보고서/요약 모드 (임시: 안내 메시지)
     if action == "report":
@@ -143,19 +387,22 @@ async def route_and_run(
             ),
             chart_spec=None,
         )
-        return action, None, None, insight_obj, []
-
-    # 3) 도움말 모드
-    insight_obj = InsightResult(
-        insight_text=(
-            "이 시스템은 구매·생산·재고·판매 데이터를 기반으로,\n"
-            "자연어로 질문하면 SQL을 자동 생성하고, 결과 테이블과 차트, "
-            "인사이트를 제공하는 AI 기반 BI 데모입니다.\n\n"
-            "예시 질문:\n"
-            "- 플랜트별 재고금액 상위 10개 보여줘\n"
-            "- NH2 차종의 월별 생산대수 추이 보여줘\n"
-            "- 구매그룹별 발주금액 TOP 10 보여줘\n"
-        ),
-        chart_spec=None,
-    )
-    return action, None, None, insight_obj, []
+    else:
+        # 3) 도움말 모드
+        insight_obj = InsightResult(
+            insight_text=(
+                "이 시스템은 구매·생산·재고·판매 데이터를 기반으로,\n"
+                "자연어로 질문하면 SQL을 자동 생성하고, 결과 테이블과 차트, "
+                "인사이트를 제공하는 AI 기반 BI 데모입니다.\n\n"
+                "예시 질문:\n"
+                "- 플랜트별 재고금액 상위 10개 보여줘\n"
+                "- NH2 차종의 월별 생산대수 추이 보여줘\n"
+                "- 구매그룹별 발주금액 TOP 10 보여줘\n"
+            ),
+            chart_spec=None,
+        )
+    yield "sql", None
+    yield "rows", []
+    yield "insight", insight_obj
+    yield "sub_analyses", []
+    yield "result", (action, None, None, insight_obj, [])
@@ -0,0 +1,263 @@
+# app/services/schema_catalog.py
+"""
+실제 MySQL 스키마(information_schema) 기반 스키마 카탈로그.
+
+- sql_schema.PURCHASE_SCHEMA_DOC 는 손으로 관리하는 문자열이라 실제 스키마와 어긋난다
+  (`purchase order` ↔ `purchase_order`, 매일 늘어나는 stock_check_MM_DD 등).
+- 앱 시작 시 + SCHEMA_CATALOG_REFRESH_SECONDS 마다 information_schema 를 한 번 조회해
+  테이블/컬럼/타입/행 수를 메모리에 캐시하고,
+  PURCHASE_SCHEMA_DOC 의 사람이 쓴 테이블/컬럼 설명을 합쳐 프롬프트용 문서를 만든다.
+- 만든 문서는 schema_index.set_schema_doc() 으로 넘겨 검색 인덱스를 교체한다.
+  요청 처리 중에는 캐시된 문서만 쓰므로 DB 왕복이 없다.
+- 대상 테이블: 정적 문서에 설명이 있는 테이블 + 그 날짜별 스냅샷(<테이블>_MM_DD).
+  (SCHEMA_CATALOG_INCLUDE_UNDOCUMENTED=True 면 나머지 테이블도 타입 정보만으로 포함)
+- MySQL 이 아니거나 조회에 실패하면 정적 문서를 그대로 쓴다.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.executor import run_in_db
+from app.db.session import SessionLocal
+from app.services.schema_index import TableSection, set_schema_doc, static_schema_index
+
+settings = get_settings()
+
+_CATALOG_SQL = text(
+    """
+SELECT
+  c.TABLE_NAME, c.COLUMN_NAME, c.COLUMN_TYPE, c.COLUMN_COMMENT,
+  t.TABLE_ROWS, t.TABLE_COMMENT
+FROM information_schema.columns c
+JOIN information_schema.tables t
+  ON t.TABLE_SCHEMA = c.TABLE_SCHEMA AND t.TABLE_NAME = c.TABLE_NAME
+WHERE c.TABLE_SCHEMA = DATABASE()
+  AND t.TABLE_TYPE IN ('BASE TABLE', 'VIEW')
+ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+)
+
+_RULE = "-" * 70
+_DATED_SUFFIX_RE = re.compile(r"^(?P<base>.+?)[ _](?P<month>\d{1,2})[ _](?P<day>\d{1,2})$")
+
+
+def _name_key(name: str) -> str:
+    # `purchase order` / `purchase_order` / `PurchaseOrder` 를 같은 테이블로 본다
+    return re.sub(r"[\s_]+", "", name).lower()
+
+
+@dataclass
+class ColumnInfo:
+    name: str
+    type: str
+    comment: str = ""
+
+
+@dataclass
+class TableInfo:
+    name: str
+    columns: List[ColumnInfo] = field(default_factory=list)
+    row_count: Optional[int] = None
+    comment: str = ""
+
+
+class SchemaCatalog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.tables: Dict[str, TableInfo] = {}
+        self.doc: Optional[str] = None
+        self.refreshed_at: Optional[float] = None
+        self.refresh_ms = 0.0
+        self.refreshes = 0
+        self.changes = 0
+        self.last_error: Optional[str] = None
+
+        # 정적 문서의 설명: 정규화된 테이블명 → 섹션
+        self._docs: Dict[str, TableSection] = {
+            _name_key(t.name): t for t in static_schema_index.tables
+        }
+
+    # ---------- 조회 ----------
+    def _introspect(self, db: Session) -> Dict[str, TableInfo]:
+        tables: Dict[str, TableInfo] = {}
+        for row in db.execute(_CATALOG_SQL).fetchall():
+            table_name, column, column_type, column_comment, table_rows, table_comment = row
+            info = tables.get(table_name)
+            if info is None:
+                info = tables[table_name] = TableInfo(
+                    name=table_name,
+                    row_count=int(table_rows) if table_rows is not None else None,
+                    comment=table_comment or "",
+                )
+            info.columns.append(ColumnInfo(name=column, type=str(column_type), comment=column_comment or ""))
+        return tables
+
+    def _doc_for(self, table_name: str) -> Optional[TableSection]:
+        key = _name_key(table_name)
+        if key in self._docs:
+            return self._docs[key]
+        # 날짜별 스냅샷은 원본 테이블 설명을 물려받는다 (stock_check_11_30 → stock_check)
+        m = _DATED_SUFFIX_RE.match(table_name)
+        if m:
+            return self._docs.get(_name_key(m.group("base")))
+        return None
+
+    # ---------- 렌더링 ----------
+    def _render_table(self, info: TableInfo, section: Optional[TableSection]) -> str:
+        desc = section.description if section is not None else ""
+        m = _DATED_SUFFIX_RE.match(info.name)
+        if m and section is not None and _name_key(section.name) != _name_key(info.name):
+            desc = f"{desc.split(',')[0]}, {m.group('month')}_{m.group('day')}일자"
+        desc = desc or info.comment
+        # 행 수(TABLE_ROWS)는 갱신마다 흔들리는 추정치라 문서에 넣지 않는다
+        # (문서 해시가 SQL 캐시 키에 들어가므로 매번 캐시가 깨짐) → stats/describe 로만 제공
+        head = f"[TABLE: {info.name}]" + (f"  -- {desc}" if desc else "")
+
+        docs = section.column_docs if section is not None else {}
+        docs_by_key = {_name_key(k): v for k, v in docs.items()}
+        width = max((len(c.name) for c in info.columns), default=0)
+        lines = [_RULE, head, _RULE, ""]
+        for col in info.columns:
+            col_desc = docs.get(col.name) or docs_by_key.get(_name_key(col.name)) or col.comment
+            line = f"- {col.name.ljust(width)} : "
+            line += f"{col_desc} [{col.type}]" if col_desc else f"[{col.type}]"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def render(self, tables: Dict[str, TableInfo]) -> str:
+        documented = [
+            info for info in tables.values()
+            if settings.SCHEMA_CATALOG_INCLUDE_UNDOCUMENTED or self._doc_for(info.name) is not None
+        ]
+        excluded = {_name_key(t) for t in settings.SCHEMA_CATALOG_EXCLUDE_TABLES}
+        documented = [info for info in documented if _name_key(info.name) not in excluded]
+
+        # 정적 문서의 테이블 순서를 따르고, 스냅샷/미문서 테이블은 뒤로
+        order = {key: i for i, key in enumerate(self._docs)}
+        documented.sort(key=lambda info: (order.get(_name_key(info.name), len(order)), info.name))
+
+        # 관계/용어 매핑 섹션의 테이블명도 실제 이름으로 바꾼다 (purchase_order → `purchase order`)
+        renames: Dict[str, str] = {}
+        for info in documented:
+            section = self._docs.get(_name_key(info.name))
+            if section is not None and section.name != info.name:
+                real = info.name if re.fullmatch(r"[\w$]+", info.name) else f"`{info.name}`"
+                renames[section.name] = real
+
+        others = []
+        for body in static_schema_index.other_sections:
+            for old, new in renames.items():
+                body = re.sub(rf"(?<![\w$`]){re.escape(old)}(?![\w$])", new, body)
+            others.append(body)
+
+        parts = [static_schema_index.preamble]
+        parts.extend(self._render_table(info, self._doc_for(info.name)) for info in documented)
+        parts.extend(others)
+        return "\n\n".join(p for p in parts if p) + "\n"
+
+    # ---------- 갱신 ----------
+    def refresh(self, db: Session) -> bool:
+        """
+        information_schema 를 다시 읽어 문서를 만든다. 반환: 문서가 바뀌었는지
+        """
+        if db.get_bind().dialect.name != "mysql":
+            return False
+        started = time.perf_counter()
+        try:
+            tables = self._introspect(db)
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"[schema_catalog] introspection failed: {e}")
+            return False
+        doc = self.render(tables) if tables else None
+
+        with self._lock:
+            self.tables = tables
+            self.refreshed_at = time.time()
+            self.refresh_ms = round((time.perf_counter() - started) * 1000.0, 2)
+            self.refreshes += 1
+            self.last_error = None
+            changed = doc is not None and doc != self.doc
+            if changed:
+                self.doc = doc
+                self.changes += 1
+
+        if changed:
+            set_schema_doc(doc)
+            print(f"[schema_catalog] schema doc updated ({len(tables)} tables, {len(doc)} chars)")
+        return changed
+
+    def describe(self) -> List[Dict[str, Any]]:
+        """
+        캐시된 테이블 메타데이터 (DB 조회 없음)
+        """
+        with self._lock:
+            tables = list(self.tables.values())
+        return [
+            {
+                "name": t.name,
+                "row_count": t.row_count,
+                "columns": [{"name": c.name, "type": c.type} for c in t.columns],
+            }
+            for t in tables
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.SCHEMA_CATALOG_ENABLED,
+                "source": "information_schema" if self.doc is not None else "static",
+                "tables": len(self.tables),
+                "refreshes": self.refreshes,
+                "changes": self.changes,
+                "refreshed_at": self.refreshed_at,
+                "refresh_ms": self.refresh_ms,
+                "last_error": self.last_error,
+            }
+
+
+schema_catalog = SchemaCatalog()
+
+
+def _refresh_with_own_session() -> bool:
+    db = SessionLocal()
+    try:
+        return schema_catalog.refresh(db)
+    finally:
+        db.close()
+
+
+async def refresh_schema_catalog() -> bool:
+    if not settings.SCHEMA_CATALOG_ENABLED:
+        return False
+    try:
+        return await run_in_db(_refresh_with_own_session)
+    except Exception as e:
+        # DB 접속 실패 등으로 앱 기동이 막히지 않도록 정적 문서로 계속 동작
+        schema_catalog.last_error = str(e)
+        print(f"[schema_catalog] refresh failed: {e}")
+        return False
+
+
+async def schema_catalog_refresh_loop() -> None:
+    """
+    app.main 의 lifespan 에서 백그라운드 태스크로 실행.
+    """
+    interval = settings.SCHEMA_CATALOG_REFRESH_SECONDS
+    if not settings.SCHEMA_CATALOG_ENABLED or interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        await refresh_schema_catalog()
+
+
+def get_schema_catalog_stats() -> Dict[str, Any]:
+    return schema_catalog.stats()
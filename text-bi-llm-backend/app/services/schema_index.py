@@ -0,0 +1,395 @@
+# app/services/schema_index.py
+"""
+SQL 생성 프롬프트용 스키마 문서 검색 (PURCHASE_SCHEMA_DOC → 질문과 관련된 테이블만).
+
+- 앱 시작 시(모듈 import 시) 문서를 [TABLE: ...] 섹션 단위로 나눠 인덱스를 만든다.
+  schema_catalog 가 실제 DB 스키마로 문서를 다시 만들면 set_schema_doc() 으로 교체된다.
+- 점수: 질문 안에 나온 컬럼명(여러 테이블에 흔한 컬럼은 IDF로 가중치 감소)
+        + [Business term mapping] 의 업무 용어 → 대상 테이블
+        + 테이블명 직접 언급
+        + (선택) 로컬 임베딩 모델 유사도 (SQL_SCHEMA_EMBEDDING_MODEL, sentence-transformers 필요)
+- 날짜별 스냅샷(stock_check_11_24 등)은 질문에 해당 날짜가 있을 때만 후보가 된다.
+- 상위 SQL_SCHEMA_TOP_K 개 테이블 섹션 + 선택된 테이블과 관련된 용어 매핑/관계만 붙인다.
+  (1위 점수 대비 SQL_SCHEMA_MIN_RELATIVE_SCORE 미만은 제외)
+  아무 테이블도 점수가 없으면 전체 문서를 그대로 쓴다.
+"""
+
+import math
+import re
+import threading
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.services.sql_cache import normalize_question
+from app.services.sql_schema import PURCHASE_SCHEMA_DOC
+
+settings = get_settings()
+
+_RULE_LINE_RE = re.compile(r"^-{10,}\s*$")
+_SECTION_HEAD_RE = re.compile(r"^\[(TABLE:\s*(?P<table>[^\]]+?)\s*|(?P<other>[^\]]+))\](?P<desc>.*)$")
+_COLUMN_LINE_RE = re.compile(r"^-\s+(?P<name>[^:]+?)\s*:\s*(?P<desc>.*)$")
+_TERM_LINE_RE = re.compile(r'^-\s+(".*)$')
+_QUOTED_RE = re.compile(r'"([^"]+)"')
+_DATED_TABLE_RE = re.compile(r"^(?P<base>[\w$]+?)_(?P<month>\d{1,2})_(?P<day>\d{1,2})$")
+
+# 점수 가중치
+_TABLE_NAME_WEIGHT = 3.0
+_TERM_WEIGHT = 2.0
+_DATE_MATCH_WEIGHT = 5.0
+_EMBEDDING_WEIGHT = 3.0
+
+
+def _compact(text: str) -> str:
+    # 한국어는 조사가 붙으므로("재고금액을") 공백 제거 후 부분문자열로 비교
+    return normalize_question(text).replace(" ", "")
+
+
+@dataclass
+class TableSection:
+    name: str
+    text: str
+    columns: List[str]
+    description: str = ""
+    # 원래 컬럼명 → 설명 (schema_catalog 가 실제 스키마와 합칠 때 사용)
+    column_docs: Dict[str, str] = field(default_factory=dict)
+    # 날짜별 스냅샷이면 (월, 일)
+    snapshot_date: Optional[Tuple[int, int]] = None
+
+
+@dataclass
+class TermEntry:
+    text: str
+    terms: List[str]
+    tables: Set[str]
+
+
+@dataclass
+class SchemaSelection:
+    doc: str
+    tables: List[str]
+    scores: Dict[str, float] = field(default_factory=dict)
+    fallback: bool = False
+
+
+def _split_sections(doc: str) -> Tuple[str, List[Tuple[str, str, str]]]:
+    """
+    문서를 (머리말, [(종류, 이름, 본문)]) 으로 나눈다. 종류: "table" | "other"
+    """
+    lines = doc.splitlines()
+    heads: List[Tuple[int, str, str]] = []
+    for i, line in enumerate(lines):
+        m = _SECTION_HEAD_RE.match(line.strip())
+        # 섹션 머리는 구분선(----) 사이에 있다
+        if m and i > 0 and _RULE_LINE_RE.match(lines[i - 1].strip()):
+            if m.group("table"):
+                heads.append((i, "table", m.group("table")))
+            else:
+                heads.append((i, "other", m.group("other").strip()))
+
+    if not heads:
+        return doc, []
+
+    preamble = "\n".join(lines[: heads[0][0] - 1]).rstrip()
+    sections: List[Tuple[str, str, str]] = []
+    for idx, (start, kind, name) in enumerate(heads):
+        end = heads[idx + 1][0] - 1 if idx + 1 < len(heads) else len(lines)
+        body = "\n".join(lines[start - 1:end]).rstrip()
+        sections.append((kind, name, body))
+    return preamble, sections
+
+
+def _parse_terms(body: str, table_names: List[str]) -> List[TermEntry]:
+    """
+    [Business term mapping] 섹션을 용어 항목 단위로 나눈다.
+        - "재고금액"
+            → stock_check.`재고액`
+    """
+    entries: List[TermEntry] = []
+    current: Optional[List[str]] = None
+    for line in body.splitlines():
+        stripped = line.strip()
+        if _TERM_LINE_RE.match(stripped):
+            if current:
+                entries.append(_make_term_entry(current, table_names))
+            current = [line]
+        elif current is not None and stripped.startswith("→"):
+            current.append(line)
+        elif current is not None and not stripped:
+            continue
+        elif current is not None:
+            entries.append(_make_term_entry(current, table_names))
+            current = None
+    if current:
+        entries.append(_make_term_entry(current, table_names))
+    return entries
+
+
+def _make_term_entry(lines: List[str], table_names: List[str]) -> TermEntry:
+    head = lines[0]
+    targets = " ".join(lines[1:])
+    tables = {t for t in table_names if re.search(rf"(?<![\w$]){re.escape(t)}(?![\w$])", targets)}
+    return TermEntry(text="\n".join(lines), terms=[_compact(t) for t in _QUOTED_RE.findall(head)], tables=tables)
+
+
+@lru_cache(maxsize=2)
+def _load_embedder(model_name: str):
+    # 문서가 교체되어 인덱스를 새로 만들어도 모델은 한 번만 로드
+    try:
+        from sentence_transformers import SentenceTransformer  # 선택 의존성
+    except ImportError:
+        print("[schema_index] sentence-transformers 패키지가 없어 임베딩 점수를 사용하지 않습니다.")
+        return None
+    return SentenceTransformer(model_name)
+
+
+class SchemaIndex:
+    def __init__(
+        self,
+        doc: str,
+        top_k: int = 3,
+        min_relative_score: float = 0.3,
+        embedding_model: Optional[str] = None,
+    ):
+        self.doc = doc
+        self.top_k = top_k
+        self.min_relative_score = min_relative_score
+        self.preamble, raw_sections = _split_sections(doc)
+
+        self.tables: List[TableSection] = []
+        self.relationships = ""
+        self.term_header = ""
+        self.terms: List[TermEntry] = []
+        # [Relationships], [Business term mapping] 등 테이블 외 섹션 원문 (문서 순서)
+        self.other_sections: List[str] = []
+
+        for kind, name, body in raw_sections:
+            if kind == "table":
+                self.tables.append(self._parse_table(name, body))
+            else:
+                self.other_sections.append(body)
+
+        table_names = [t.name for t in self.tables]
+        for kind, name, body in raw_sections:
+            if kind != "other":
+                continue
+            lowered = name.lower()
+            if lowered.startswith("relationship"):
+                self.relationships = body
+            elif lowered.startswith("business term"):
+                self.term_header = "\n".join(body.splitlines()[:3])
+                self.terms = _parse_terms(body, table_names)
+
+        # 컬럼 IDF: 플랜트/자재번호처럼 거의 모든 테이블에 있는 컬럼은 변별력이 낮다
+        n_tables = max(1, len([t for t in self.tables if t.snapshot_date is None]))
+        df: Dict[str, int] = {}
+        for t in self.tables:
+            if t.snapshot_date is not None:
+                continue
+            for col in set(t.columns):
+                df[col] = df.get(col, 0) + 1
+        self._col_weight = {col: math.log(1.0 + n_tables / c) for col, c in df.items()}
+
+        self._embedder = None
+        self._table_vectors: Optional[Any] = None
+        self._embedding_model = embedding_model
+        self._embed_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self.selections = 0
+        self.fallbacks = 0
+        self.selected_chars_total = 0
+
+    # ---------- 파싱 ----------
+    @staticmethod
+    def _parse_table(name: str, body: str) -> TableSection:
+        columns: List[str] = []
+        column_docs: Dict[str, str] = {}
+        for line in body.splitlines():
+            m = _COLUMN_LINE_RE.match(line.strip())
+            if m:
+                column_docs.setdefault(m.group("name").strip(), m.group("desc").strip())
+                col = _compact(m.group("name"))
+                if len(col) >= 2 and col not in columns:
+                    columns.append(col)
+        head = next((l for l in body.splitlines() if l.strip().startswith("[TABLE:")), "")
+        desc = head.split("--", 1)[1].strip() if "--" in head else ""
+
+        snapshot_date = None
+        m = _DATED_TABLE_RE.match(name)
+        if m:
+            snapshot_date = (int(m.group("month")), int(m.group("day")))
+        return TableSection(
+            name=name,
+            text=body,
+            columns=columns,
+            description=desc,
+            column_docs=column_docs,
+            snapshot_date=snapshot_date,
+        )
+
+    # ---------- (선택) 임베딩 ----------
+    def _get_embedder(self):
+        if not self._embedding_model:
+            return None
+        with self._embed_lock:
+            if self._embedder is None:
+                embedder = _load_embedder(self._embedding_model)
+                if embedder is None:
+                    self._embedding_model = None
+                    return None
+                self._embedder = embedder
+                self._table_vectors = self._embedder.encode(
+                    [f"{t.name} {t.description} {' '.join(t.columns)}" for t in self.tables],
+                    normalize_embeddings=True,
+                )
+        return self._embedder
+
+    def _embedding_scores(self, question: str) -> Dict[str, float]:
+        embedder = self._get_embedder()
+        if embedder is None or self._table_vectors is None:
+            return {}
+        q_vec = embedder.encode([question], normalize_embeddings=True)[0]
+        sims = self._table_vectors @ q_vec
+        return {t.name: float(s) for t, s in zip(self.tables, sims)}
+
+    # ---------- 점수 ----------
+    @staticmethod
+    def _mentions_date(q: str, month: int, day: int) -> bool:
+        patterns = [
+            rf"(?<!\d)0?{month}월 ?0?{day}일",
+            rf"(?<!\d)0?{month}[/._-]0?{day}(?!\d)",
+            rf"(?<!\d){month:02d}{day:02d}(?!\d)",
+        ]
+        return any(re.search(p, q) for p in patterns)
+
+    def score(self, question: str) -> Dict[str, float]:
+        q = normalize_question(question)
+        qc = q.replace(" ", "")
+        scores: Dict[str, float] = {}
+
+        for t in self.tables:
+            s = 0.0
+            if t.snapshot_date is not None:
+                # 날짜 스냅샷 테이블은 그 날짜를 물어볼 때만
+                if not self._mentions_date(q, *t.snapshot_date):
+                    continue
+                s += _DATE_MATCH_WEIGHT
+            if t.name.lower() in qc:
+                s += _TABLE_NAME_WEIGHT
+            for col in t.columns:
+                if col in qc:
+                    s += self._col_weight.get(col, 1.0)
+            scores[t.name] = s
+
+        for entry in self.terms:
+            if entry.tables and any(term and term in qc for term in entry.terms):
+                for name in entry.tables:
+                    if name in scores:
+                        scores[name] += _TERM_WEIGHT / len(entry.tables)
+
+        for name, sim in self._embedding_scores(question).items():
+            if name in scores:
+                scores[name] += _EMBEDDING_WEIGHT * max(0.0, sim)
+
+        return scores
+
+    # ---------- 선택 ----------
+    def select(self, question: str, top_k: Optional[int] = None) -> SchemaSelection:
+        k = top_k or self.top_k
+        scores = self.score(question)
+        ranked = [name for name, s in sorted(scores.items(), key=lambda kv: kv[1], reverse=True) if s > 0][:k]
+        if ranked:
+            cutoff = scores[ranked[0]] * self.min_relative_score
+            ranked = [name for name in ranked if scores[name] >= cutoff]
+
+        if not ranked:
+            selection = SchemaSelection(doc=self.doc, tables=[t.name for t in self.tables], scores=scores, fallback=True)
+        else:
+            selection = SchemaSelection(doc=self._render(set(ranked)), tables=ranked, scores=scores)
+
+        with self._stats_lock:
+            self.selections += 1
+            self.selected_chars_total += len(selection.doc)
+            if selection.fallback:
+                self.fallbacks += 1
+        return selection
+
+    def _render(self, selected: Set[str]) -> str:
+        parts = [self.preamble]
+        # 원래 문서 순서 유지
+        parts.extend(t.text for t in self.tables if t.name in selected)
+        if len(selected) > 1 and self.relationships:
+            parts.append(self.relationships)
+        terms = [e.text for e in self.terms if not e.tables or e.tables & selected]
+        if terms:
+            parts.append(self.term_header + "\n\n" + "\n".join(terms))
+        return "\n\n".join(p for p in parts if p) + "\n"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            avg_chars = self.selected_chars_total / self.selections if self.selections else 0.0
+            return {
+                "tables": len(self.tables),
+                "top_k": self.top_k,
+                "embedding_model": self._embedding_model,
+                "selections": self.selections,
+                "fallbacks": self.fallbacks,
+                "full_doc_chars": len(self.doc),
+                "avg_selected_chars": round(avg_chars, 1),
+                "avg_ratio": round(avg_chars / len(self.doc), 4) if self.selections and self.doc else 0.0,
+            }
+
+
+def _build_index(doc: str) -> SchemaIndex:
+    return SchemaIndex(
+        doc,
+        top_k=settings.SQL_SCHEMA_TOP_K,
+        min_relative_score=settings.SQL_SCHEMA_MIN_RELATIVE_SCORE,
+        embedding_model=settings.SQL_SCHEMA_EMBEDDING_MODEL,
+    )
+
+
+# 정적 문서(PURCHASE_SCHEMA_DOC) 기준 인덱스. schema_catalog 의 설명 원본으로도 쓰인다
+static_schema_index = _build_index(PURCHASE_SCHEMA_DOC)
+schema_index = static_schema_index
+
+
+def set_schema_doc(doc: str) -> bool:
+    """
+    스키마 문서를 교체하고 인덱스를 다시 만든다. 반환: 실제로 바뀌었는지
+    """
+    global schema_index
+    if doc == schema_index.doc:
+        return False
+    schema_index = _build_index(doc)
+    return True
+
+
+def get_schema_doc() -> str:
+    return schema_index.doc
+
+
+def select_schema_doc(question: str) -> str:
+    """
+    generate_sql 에서 사용할 스키마 문서. (SQL_SCHEMA_RETRIEVAL_ENABLED=False 면 전체 문서)
+    """
+    index = schema_index
+    if not settings.SQL_SCHEMA_RETRIEVAL_ENABLED:
+        return index.doc
+    return index.select(question).doc
+
+
+def get_embedder():
+    """
+    SQL_SCHEMA_EMBEDDING_MODEL 임베딩 모델 (설정 안 됐거나 sentence-transformers 가 없으면 None).
+    sql_cache 의 의미 유사도 조회도 같은 모델을 쓴다.
+    """
+    if not settings.SQL_SCHEMA_EMBEDDING_MODEL:
+        return None
+    return _load_embedder(settings.SQL_SCHEMA_EMBEDDING_MODEL)
+
+
+def get_schema_index_stats() -> Dict[str, Any]:
+    return schema_index.stats()
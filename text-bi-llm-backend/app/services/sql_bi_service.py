@@ -1,19 +1,33 @@
 # app/services/sql_bi_service.py
 
 import json
+import time
+from dataclasses import dataclass, field
 from decimal import Decimal
 from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
 from app.core.llm_client import llm_client
 from app.core.config import get_settings
+from app.db.executor import run_in_db
+from app.db.query_control import statement_timeout
 from app.schemas.sql_bi import SQLBIRequest, SQLBIResponse
-from app.services.sql_schema import (
-    SQL_SYSTEM_PROMPT,
-    PURCHASE_SCHEMA_DOC,
+from app.services.result_cache import result_cache
+from app.services.result_pages import decode_cursor, encode_cursor, query_pages
+from app.services.schema_index import select_schema_doc
+from app.services.sql_guard import (
+    SQLGuardError,
+    add_max_execution_time,
+    apply_row_limit,
+    sql_guard,
+    validate_sql,
 )
+from app.services.sql_repair import repair_stats, repairable_error, sql_fix_memo
+from app.services.sql_cache import sql_cache
+from app.services.sql_schema import SQL_SYSTEM_PROMPT
 
 settings = get_settings()
 
@@ -21,16 +35,45 @@ settings = get_settings()
 async def generate_sql(question: str) -> str:
     """
     자연어 질문과 스키마 설명을 기반으로 LLM에게 SQL을 생성시키는 함수.
+    - 스키마 문서는 질문과 관련된 테이블 섹션만 추려서 넣는다 (schema_index)
+    - 정규화 질문 + 스키마 해시 + 모델 기준 캐시 히트 시 LLM 호출 생략
+    - 정적 검사(sql_guard: 읽기 전용, 스키마 카탈로그 대조)를 통과한 SQL 만 캐시한다.
+      통과하지 못한 SQL 도 그대로 반환 → 실행 단계(_execute_with_repair)에서 다시 검사하고
+      위반 내용으로 SQL 을 고친다 (고친 SQL 은 거기서 캐시)
     """
-    user_content = f"스키마:\n{PURCHASE_SCHEMA_DOC}\n\n질문:\n{question}"
+    model = settings.OPENAI_SQL_MODEL
+    schema_doc = select_schema_doc(question)
+    cached = sql_cache.get(question, schema_doc, model)
+    if cached:
+        try:
+            # 캐시 이후 스키마가 바뀌었을 수 있으므로 다시 검사 (DB 조회 없음, 통계는 실행 단계에서)
+            validate_sql(cached)
+            print(f"[sql_bi_service] sql cache hit: {question}")
+            return cached
+        except SQLGuardError as e:
+            print(f"[sql_bi_service] cached sql rejected, regenerating: {e}")
+
+    user_content = f"스키마:\n{schema_doc}\n\n질문:\n{question}"
 
     messages = [
         {"role": "system", "content": SQL_SYSTEM_PROMPT},
         {"role": "user", "content": user_content},
     ]
 
-    raw = await llm_client.chat(messages, model=settings.OPENAI_SQL_MODEL)
+    raw = await llm_client.chat(messages, model=model)
+    sql = _parse_sql_response(raw)
+
+    try:
+        validate_sql(sql)
+    except SQLGuardError as e:
+        print(f"[sql_bi_service] generated sql rejected, will repair: {e}")
+        return sql
+
+    sql_cache.set(question, schema_doc, model, sql)
+    return sql
+
 
+def _parse_sql_response(raw: str) -> str:
     # LLM은 {"sql": "..."} 형태의 JSON 문자열을 반환하도록 설계
     try:
         parsed = json.loads(raw)
@@ -41,14 +84,34 @@ async def generate_sql(question: str) -> str:
 
     if not sql:
         raise ValueError("LLM이 빈 SQL을 반환했습니다.")
+    return sql
 
-    # 방어 로직: SELECT만 허용, 세미콜론 금지
-    if not sql.lstrip().upper().startswith("SELECT"):
-        raise ValueError("Only SELECT queries are allowed.")
-    if ";" in sql:
-        raise ValueError("Semicolons are forbidden in the SQL query.")
 
-    return sql
+async def repair_sql(question: str, failed_sql: str, error: str) -> str:
+    """
+    DB/가드레일이 거부한 SQL 을 오류 메시지와 함께 SQL 모델에 보내 고친 SQL 을 받는다.
+    같은 실패 SQL 은 메모(sql_fix_memo)에서 바로 꺼낸다 (LLM 호출 없음).
+    """
+    memo = sql_fix_memo.get(failed_sql)
+    if memo is not None:
+        repair_stats.on_fix(from_memo=True)
+        print(f"[sql_bi_service] sql fix memo hit: {question}")
+        return memo
+
+    schema_doc = select_schema_doc(question)
+    user_content = (
+        f"스키마:\n{schema_doc}\n\n질문:\n{question}\n\n"
+        f"이전에 생성한 SQL:\n{failed_sql}\n\n"
+        f"실행 오류:\n{error}\n\n"
+        "위 오류가 나지 않도록 SQL을 고쳐서 같은 JSON 형식으로 다시 답하라."
+    )
+    messages = [
+        {"role": "system", "content": SQL_SYSTEM_PROMPT},
+        {"role": "user", "content": user_content},
+    ]
+    raw = await llm_client.chat(messages, model=settings.OPENAI_SQL_MODEL)
+    repair_stats.on_fix(from_memo=False)
+    return _parse_sql_response(raw)
 
 
 def _normalize_value(value):
@@ -66,37 +129,259 @@ def _normalize_value(value):
     return value
 
 
-def execute_sql(db: Session, sql: str, limit: int = 200):
+def _column_converter(values: Sequence[Any]) -> Optional[Callable[[Any], Any]]:
+    """
+    컬럼의 첫 non-null 값 타입으로 변환 함수를 한 번만 정한다.
+    (DB 컬럼은 타입이 하나이므로 셀마다 isinstance 를 반복할 필요가 없다)
+    None 이면 변환 불필요 (int/str/float 등)
+    """
+    sample = next((v for v in values if v is not None), None)
+    if isinstance(sample, Decimal):
+        return float
+    if isinstance(sample, (date, datetime)):
+        return lambda v: v.isoformat()
+    return None
+
+
+def _normalize_batch(rows: Sequence[Tuple[Any, ...]], width: int) -> List[List[Any]]:
+    if not rows:
+        return []
+    columns = list(zip(*rows)) if width else []
+    for i, values in enumerate(columns):
+        convert = _column_converter(values)
+        if convert is None:
+            continue
+        try:
+            columns[i] = tuple(None if v is None else convert(v) for v in values)
+        except (TypeError, AttributeError, ValueError):
+            # 타입이 섞인 컬럼(UNION 등)은 셀 단위로 처리
+            columns[i] = tuple(_normalize_value(v) for v in values)
+    return [list(r) for r in zip(*columns)]
+
+
+@dataclass
+class ColumnarRows:
+    """
+    컬럼명 1회 + 값 배열 형태의 조회 결과 ({"columns": [...], "data": [[...]]}).
+    행마다 dict 를 만들지 않아 넓은 결과에서 직렬화/메모리 비용이 작다.
+    """
+    columns: List[str]
+    data: List[List[Any]] = field(default_factory=list)
+    # LIMIT 밖에 행이 더 있는지 (limit + 1 행을 조회해서 판단)
+    has_more: bool = False
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    @classmethod
+    def from_records(cls, rows: Sequence[Dict[str, Any]]) -> "ColumnarRows":
+        columns: List[str] = []
+        for row in rows:
+            for col in row:
+                if col not in columns:
+                    columns.append(col)
+        return cls(columns=columns, data=[[row.get(c) for c in columns] for row in rows])
+
+    def to_records(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        data = self.data if limit is None else self.data[:limit]
+        return [dict(zip(self.columns, r)) for r in data]
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {"columns": self.columns, "data": self.data}
+
+
+def _fetch_batches(result, limit: int, batch_size: int) -> List[Tuple[Any, ...]]:
+    rows: List[Tuple[Any, ...]] = []
+    while len(rows) < limit:
+        batch = result.fetchmany(min(batch_size, limit - len(rows)))
+        if not batch:
+            break
+        rows.extend(tuple(r) for r in batch)
+    return rows
+
+
+def execute_sql_columnar(
+    db: Session,
+    sql: str,
+    limit: int = 200,
+    params: Optional[Dict[str, Any]] = None,
+    offset: int = 0,
+) -> ColumnarRows:
+    """
+    SQL을 실행하고 컬럼 단위로 정규화한 ColumnarRows 를 반환.
+    (참조 테이블 버전 기반 결과 캐시를 거친다)
+    - SQL 에 LIMIT limit+1 (OFFSET offset) 을 붙여 DB 가 필요한 만큼만 만들게 한다
+      (+1 행은 다음 페이지 존재 여부 판단용)
+    - SQL_STREAM_RESULTS 면 서버 사이드 커서로 SQL_FETCH_BATCH_SIZE 행씩 가져온다
+    - DB_STATEMENT_TIMEOUT_SECONDS 초과 시 QueryTimeoutError (app/db/query_control)
+    - Decimal→float, date→ISO 변환은 배치의 컬럼마다 타입을 한 번만 판단
+    """
+    batch_size = max(1, settings.SQL_FETCH_BATCH_SIZE)
+    fetch_limit = limit + 1
+    paged_sql = apply_row_limit(sql, fetch_limit, offset)
+
+    def run():
+        exec_sql = paged_sql
+        if db.get_bind().dialect.name == "mysql":
+            exec_sql = add_max_execution_time(exec_sql, int(settings.DB_STATEMENT_TIMEOUT_SECONDS * 1000))
+        stmt = text(exec_sql)
+        if settings.SQL_STREAM_RESULTS:
+            stmt = stmt.execution_options(stream_results=True)
+        # 실행 + fetch 전체에 시간 제한 (초과/요청 취소 시 KILL QUERY)
+        with statement_timeout(db):
+            result = db.execute(stmt, params or {})
+            try:
+                return tuple(result.keys()), _fetch_batches(result, fetch_limit, batch_size)
+            finally:
+                # 서버 사이드 커서는 다 읽거나 닫아야 같은 커넥션을 다시 쓸 수 있다
+                result.close()
+
+    if settings.RESULT_CACHE_ENABLED:
+        cols, rows = result_cache.query(db, paged_sql, params, fetch_limit, run)
+    else:
+        cols, rows = run()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    data: List[List[Any]] = []
+    for start in range(0, len(rows), batch_size):
+        data.extend(_normalize_batch(rows[start:start + batch_size], len(cols)))
+    return ColumnarRows(columns=list(cols), data=data, has_more=has_more)
+
+
+def execute_sql(db: Session, sql: str, limit: int = 200, params: Optional[Dict[str, Any]] = None):
     """
     실제로 SQL을 실행하고, JSON-friendly dict 리스트로 반환.
+    (참조 테이블 버전 기반 결과 캐시를 거친다)
     """
-    result = db.execute(text(sql))
-    rows = result.fetchmany(limit)
-    cols = result.keys()
+    return execute_sql_columnar(db, sql, limit=limit, params=params).to_records()
 
-    json_rows = []
-    for r in rows:
-        row_dict = {}
-        for col, val in zip(cols, r):
-            row_dict[col] = _normalize_value(val)
-        json_rows.append(row_dict)
 
-    return json_rows
+def _execute_guarded(db: Session, sql: str, limit: int) -> ColumnarRows:
+    """
+    EXPLAIN 비용 검사(sql_guard) 후 실행. 같은 DB 스레드에서 이어서 돌려 왕복 대기를 한 번으로.
+    """
+    sql_guard.check_cost(db, apply_row_limit(sql, limit + 1))
+    return execute_sql_columnar(db, sql, limit=limit)
 
 
-async def run_sql_bi(db: Session, req: SQLBIRequest) -> SQLBIResponse:
+async def _execute_with_repair(db: Session, question: str, sql: str, limit: int) -> Tuple[str, ColumnarRows]:
+    """
+    매 시도마다 sql_guard 정적 검사 → EXPLAIN 비용 검사 → 실행.
+    SQL 오류(알 수 없는 컬럼, 문법, 가드레일 거부 등)로 실패하면
+    오류를 SQL 모델에 되돌려 최대 SQL_REPAIR_MAX_ATTEMPTS 번 다시 시도한다.
+    반환: (최종 실행된 SQL, 결과)
+    """
+    failed: List[str] = []
+    repair_started = 0.0
+    while True:
+        try:
+            # 정적 검사 위반(없는 컬럼/테이블 등)도 DB 오류와 같은 방식으로 수정 요청
+            sql_guard.validate(sql)
+            table = await run_in_db(_execute_guarded, db, sql, limit)
+        except Exception as e:
+            error = repairable_error(e)
+            if error is None or len(failed) >= settings.SQL_REPAIR_MAX_ATTEMPTS:
+                if failed:
+                    sql_fix_memo.forget(failed[-1])
+                    repair_stats.on_done(question, len(failed) + 1, (time.perf_counter() - repair_started) * 1000.0, ok=False)
+                raise
+            if not failed:
+                repair_started = time.perf_counter()
+            else:
+                # 메모에서 꺼낸 수정본이 또 실패하면 메모에서 지운다
+                sql_fix_memo.forget(failed[-1])
+            print(f"[sql_bi_service] sql failed (attempt {len(failed) + 1}), repairing: {error}")
+            failed.append(sql)
+            # 실패한 문장 이후 세션 상태 정리 후 재시도
+            await run_in_db(db.rollback)
+            sql = await repair_sql(question, sql, error)
+            continue
+
+        if failed:
+            for bad in failed:
+                sql_fix_memo.set(bad, sql)
+            # 다음에 같은 질문은 처음부터 수정된 SQL 을 쓰도록 SQL 캐시도 교체
+            sql_cache.set(question, select_schema_doc(question), settings.OPENAI_SQL_MODEL, sql)
+            repair_stats.on_done(question, len(failed) + 1, (time.perf_counter() - repair_started) * 1000.0, ok=True)
+        return sql, table
+
+
+async def run_sql_bi(
+    db: Session,
+    req: SQLBIRequest,
+    sql: Optional[str] = None,
+    columnar: bool = False,
+) -> SQLBIResponse:
     """
     라우터에서 호출하는 메인 진입점:
-    - SQL 생성
-    - SQL 실행
+    - SQL 생성 (sql 이 주어지면 생략: 라우터와 동시에 미리 생성한 경우)
+    - SQL 실행 (EXPLAIN 예상 비용이 기준을 넘으면 SQLGuardError)
+      SQL 오류면 오류 메시지로 SQL 을 고쳐 재시도 (SQL_REPAIR_MAX_ATTEMPTS)
     - 결과를 스키마에 맞춰 래핑
+      (columnar=True 면 rows 대신 columns/data 를 채운다)
     """
-    sql = await generate_sql(req.question)
-    rows = execute_sql(db, sql)
+    if sql is None:
+        sql = await generate_sql(req.question)
+    # 동기 Session.execute 는 DB 스레드풀에서 실행 (이벤트 루프 블로킹 방지)
+    page_size = min(settings.SQL_PAGE_SIZE, settings.SQL_MAX_RESULT_ROWS)
+    sql, table = await _execute_with_repair(db, req.question, sql, page_size)
+
+    # 뒤에 행이 더 있으면 GET /ask/{query_id}/rows 로 이어 받을 수 있게 핸들 등록
+    query_id = next_cursor = None
+    if table.has_more and len(table) < settings.SQL_MAX_RESULT_ROWS:
+        query_id = query_pages.register(sql)
+        next_cursor = encode_cursor(query_id, len(table))
 
-    return SQLBIResponse(
+    # 값은 이미 정규화되어 있으므로 행 단위 pydantic 검증은 생략 (model_construct)
+    if columnar:
+        return SQLBIResponse.model_construct(
+            question=req.question,
+            sql=sql,
+            rows=None,
+            row_count=len(table),
+            columns=table.columns,
+            data=table.data,
+            query_id=query_id,
+            next_cursor=next_cursor,
+        )
+    rows = table.to_records()
+    return SQLBIResponse.model_construct(
         question=req.question,
         sql=sql,
         rows=rows,
         row_count=len(rows),
+        columns=None,
+        data=None,
+        query_id=query_id,
+        next_cursor=next_cursor,
     )
+
+
+async def fetch_result_page(
+    db: Session,
+    query_id: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[ColumnarRows, int, Optional[str]]:
+    """
+    등록된 쿼리의 다음 페이지 조회. 반환: (rows, offset, next_cursor)
+    - 핸들이 없거나 만료: LookupError / 잘못된 cursor: ValueError
+    """
+    handle = query_pages.get(query_id)
+    if handle is None:
+        raise LookupError("query_id 가 없거나 만료되었습니다. 질문을 다시 실행해 주세요.")
+    offset = decode_cursor(query_id, cursor)
+
+    limit = max(1, min(limit or settings.SQL_PAGE_SIZE, settings.SQL_MAX_PAGE_SIZE))
+    remaining = settings.SQL_MAX_RESULT_ROWS - offset
+    if remaining <= 0:
+        return ColumnarRows(columns=[], data=[]), offset, None
+    limit = min(limit, remaining)
+
+    table = await run_in_db(execute_sql_columnar, db, handle.sql, limit=limit, params=handle.params, offset=offset)
+    next_offset = offset + len(table)
+    next_cursor = None
+    if table.has_more and next_offset < settings.SQL_MAX_RESULT_ROWS:
+        next_cursor = encode_cursor(query_id, next_offset)
+    return table, offset, next_cursor
@@ -0,0 +1,436 @@
+# app/services/sql_cache.py
+"""
+자연어 질문 → 생성 SQL 캐시.
+
+- 같은 질문("플랜트별 재고금액 상위 10개")이 하루에도 수십 번 들어오므로,
+  정규화된 질문 + 스키마 문서 해시 + 모델명을 키로 생성 SQL을 저장해 두고
+  히트 시 SQL LLM 호출을 건너뛴다.
+- 백엔드: memory(LRU + TTL, 기본) / sqlite(파일) / redis(redis 패키지 필요) / none
+- 스키마 문서가 바뀌면 해시가 달라져 자동으로 미스가 나고,
+  invalidate_sql_cache() 로 명시적으로 비울 수도 있다.
+- (선택) 의미 유사도 조회: 정확히 같은 키가 없으면 schema_index 의 로컬 임베딩 모델
+  (SQL_SCHEMA_EMBEDDING_MODEL)로 이 프로세스가 저장한 질문들과 비교해
+  SQL_CACHE_SEMANTIC_THRESHOLD 이상이고 숫자 값이 모두 같은 질문의 SQL 을 쓴다.
+  ("재고금액 상위 10개 플랜트" ≈ "플랜트별 재고금액 top 10", 상위 5개 ≠ 상위 10개)
+"""
+
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+# ---------------------------------------------------------
+# 질문 정규화
+# ---------------------------------------------------------
+_PUNCT_RE = re.compile(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+# 콤마는 진짜 천단위 묶음(1,000 / 12,345,678)일 때만 숫자의 일부로 본다 ("1,2" 는 1 과 2)
+_NUMBER_RE = re.compile(r"\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?|(?<![\w.])\.\d+")
+
+
+def _normalize_number(match: "re.Match[str]") -> str:
+    # "1,000" → "1000", "10.0" → "10", "3.50" → "3.5", "007" → "7", "0.5"/".5" → "0.5"
+    raw = match.group(0).replace(",", "")
+    whole, _, frac = raw.partition(".")
+    whole = whole.lstrip("0") or "0"
+    frac = frac.rstrip("0")
+    return f"{whole}.{frac}" if frac else whole
+
+
+def normalize_question(question: str) -> str:
+    """
+    캐시 키용 질문 정규화.
+    - 전각/반각 통일(NFKC) + 소문자
+    - 숫자 표기 통일 (천단위 콤마, 소수점 뒤 0 제거)
+    - 문장부호 제거, 공백 1칸으로 축약
+    숫자 값 자체는 유지한다 (상위 5개 ≠ 상위 10개).
+    """
+    q = unicodedata.normalize("NFKC", question or "").lower()
+    q = _NUMBER_RE.sub(_normalize_number, q)
+    q = _PUNCT_RE.sub(" ", q)
+    return _SPACE_RE.sub(" ", q).strip()
+
+
+def schema_hash(schema_doc: str) -> str:
+    return hashlib.sha1((schema_doc or "").encode("utf-8")).hexdigest()[:16]
+
+
+def make_cache_key(question: str, schema_doc: str, model: str) -> str:
+    raw = f"{normalize_question(question)}\x1f{schema_hash(schema_doc)}\x1f{model}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+_NORMALIZED_NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def question_numbers(normalized: str) -> Tuple[str, ...]:
+    # 의미 유사 조회는 숫자 값(상위 N개, 날짜, 금액)이 모두 같은 질문끼리만
+    return tuple(_NORMALIZED_NUMBER_RE.findall(normalized))
+
+
+# ---------------------------------------------------------
+# 백엔드
+# ---------------------------------------------------------
+class CacheBackend(ABC):
+    """
+    캐시 저장소 인터페이스. 값은 str(SQL)만 저장한다.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]: ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float]) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+    @abstractmethod
+    def size(self) -> int: ...
+
+
+class NullBackend(CacheBackend):
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        return None
+
+    def clear(self) -> None:
+        return None
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryLRUBackend(CacheBackend):
+    """
+    프로세스 내 LRU + TTL 캐시 (스레드 안전).
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Tuple[str, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+class SQLiteBackend(CacheBackend):
+    """
+    로컬 파일(SQLite) 캐시. 서버 재시작 후에도 유지된다.
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sql_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " expires_at REAL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM sql_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at = row
+            if expires_at is not None and expires_at < now:
+                self._conn.execute("DELETE FROM sql_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE sql_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return value
+
+    def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sql_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, expires_at, now),
+            )
+            # LRU: 오래 안 쓴 항목부터 정리
+            self._conn.execute(
+                "DELETE FROM sql_cache WHERE key IN ("
+                " SELECT key FROM sql_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sql_cache")
+            self._conn.commit()
+
+    def size(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM sql_cache").fetchone()[0])
+
+
+class RedisBackend(CacheBackend):
+    """
+    Redis(호환) 서버 캐시. 여러 워커/서버가 캐시를 공유할 때 사용. (redis 패키지 필요)
+    size() 는 키 전체 SCAN 이라 size_ttl 초 동안은 마지막 값을 돌려준다 (/metrics 폴링마다 SCAN 하지 않게).
+    """
+
+    def __init__(self, url: str, prefix: str = "textbi:sql_cache:", size_ttl: float = 60.0):
+        import redis  # 선택 의존성
+
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self.size_ttl = size_ttl
+        self._size: Optional[int] = None
+        self._size_at = 0.0
+
+    def get(self, key: str) -> Optional[str]:
+        return self._redis.get(self.prefix + key)
+
+    def set(self, key: str, value: str, ttl: Optional[float]) -> None:
+        self._redis.set(self.prefix + key, value, ex=int(ttl) if ttl else None)
+
+    def clear(self) -> None:
+        keys = list(self._redis.scan_iter(match=self.prefix + "*"))
+        if keys:
+            self._redis.delete(*keys)
+        self._size = None
+
+    def size(self) -> int:
+        now = time.monotonic()
+        if self._size is None or now - self._size_at >= self.size_ttl:
+            self._size = sum(1 for _ in self._redis.scan_iter(match=self.prefix + "*", count=1000))
+            self._size_at = now
+        return self._size
+
+
+def _build_backend() -> CacheBackend:
+    kind = (settings.SQL_CACHE_BACKEND or "memory").lower()
+    if kind == "none":
+        return NullBackend()
+    if kind == "sqlite":
+        return SQLiteBackend(settings.SQL_CACHE_SQLITE_PATH, settings.SQL_CACHE_MAX_ENTRIES)
+    if kind == "redis":
+        try:
+            return RedisBackend(settings.SQL_CACHE_REDIS_URL)
+        except ImportError:
+            print("[sql_cache] redis 패키지가 없어 memory 백엔드를 사용합니다.")
+    return MemoryLRUBackend(settings.SQL_CACHE_MAX_ENTRIES)
+
+
+# ---------------------------------------------------------
+# (선택) 의미 유사도 인덱스
+# ---------------------------------------------------------
+def _default_embedder():
+    # schema_index 가 이 모듈을 import 하므로 지연 import (모델도 schema_index 와 같이 한 번만 로드)
+    from app.services.schema_index import get_embedder
+    return get_embedder()
+
+
+class SemanticIndex:
+    """
+    캐시 키 → (스키마 해시, 모델, 숫자 값, 정규화 질문 임베딩). 프로세스 내 LRU.
+    (sqlite/redis 백엔드여도 이 프로세스가 저장한 질문만 유사도 대상)
+    """
+
+    def __init__(self, embedder=None, threshold: float = 0.93, max_entries: int = 1000):
+        self._embedder = embedder
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[str, str, Tuple[str, ...], Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _encode(self, normalized: str):
+        embedder = self._embedder if self._embedder is not None else _default_embedder()
+        if embedder is None:
+            return None
+        return embedder.encode([normalized], normalize_embeddings=True)[0]
+
+    def add(self, key: str, question: str, schema_doc: str, model: str) -> None:
+        normalized = normalize_question(question)
+        vec = self._encode(normalized)
+        if vec is None:
+            return
+        with self._lock:
+            self._entries[key] = (schema_hash(schema_doc), model, question_numbers(normalized), vec)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def nearest(self, question: str, schema_doc: str, model: str) -> Optional[Tuple[str, float]]:
+        """
+        같은 스키마/모델/숫자 값인 저장 질문 중 가장 비슷한 것의 (캐시 키, 유사도). threshold 미만이면 None
+        """
+        with self._lock:
+            if not self._entries:
+                return None
+        normalized = normalize_question(question)
+        vec = self._encode(normalized)
+        if vec is None:
+            return None
+        doc_hash, numbers = schema_hash(schema_doc), question_numbers(normalized)
+        with self._lock:
+            candidates: List[Tuple[str, Any]] = [
+                (key, v) for key, (h, m, nums, v) in self._entries.items()
+                if h == doc_hash and m == model and nums == numbers
+            ]
+        if not candidates:
+            return None
+        sims = np.stack([v for _, v in candidates]) @ np.asarray(vec)
+        best = int(np.argmax(sims))
+        if float(sims[best]) < self.threshold:
+            return None
+        return candidates[best][0], float(sims[best])
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _build_semantic_index() -> Optional[SemanticIndex]:
+    if not (settings.SQL_CACHE_SEMANTIC_ENABLED and settings.SQL_SCHEMA_EMBEDDING_MODEL):
+        return None
+    return SemanticIndex(
+        threshold=settings.SQL_CACHE_SEMANTIC_THRESHOLD,
+        max_entries=settings.SQL_CACHE_MAX_ENTRIES,
+    )
+
+
+# ---------------------------------------------------------
+# 캐시 본체
+# ---------------------------------------------------------
+class SQLCache:
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        ttl: Optional[float] = None,
+        semantic: Optional[SemanticIndex] = None,
+    ):
+        self.backend = backend or _build_backend()
+        self.ttl = ttl if ttl is not None else settings.SQL_CACHE_TTL_SECONDS
+        self.semantic = semantic
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, question: str, schema_doc: str, model: str) -> Optional[str]:
+        value = self.backend.get(make_cache_key(question, schema_doc, model))
+        semantic_hit = False
+        if value is None and self.semantic is not None:
+            found = self.semantic.nearest(question, schema_doc, model)
+            if found is not None:
+                key, sim = found
+                value = self.backend.get(key)
+                if value is None:
+                    # 백엔드에서 만료/축출된 항목
+                    self.semantic.discard(key)
+                else:
+                    semantic_hit = True
+                    print(f"[sql_cache] semantic hit (sim={sim:.3f}): {question}")
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if semantic_hit:
+                    self.semantic_hits += 1
+        return value
+
+    def set(self, question: str, schema_doc: str, model: str, sql: str) -> None:
+        key = make_cache_key(question, schema_doc, model)
+        self.backend.set(key, sql, self.ttl)
+        if self.semantic is not None:
+            self.semantic.add(key, question, schema_doc, model)
+
+    def invalidate(self) -> None:
+        """
+        전체 캐시 삭제 (스키마 문서/프롬프트 변경 시 호출).
+        """
+        self.backend.clear()
+        if self.semantic is not None:
+            self.semantic.clear()
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        size = self.backend.size()  # 백엔드 I/O 는 카운터 락 밖에서
+        semantic_size = len(self.semantic) if self.semantic is not None else 0
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__,
+                "size": size,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "invalidations": self.invalidations,
+                "semantic_enabled": self.semantic is not None,
+                "semantic_size": semantic_size,
+            }
+
+
+sql_cache = SQLCache(semantic=_build_semantic_index())
+
+
+def invalidate_sql_cache() -> None:
+    sql_cache.invalidate()
+
+
+def get_sql_cache_stats() -> Dict[str, Any]:
+    return sql_cache.stats()
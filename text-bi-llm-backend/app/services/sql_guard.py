@@ -0,0 +1,403 @@
+# app/services/sql_guard.py
+"""
+LLM 이 만든 SQL 의 실행 전 검사 (가드레일 + EXPLAIN 비용 추정).
+
+1) validate_sql: 정적 검사 (DB 조회 없음)
+   - 단일 문장, 읽기 전용(SELECT / WITH ... SELECT)만 허용
+   - INTO OUTFILE, FOR UPDATE/SHARE, SLEEP() 같은 위험 구문 차단
+   - sqlglot(requirements.txt)으로 파싱해서 테이블/컬럼을 스키마 카탈로그와 대조
+     (sqlglot 을 못 불러오면 FROM/JOIN 정규식으로 테이블만 대조)
+2) apply_row_limit: DB 가 필요한 행 수 이상 만들지 않도록 LIMIT 주입
+   add_max_execution_time: MySQL 실행 시간 제한 힌트 주입 (app/db/query_control 과 같이 사용)
+3) SQLGuard.check_cost: MySQL EXPLAIN 으로 예상 검사 행 수를 보고
+   큰 테이블 풀스캔 / 조인 폭증이 예상되면 실행 전에 거부한다.
+   (리포팅 DB 를 질문 하나가 붙잡는 것을 막기 위한 처리량 보호용)
+   같은 SQL 의 판정은 SQL_GUARD_EXPLAIN_CACHE_SECONDS 동안 재사용.
+
+거부 시 SQLGuardError(ValueError) 를 던지며, 메시지는 SQL 재생성 프롬프트에 그대로 쓸 수 있게 쓴다.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.query_control import statement_timeout
+from app.services.result_cache import canonicalize_sql, extract_tables
+from app.services.schema_catalog import schema_catalog
+
+settings = get_settings()
+
+
+class SQLGuardError(ValueError):
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+# ---------------------------------------------------------
+# SQL 마스킹 / LIMIT 주입
+# ---------------------------------------------------------
+_LITERAL_OR_COMMENT_RE = re.compile(
+    r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"|`[^`]*`|--[^\n]*|#[^\n]*|/\*.*?\*/",
+    re.S,
+)
+_TRAILING_LIMIT_RE = re.compile(
+    r"\bLIMIT\s+(\d+)(?:\s*,\s*(\d+)|\s+OFFSET\s+(\d+))?\s*$",
+    re.IGNORECASE,
+)
+
+
+def mask_sql(sql: str, keep_nested: bool = False) -> str:
+    """
+    문자열 리터럴/식별자/주석(과 keep_nested=False 면 괄호 안쪽)을 공백으로 가린 같은 길이의 문자열
+    """
+    masked = _LITERAL_OR_COMMENT_RE.sub(lambda m: " " * len(m.group(0)), sql)
+    if keep_nested:
+        return masked
+    out, depth = [], 0
+    for ch in masked:
+        if ch == "(":
+            depth += 1
+            out.append(" ")
+        elif ch == ")":
+            depth = max(0, depth - 1)
+            out.append(" ")
+        else:
+            out.append(" " if depth else ch)
+    return "".join(out)
+
+
+def apply_row_limit(sql: str, limit: int, offset: int = 0) -> str:
+    """
+    DB 가 limit 행(offset 부터) 이상 만들지 않도록 SQL 에 LIMIT 을 붙인다.
+    - 최상위 LIMIT 이 없으면 끝에 LIMIT/OFFSET 추가
+    - 끝에 LIMIT n [OFFSET m] 이 있으면 그 범위 안에서 좁힌다
+    - 그 밖의 최상위 LIMIT (바인드 파라미터 등) 은 서브쿼리로 감싼다
+    """
+    sql = sql.rstrip()
+    masked = mask_sql(sql)
+    if not re.search(r"\bLIMIT\b", masked, re.IGNORECASE):
+        return f"{sql}\nLIMIT {limit}" + (f" OFFSET {offset}" if offset else "")
+
+    m = _TRAILING_LIMIT_RE.search(masked)
+    if m is not None:
+        if m.group(2) is not None:       # LIMIT offset, count
+            base_offset, count = int(m.group(1)), int(m.group(2))
+        else:                            # LIMIT count [OFFSET offset]
+            base_offset, count = int(m.group(3) or 0), int(m.group(1))
+        new_count = max(0, min(limit, count - offset))
+        new_offset = base_offset + offset
+        return f"{sql[:m.start()]}LIMIT {new_count}" + (f" OFFSET {new_offset}" if new_offset else "")
+
+    return f"SELECT * FROM (\n{sql}\n) AS _paged\nLIMIT {limit}" + (f" OFFSET {offset}" if offset else "")
+
+
+def add_max_execution_time(sql: str, timeout_ms: int) -> str:
+    """
+    최상위 SELECT 에 MySQL MAX_EXECUTION_TIME 옵티마이저 힌트를 붙인다.
+    (WITH ... SELECT 는 본문 SELECT 에, 최상위가 괄호 UNION 이면 붙이지 않음 → KILL QUERY 로 대응)
+    """
+    if timeout_ms <= 0 or "MAX_EXECUTION_TIME" in sql.upper():
+        return sql
+    m = re.search(r"\bSELECT\b", mask_sql(sql), re.IGNORECASE)
+    if m is None:
+        return sql
+    return f"{sql[:m.end()]} /*+ MAX_EXECUTION_TIME({int(timeout_ms)}) */{sql[m.end():]}"
+
+
+# ---------------------------------------------------------
+# 1) 정적 검사
+# ---------------------------------------------------------
+_FORBIDDEN_RE = re.compile(
+    # REPLACE()/SET(문자셋) 은 SELECT 안에서도 쓰이므로 제외 (문장 시작은 SELECT/WITH 로 따로 검사)
+    r"\b(INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE|RENAME|GRANT|REVOKE|"
+    r"CALL|HANDLER|LOAD|UNLOCK|KILL|INTO|OUTFILE|DUMPFILE)\b"
+    r"|\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b"
+    r"|\b(SLEEP|BENCHMARK|GET_LOCK|RELEASE_LOCK|LOAD_FILE)\s*\(",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class SQLCheck:
+    tables: List[str] = field(default_factory=list)
+    columns_checked: bool = False
+
+
+def _load_sqlglot():
+    try:
+        import sqlglot  # requirements.txt 에 있지만, 없는 환경에서는 정규식 검사로 동작
+        from sqlglot import exp
+    except ImportError:
+        return None, None
+    return sqlglot, exp
+
+
+def _catalog_columns() -> Dict[str, Set[str]]:
+    # 실제 DB 카탈로그가 있을 때만 대조 (정적 문서의 테이블명은 실제와 다를 수 있음)
+    return {
+        name.lower(): {c.name.lower() for c in info.columns}
+        for name, info in schema_catalog.tables.items()
+    }
+
+
+def _check_with_sqlglot(sql: str, known: Dict[str, Set[str]]) -> SQLCheck:
+    sqlglot, exp = _load_sqlglot()
+    try:
+        statements = [s for s in sqlglot.parse(sql, read="mysql") if s is not None]
+    except sqlglot.errors.ParseError as e:
+        raise SQLGuardError(f"SQL 구문을 해석할 수 없습니다: {str(e).splitlines()[0]}", "parse_error")
+    if len(statements) != 1:
+        raise SQLGuardError("SQL 은 한 문장이어야 합니다.", "multi_statement")
+    tree = statements[0]
+
+    readonly = tuple(
+        t for t in (getattr(exp, n, None) for n in ("Select", "Union", "Intersect", "Except", "SetOperation"))
+        if t
+    )
+    if not isinstance(tree, readonly):
+        raise SQLGuardError("SELECT 조회 쿼리만 허용됩니다.", "not_select")
+    write_nodes = tuple(
+        t for t in (getattr(exp, n, None) for n in ("Insert", "Update", "Delete", "Drop", "Create", "Alter", "Command"))
+        if t
+    )
+    if write_nodes and any(True for _ in tree.find_all(*write_nodes)):
+        raise SQLGuardError("데이터/스키마를 변경하는 구문은 허용되지 않습니다.", "not_select")
+
+    cte_names = {cte.alias_or_name.lower() for cte in tree.find_all(exp.CTE)}
+    tables: List[str] = []
+    alias_to_table: Dict[str, str] = {}
+    for table in tree.find_all(exp.Table):
+        name = table.name
+        if not name or name.lower() in cte_names:
+            continue
+        if name not in tables:
+            tables.append(name)
+        alias_to_table[(table.alias_or_name or name).lower()] = name.lower()
+
+    check = SQLCheck(tables=tables)
+    if not known:
+        return check
+    unknown = [t for t in tables if t.lower() not in known]
+    if unknown:
+        raise SQLGuardError(f"존재하지 않는 테이블입니다: {', '.join(unknown)}", "unknown_table")
+
+    # 컬럼 대조: CTE/서브쿼리 컬럼은 추적하지 않으므로 실제 테이블만 참조하는 쿼리에서만 검사
+    if not settings.SQL_GUARD_VERIFY_COLUMNS or cte_names or any(True for _ in tree.find_all(exp.Subquery)):
+        return check
+    aliases = {a.alias.lower() for a in tree.find_all(exp.Alias) if a.alias}
+    available = set().union(*(known[t.lower()] for t in tables)) if tables else set()
+    bad: List[str] = []
+    for col in tree.find_all(exp.Column):
+        name = col.name.lower()
+        if not name or name == "*":
+            continue
+        qualifier = (col.table or "").lower()
+        if qualifier:
+            table_name = alias_to_table.get(qualifier)
+            if table_name is not None and name not in known.get(table_name, set()):
+                bad.append(f"{col.table}.{col.name}")
+        elif name not in available and name not in aliases:
+            bad.append(col.name)
+    if bad:
+        raise SQLGuardError(
+            f"존재하지 않는 컬럼입니다: {', '.join(dict.fromkeys(bad))}",
+            "unknown_column",
+        )
+    check.columns_checked = True
+    return check
+
+
+def validate_sql(sql: str) -> SQLCheck:
+    """
+    실행 전 정적 검사. 통과 못 하면 SQLGuardError.
+    """
+    sql = (sql or "").strip()
+    if not sql:
+        raise SQLGuardError("빈 SQL 입니다.", "empty")
+    masked = mask_sql(sql, keep_nested=True)
+    if ";" in masked:
+        raise SQLGuardError("Semicolons are forbidden in the SQL query.", "multi_statement")
+    head = re.match(r"[\s(]*(\w*)", masked).group(1).upper()
+    if head not in ("SELECT", "WITH"):
+        raise SQLGuardError("Only SELECT queries are allowed.", "not_select")
+    m = _FORBIDDEN_RE.search(masked)
+    if m:
+        raise SQLGuardError(f"허용되지 않는 구문입니다: {m.group(0).strip()}", "forbidden")
+
+    if not settings.SQL_GUARD_ENABLED:
+        return SQLCheck(tables=extract_tables(sql))
+
+    known = _catalog_columns()
+    sqlglot, _ = _load_sqlglot()
+    if sqlglot is not None:
+        return _check_with_sqlglot(sql, known)
+
+    tables = extract_tables(sql)
+    if known:
+        unknown = [t for t in tables if t.lower() not in known]
+        if unknown:
+            raise SQLGuardError(f"존재하지 않는 테이블입니다: {', '.join(unknown)}", "unknown_table")
+    return SQLCheck(tables=tables)
+
+
+# ---------------------------------------------------------
+# 2) EXPLAIN 비용 추정
+# ---------------------------------------------------------
+@dataclass
+class CostEstimate:
+    examined_rows: int
+    full_scans: List[Tuple[str, int]]
+    plan: List[Dict[str, Any]]
+
+
+def _explain(db: Session, sql: str) -> CostEstimate:
+    # EXPLAIN 도 (파생 테이블 materialize 등으로) 오래 걸릴 수 있으므로 같은 시간 제한 아래에서
+    with statement_timeout(db):
+        result = db.execute(text(f"EXPLAIN {sql}"))
+        keys = [k.lower() for k in result.keys()]
+        plan = [dict(zip(keys, row)) for row in result.fetchall()]
+
+    # 같은 SELECT id 안의 테이블은 nested-loop 조인 → 행 수 곱(상한 추정), SELECT 끼리는 합
+    per_select: Dict[Any, int] = {}
+    full_scans: List[Tuple[str, int]] = []
+    for row in plan:
+        rows = int(row.get("rows") or 0)
+        sid = row.get("id")
+        per_select[sid] = per_select.get(sid, 1) * max(1, rows)
+        if str(row.get("type") or "").upper() == "ALL":
+            full_scans.append((str(row.get("table")), rows))
+    return CostEstimate(examined_rows=sum(per_select.values()), full_scans=full_scans, plan=plan)
+
+
+_AGGREGATE_RE = re.compile(
+    r"\bGROUP\s+BY\b|\bDISTINCT\b|\b(COUNT|SUM|AVG|MIN|MAX|GROUP_CONCAT|STD|STDDEV\w*|VAR\w*|BIT_\w+|JSON_\w*AGG)\s*\(",
+    re.IGNORECASE,
+)
+
+
+def _stops_early(sql: str, plan: List[Dict[str, Any]]) -> bool:
+    """
+    풀스캔이어도 LIMIT 에서 바로 멈추는 경우만 True:
+    단일 테이블 + Extra 가 비어 있음(WHERE 필터/정렬/임시테이블 없음) + 집계/GROUP BY/DISTINCT 없음 + 최상위 LIMIT.
+    (WHERE 가 있으면 조건에 맞는 행이 드물수록 끝까지 읽게 되므로 제외)
+    """
+    if len(plan) != 1 or str(plan[0].get("extra") or "").strip():
+        return False
+    if _AGGREGATE_RE.search(mask_sql(sql, keep_nested=True)):
+        return False
+    return re.search(r"\bLIMIT\b", mask_sql(sql), re.IGNORECASE) is not None
+
+
+class SQLGuard:
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._verdicts: "OrderedDict[str, Tuple[float, Optional[str], Optional[str], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.explains = 0
+        self.explain_cache_hits = 0
+        self.explain_ms_total = 0.0
+        self.rejected: Dict[str, int] = {}
+
+    def record_rejection(self, reason: str) -> None:
+        with self._lock:
+            self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+    def validate(self, sql: str) -> SQLCheck:
+        with self._lock:
+            self.checked += 1
+        try:
+            return validate_sql(sql)
+        except SQLGuardError as e:
+            self.record_rejection(e.reason)
+            raise
+
+    def check_cost(self, db: Session, sql: str) -> Optional[int]:
+        """
+        EXPLAIN 으로 예상 검사 행 수를 확인. 기준 초과면 SQLGuardError. 반환: 예상 검사 행 수
+        (MySQL 이 아니거나 꺼져 있으면 None)
+        - 큰 테이블(SQL_GUARD_MAX_SCAN_ROWS 초과) type=ALL → full_scan (_stops_early 인 경우만 예외)
+        - 전체 예상 검사 행 수 SQL_GUARD_MAX_EXAMINED_ROWS 초과 → too_many_rows
+        """
+        if not (settings.SQL_GUARD_ENABLED and settings.SQL_GUARD_EXPLAIN_ENABLED):
+            return None
+        if db.get_bind().dialect.name != "mysql":
+            return None
+
+        key = canonicalize_sql(sql)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._verdicts.get(key)
+            if cached is not None and now - cached[0] < settings.SQL_GUARD_EXPLAIN_CACHE_SECONDS:
+                self._verdicts.move_to_end(key)
+                self.explain_cache_hits += 1
+                _, message, reason, examined = cached
+                if message is not None:
+                    self.rejected[reason] = self.rejected.get(reason, 0) + 1
+                    raise SQLGuardError(message, reason)
+                return examined
+
+        started = time.perf_counter()
+        estimate = _explain(db, sql)
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+
+        message = reason = None
+        huge = [
+            (t, rows) for t, rows in estimate.full_scans
+            if rows > settings.SQL_GUARD_MAX_SCAN_ROWS
+        ]
+        if huge and not _stops_early(sql, estimate.plan):
+            reason = "full_scan"
+            message = (
+                "큰 테이블 전체 스캔이 예상되어 실행하지 않았습니다: "
+                + ", ".join(f"{t}(약 {rows:,}행)" for t, rows in huge)
+                + ". 인덱스 컬럼(날짜/플랜트 등) 조건을 추가해 주세요."
+            )
+        elif estimate.examined_rows > settings.SQL_GUARD_MAX_EXAMINED_ROWS:
+            reason = "too_many_rows"
+            message = (
+                f"예상 검사 행 수(약 {estimate.examined_rows:,}행)가 너무 많아 실행하지 않았습니다. "
+                "조건을 좁히거나 조인을 줄여 주세요."
+            )
+
+        with self._lock:
+            self.explains += 1
+            self.explain_ms_total += elapsed_ms
+            self._verdicts[key] = (now, message, reason, estimate.examined_rows)
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.max_entries:
+                self._verdicts.popitem(last=False)
+            if reason is not None:
+                self.rejected[reason] = self.rejected.get(reason, 0) + 1
+
+        if message is not None:
+            print(f"[sql_guard] rejected ({reason}): {message}")
+            raise SQLGuardError(message, reason)
+        return estimate.examined_rows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": settings.SQL_GUARD_ENABLED,
+                "parser": "sqlglot" if _load_sqlglot()[0] is not None else "regex",
+                "checked": self.checked,
+                "explains": self.explains,
+                "explain_cache_hits": self.explain_cache_hits,
+                "explain_avg_ms": round(self.explain_ms_total / self.explains, 2) if self.explains else 0.0,
+                "rejected": dict(self.rejected),
+            }
+
+
+sql_guard = SQLGuard()
+
+
+def get_sql_guard_stats() -> Dict[str, Any]:
+    return sql_guard.stats()
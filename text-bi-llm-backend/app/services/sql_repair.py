@@ -0,0 +1,178 @@
+# app/services/sql_repair.py
+"""
+생성 SQL 자동 수정(repair) 루프의 보조 모듈.
+
+- MySQL 이 생성 SQL 을 거부하면(알 수 없는 컬럼, 한글 컬럼 백틱 누락, 문법 오류 ...)
+  sql_bi_service.run_sql_bi 가 DB 오류 메시지를 SQL 모델에 되돌려 최대
+  SQL_REPAIR_MAX_ATTEMPTS 번 다시 생성시킨다.
+- 여기서는
+  1) 어떤 오류가 SQL 수정으로 해결 가능한지 판별 (repairable_error)
+  2) (실패 SQL → 수정 SQL) 메모: 같은 실수는 LLM 없이 바로 고친다.
+     키에 전체 스키마 문서 해시를 넣어 스키마가 바뀌면 자연히 무효화
+  3) 질문별 시도 횟수/수정에 쓴 시간 지표
+  를 담당한다.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy.exc import DBAPIError
+
+from app.core.config import get_settings
+from app.services.result_cache import canonicalize_sql
+from app.services.schema_index import get_schema_doc
+from app.services.sql_cache import schema_hash
+from app.services.sql_guard import SQLGuardError
+
+settings = get_settings()
+
+# SQL 을 고치면 해결되는 MySQL 오류 코드
+REPAIRABLE_MYSQL_CODES = {
+    1052,  # Column is ambiguous
+    1054,  # Unknown column
+    1055,  # only_full_group_by
+    1056,  # Can't group on
+    1060,  # Duplicate column name
+    1064,  # Syntax error
+    1111,  # Invalid use of group function
+    1140,  # Mixing of GROUP columns without GROUP BY
+    1146,  # Table doesn't exist
+    1241,  # Operand should contain N column(s)
+    1242,  # Subquery returns more than 1 row
+    1248,  # Every derived table must have its own alias
+    1305,  # FUNCTION does not exist
+    1582,  # Incorrect parameter count in the call to native function
+    1630,  # FUNCTION does not exist (공백 포함)
+    3065,  # ORDER BY clause is not in SELECT list (DISTINCT)
+}
+
+# 드라이버 오류 코드가 없을 때(sqlite 등) 메시지로 판별
+_REPAIRABLE_HINTS = ("no such column", "no such table", "syntax error", "ambiguous column", "misuse of aggregate")
+
+
+def repairable_error(error: BaseException) -> Optional[str]:
+    """
+    SQL 수정으로 해결 가능한 오류면 모델에 전달할 오류 메시지, 아니면 None
+    (타임아웃/연결 오류/권한 오류 등은 다시 생성해도 소용없으므로 None)
+    """
+    if isinstance(error, SQLGuardError):
+        return str(error)
+    if not isinstance(error, DBAPIError) or error.connection_invalidated:
+        return None
+    orig = error.orig
+    args = getattr(orig, "args", None) or ()
+    if args and isinstance(args[0], int):
+        if args[0] not in REPAIRABLE_MYSQL_CODES:
+            return None
+        return f"({args[0]}) {args[1] if len(args) > 1 else orig}"
+    message = str(orig)
+    return message if any(h in message.lower() for h in _REPAIRABLE_HINTS) else None
+
+
+class SQLFixMemo:
+    """
+    (실패 SQL, 스키마 해시) → 수정 SQL. 메모리 LRU.
+    """
+
+    def __init__(self, max_entries: int = 500):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(failed_sql: str) -> str:
+        return f"{schema_hash(get_schema_doc())}:{canonicalize_sql(failed_sql)}"
+
+    def get(self, failed_sql: str) -> Optional[str]:
+        key = self._key(failed_sql)
+        with self._lock:
+            fixed = self._entries.get(key)
+            if fixed is not None:
+                self._entries.move_to_end(key)
+            return fixed
+
+    def set(self, failed_sql: str, fixed_sql: str) -> None:
+        key = self._key(failed_sql)
+        with self._lock:
+            self._entries[key] = fixed_sql
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, failed_sql: str) -> None:
+        with self._lock:
+            self._entries.pop(self._key(failed_sql), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _RepairStats:
+    """
+    - questions_repaired: 수정 루프에 들어간 질문 수 / ok·failed: 최종 성공·실패
+    - memo_fixes / llm_fixes: 메모로 고친 횟수 / LLM 을 다시 부른 횟수
+    - repair_ms: 첫 실패 ~ 최종 결과까지 걸린 시간 (수정 LLM + 재실행)
+    - recent: 최근 질문별 {question, attempts, repair_ms, ok}
+    """
+
+    def __init__(self, recent: int = 50):
+        self._lock = threading.Lock()
+        self.questions_repaired = 0
+        self.ok = 0
+        self.failed = 0
+        self.memo_fixes = 0
+        self.llm_fixes = 0
+        self.repair_ms_total = 0.0
+        self.repair_ms_max = 0.0
+        self.recent: Deque[Dict[str, Any]] = deque(maxlen=recent)
+
+    def on_fix(self, from_memo: bool) -> None:
+        with self._lock:
+            if from_memo:
+                self.memo_fixes += 1
+            else:
+                self.llm_fixes += 1
+
+    def on_done(self, question: str, attempts: int, repair_ms: float, ok: bool) -> None:
+        with self._lock:
+            self.questions_repaired += 1
+            if ok:
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.repair_ms_total += repair_ms
+            self.repair_ms_max = max(self.repair_ms_max, repair_ms)
+            self.recent.append({
+                "question": question,
+                "attempts": attempts,
+                "repair_ms": round(repair_ms, 2),
+                "ok": ok,
+                "at": time.time(),
+            })
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            n = self.questions_repaired
+            return {
+                "max_attempts": settings.SQL_REPAIR_MAX_ATTEMPTS,
+                "questions_repaired": n,
+                "ok": self.ok,
+                "failed": self.failed,
+                "memo_fixes": self.memo_fixes,
+                "llm_fixes": self.llm_fixes,
+                "memo_size": len(sql_fix_memo),
+                "repair_avg_ms": round(self.repair_ms_total / n, 2) if n else 0.0,
+                "repair_max_ms": round(self.repair_ms_max, 2),
+                "recent": list(self.recent),
+            }
+
+
+sql_fix_memo = SQLFixMemo(max_entries=settings.SQL_REPAIR_MEMO_MAX_ENTRIES)
+repair_stats = _RepairStats()
+
+
+def get_sql_repair_stats() -> Dict[str, Any]:
+    return repair_stats.snapshot()
@@ -55,13 +55,8 @@ def debug_po(date_str: str):
     df_bom["단위량"] = pd.to_numeric(df_bom["단위량"], errors="coerce").fillna(1)
     df_bom["단위"] = df_bom["단위"].astype(str).str.strip()
 
-    current_top = None
-    top_list = []
-    for _, row in df_bom.iterrows():
-        if row["전개번호"] == ".0":
-            current_top = row["자재번호"]
-        top_list.append(current_top)
-    df_bom["완성품자재"] = top_list
+    # 전개번호 .0 행의 자재번호를 다음 .0 전까지 forward-fill (make_order2.resolve_top_assembly 와 동일)
+    df_bom["완성품자재"] = df_bom["자재번호"].where(df_bom["전개번호"] == ".0").ffill()
     df_bom["구성품"] = df_bom["자재번호"]
 
     df_bom_child = df_bom[df_bom["전개번호"] != ".0"].copy()
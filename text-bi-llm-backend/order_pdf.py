@@ -1,11 +1,32 @@
 import os
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
 import pdfkit
 from jinja2 import Template
 
+from app.core.config import get_settings
+
+settings = get_settings()
+
 WKHTML_PATH = r"C:\Program Files\wkhtmltopdf\bin\wkhtmltopdf.exe"
 config = pdfkit.configuration(wkhtmltopdf=WKHTML_PATH)
 
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+PDF_OPTIONS = {
+    "encoding": "utf-8",
+    "page-size": "A4",
+    "margin-top": "6mm",
+    "margin-bottom": "6mm",
+    "margin-left": "6mm",
+    "margin-right": "6mm",
+    "disable-smart-shrinking": ""
+}
+
 # ✅ sample.html 형식 그대로(하드코딩 값만 Jinja 변수로 변경)
 PO_TEMPLATE = r"""
 <!DOCTYPE html>
@@ -187,67 +208,147 @@ def _date_to_dot(date_str: str) -> str:
         return f"{y}.{m.zfill(2)}.{d.zfill(2)}"
     return s
 
-def save_po_pdf(po_docs, save_dir="C:/po_gen"):
-    abs_path = os.path.abspath(save_dir)
-    os.makedirs(abs_path, exist_ok=True)
+_template = Template(PO_TEMPLATE)
+
 
-    template = Template(PO_TEMPLATE)
-    pdf_infos = []   # ✅ 생성된 PDF 정보 모으는 리스트
+def render_po_html(po) -> str:
+    header = po["header"]
+    items = po["items"]
 
+    po_date = header.get("po_date", "")
+    total_amount = sum(float(it.get("금액", 0) or 0) for it in items)
+
+    return _template.render(
+        po_no=header.get("po_no", ""),
+        vendor_name=header.get("vendor_name", ""),
+        buyer_name=header.get("buyer_name", "(자동생성)"),
+        po_date_display=_date_to_dot(po_date),
+        items=items,
+        total_amount=total_amount,
+        footer_left=header.get("footer_left", "PUPF01-4    TSP CO., LTD"),
+        footer_right=header.get("footer_right", ""),
+    )
+
+
+def _pdf_filenames(po_docs, abs_path: str) -> list:
+    # 업체명이 달라도 파일명 정리 후 같아질 수 있다 → 동시에 같은 파일에 쓰지 않도록 _2, _3 붙임
+    used = {}
+    names = []
     for po in po_docs:
         header = po["header"]
-        items = po["items"]
-
-        po_no = header.get("po_no", "")
-        vendor_name = header.get("vendor_name", "")
-        buyer_name = header.get("buyer_name", "(자동생성)")
-        po_date = header.get("po_date", "")
-
-        po_date_display = _date_to_dot(po_date)
-
-        footer_left = header.get("footer_left", "PUPF01-4    TSP CO., LTD")
-        footer_right = header.get("footer_right", "")
-
-        total_amount = sum(float(it.get("금액", 0) or 0) for it in items)
-
-        html = template.render(
-            po_no=po_no,
-            vendor_name=vendor_name,
-            buyer_name=buyer_name,
-            po_date_display=po_date_display,
-            items=items,
-            total_amount=total_amount,
-            footer_left=footer_left,
-            footer_right=footer_right,
-        )
-
-        safe_vendor = _safe_filename(vendor_name) or "VENDOR"
-        filename = os.path.join(abs_path, f"PO_{po_date}_{safe_vendor}.pdf")
-
-        pdfkit.from_string(
-            html,
-            filename,
-            configuration=config,
-            options={
-                "encoding": "utf-8",
-                "page-size": "A4",
-                "margin-top": "6mm",
-                "margin-bottom": "6mm",
-                "margin-left": "6mm",
-                "margin-right": "6mm",
-                "disable-smart-shrinking": ""
-            }
-        )
-
+        safe_vendor = _safe_filename(header.get("vendor_name", "")) or "VENDOR"
+        base = f"PO_{header.get('po_date', '')}_{safe_vendor}"
+        used[base] = used.get(base, 0) + 1
+        suffix = "" if used[base] == 1 else f"_{used[base]}"
+        names.append(os.path.join(abs_path, f"{base}{suffix}.pdf"))
+    return names
+
+
+def _render_one(po, filename: str) -> dict:
+    vendor_name = po["header"].get("vendor_name", "")
+    info = {
+        "vendor_name": vendor_name,
+        "file_path": filename,
+        "file_name": os.path.basename(filename),
+    }
+    started = time.perf_counter()
+    try:
+        pdfkit.from_string(render_po_html(po), filename, configuration=config, options=PDF_OPTIONS)
+    except Exception as e:
+        # 한 업체 실패가 나머지 발주서 생성을 막지 않도록 여기서 끊는다
+        print(f"[✘] PDF 생성 실패 → {filename}: {e}")
+        info.update(ok=False, error=str(e))
+    else:
         print(f"[✔] PDF 생성 완료 → {filename}")
+        info.update(ok=True)
+    info["elapsed_ms"] = round((time.perf_counter() - started) * 1000.0, 1)
+    return info
+
+
+def _get_pdf_pool() -> ThreadPoolExecutor:
+    # 모든 요청이 같은 풀을 쓴다 → 동시에 도는 wkhtmltopdf 는 프로세스 전체에서 PO_PDF_MAX_WORKERS 개까지
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ThreadPoolExecutor(
+                max_workers=max(1, settings.PO_PDF_MAX_WORKERS),
+                thread_name_prefix="po-pdf",
+            )
+        return _pdf_pool
+
+
+def shutdown_pdf_pool():
+    """
+    app.main 의 shutdown 훅에서 호출. (진행 중인 PDF 는 끝날 때까지 기다린다)
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None:
+            _pdf_pool.shutdown(wait=True)
+            _pdf_pool = None
+
+
+def save_po_pdf(po_docs, save_dir="C:/po_gen", max_workers=None, on_progress=None, stop=None):
+    """
+    업체별 발주서 PDF 생성.
+    - wkhtmltopdf 는 업체마다 별도 프로세스로 돌기 때문에, 모듈 공용 스레드풀(PO_PDF_MAX_WORKERS)에서
+      동시에 여러 개 띄운다 → 전체 시간 ≈ 가장 느린 몇 건 (예전: 업체 수만큼 합)
+      max_workers: 이 호출이 한 번에 풀에 올리는 건수 (기본 PO_PDF_MAX_WORKERS, 풀 크기를 넘지 않음)
+    - 업체별로 실패를 분리: 실패한 건은 ok=False, error 로 돌려주고 나머지는 계속 생성
+    - on_progress(done, total, info): 한 건 끝날 때마다 호출 (save_po_pdf 를 부른 스레드에서)
+    - stop(threading.Event): set 되면 아직 시작 안 한 업체는 만들지 않는다 (ok=False, error="cancelled")
+    - 리턴: po_docs 순서대로 {"vendor_name", "file_path", "file_name", "ok", "elapsed_ms"[, "error"]}
+    """
+    abs_path = os.path.abspath(save_dir)
+    os.makedirs(abs_path, exist_ok=True)
 
-        # ✅ 프론트에서 쓸 수 있게 정보 저장
-        pdf_infos.append({
-            "vendor_name": vendor_name,
-            "file_path": filename,
-            "file_name": os.path.basename(filename),
-        })
-
-    # ✅ 반드시 리턴
+    filenames = _pdf_filenames(po_docs, abs_path)
+    total = len(po_docs)
+    pdf_infos = [None] * total
+    if total == 0:
+        return []
+
+    workers = max(1, min(max_workers or settings.PO_PDF_MAX_WORKERS, settings.PO_PDF_MAX_WORKERS, total))
+    started = time.perf_counter()
+    pool = _get_pdf_pool()
+    pending = iter(enumerate(zip(po_docs, filenames)))
+    running = {}
+
+    def submit_next() -> None:
+        for i, (po, filename) in pending:
+            if stop is not None and stop.is_set():
+                pdf_infos[i] = {
+                    "vendor_name": po["header"].get("vendor_name", ""),
+                    "file_path": filename,
+                    "file_name": os.path.basename(filename),
+                    "ok": False,
+                    "error": "cancelled",
+                    "elapsed_ms": 0.0,
+                }
+                continue
+            running[pool.submit(_render_one, po, filename)] = i
+            return
+
+    for _ in range(workers):
+        submit_next()
+
+    done = 0
+    while running:
+        finished, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in finished:
+            info = future.result()
+            pdf_infos[running.pop(future)] = info
+            done += 1
+            if on_progress is not None:
+                try:
+                    on_progress(done, total, info)
+                except Exception as e:
+                    print(f"[save_po_pdf] on_progress 오류 무시: {e}")
+            submit_next()
+
+    failed = sum(1 for info in pdf_infos if not info["ok"])
+    print(
+        f"[save_po_pdf] {total}건 (실패 {failed}), workers={workers}, "
+        f"{(time.perf_counter() - started) * 1000:.0f}ms"
+    )
     return pdf_infos
-
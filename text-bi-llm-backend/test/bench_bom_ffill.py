@@ -0,0 +1,82 @@
+"""
+make_order2.resolve_top_assembly (BOM 완성품 forward-fill) 벤치마크.
+
+합성 BOM(완성품 .0 행 + 하위 구성품 행)으로
+예전 iterrows() 루프와 벡터화 버전의 결과가 같은지 확인하고 소요시간을 비교한다.
+DB 접속 없음.
+
+실행 (text-bi-llm-backend 에서):
+(textbi) python test/bench_bom_ffill.py [BOM 행 수=300000]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from make_order2 import resolve_top_assembly  # noqa: E402
+
+
+def make_synthetic_bom(n_rows: int, children_per_top: int = 60, seed: int = 0) -> pd.DataFrame:
+    """
+    완성품 1행 + 구성품 평균 children_per_top 행 반복. 전개번호는 .0 / ..1 / ...2 형식
+    """
+    rng = np.random.default_rng(seed)
+    levels = rng.integers(1, 4, size=n_rows)
+    is_top = rng.random(n_rows) < 1.0 / (children_per_top + 1)
+    is_top[0] = True
+    levels[is_top] = 0
+    expl = np.where(levels == 0, ".0", pd.Series(levels).map(lambda lv: "." * (lv + 1) + str(lv)))
+    return pd.DataFrame({
+        "전개번호": expl.astype(str),
+        "자재번호": np.char.add("M", rng.integers(10_000_000, 99_999_999, size=n_rows).astype(str)),
+    })
+
+
+def legacy_top_assembly(df_bom: pd.DataFrame) -> list:
+    # 예전 STEP 2 구현 그대로
+    current_top = None
+    top_list = []
+    for _, row in df_bom.iterrows():
+        if row["전개번호"] == ".0":
+            current_top = row["자재번호"]
+        top_list.append(current_top)
+    return top_list
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(n_rows: int) -> None:
+    df_bom = make_synthetic_bom(n_rows)
+    print(f"[bench] 합성 BOM {len(df_bom):,}행, 완성품 {(df_bom['전개번호'] == '.0').sum():,}개")
+
+    started = time.perf_counter()
+    legacy = legacy_top_assembly(df_bom)
+    legacy_s = time.perf_counter() - started
+
+    vectorized = resolve_top_assembly(df_bom)
+    vectorized_s = _best_of(lambda: resolve_top_assembly(df_bom), repeat=5)
+
+    expected = pd.Series(legacy, index=df_bom.index, dtype=object)
+    same = expected.fillna("<none>").equals(vectorized.astype(object).fillna("<none>"))
+    print(f"[bench] 결과 동일: {same}")
+    print(f"[bench] iterrows   : {legacy_s * 1000:10.1f} ms")
+    print(f"[bench] ffill      : {vectorized_s * 1000:10.1f} ms")
+    print(f"[bench] speedup    : {legacy_s / vectorized_s:10.1f}x")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 300_000)
@@ -0,0 +1,19 @@
+# test/conftest.py
+"""
+pytest 공통 설정.
+
+- app.core.config 가 import 시점에 필수 설정을 읽으므로 테스트용 기본값을 먼저 넣어 둔다
+  (실제 .env / 환경변수가 있으면 그 값이 우선).
+- 백엔드 루트(text-bi-llm-backend)를 sys.path 에 넣어 `app`, `make_order2`, `order_pdf` 를 바로 import.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.insert(0, str(BACKEND_ROOT))
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
@@ -4,12 +4,21 @@
 
 실행:
 (textbi) python human_eval_runner.py
+
+스키마 검색(schema_index) 재현율 점검 (서버 호출 없음):
+(textbi) python test/eval_runner.py --schema-recall <결과 CSV>   (text-bi-llm-backend 에서)
+  - 결과 CSV 의 sql 이 실제로 사용한 테이블이, 같은 질문에 대해
+    schema_index 가 고른 top-k 테이블 안에 모두 들어있는지 비율을 출력한다.
 """
 
 import csv
 import json
+import os
+import sys
 import time
-import requests
+
+# --schema-recall 은 app 모듈을 직접 쓰므로 백엔드 루트(text-bi-llm-backend)를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 API_URL = "http://localhost:8000/api/v1/ask"
 OUTPUT_CSV = "C:/Users/KDT39/Desktop/KDT_9/최종프로젝트/text-bi-llm-backend/test/output/result1.csv"
@@ -43,6 +52,8 @@ def load_questions_inline():
 
 
 def main():
+    import requests  # HTTP 호출 모드에서만 필요
+
     # 1) 질문 로딩: CSV 사용 or 인라인 사용 택1
     try:
         questions = load_questions_from_csv(INPUT_CSV)
@@ -151,5 +162,43 @@ def main():
     print(f"\n[DONE] 결과 {len(results)}건을 {OUTPUT_CSV} 로 저장 완료")
 
 
+def schema_recall(result_csv: str):
+    """
+    전체 스키마로 생성했던 결과 CSV(question, sql)를 기준으로
+    schema_index 선택 결과가 필요한 테이블을 빠뜨리지 않는지 확인한다.
+    """
+    from app.services.result_cache import extract_tables
+    from app.services.schema_index import schema_index
+
+    total = covered = 0
+    misses = []
+    with open(result_csv, "r", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            q = (row.get("question") or "").strip()
+            sql = (row.get("sql") or "").strip()
+            if not q or not sql:
+                continue
+            used = {t.lower() for t in extract_tables(sql)}
+            selection = schema_index.select(q)
+            selected = {t.lower() for t in selection.tables}
+            total += 1
+            if used <= selected:
+                covered += 1
+            else:
+                misses.append((q, sorted(used - selected), selection.tables))
+
+    for q, missing, chosen in misses:
+        print(f"[MISS] {q}\n       missing={missing} selected={chosen}")
+    stats = schema_index.stats()
+    print(
+        f"\n[DONE] recall {covered}/{total}"
+        f" ({(covered / total * 100.0) if total else 0.0:.1f}%),"
+        f" 평균 스키마 길이 {stats['avg_selected_chars']:.0f}자 / 전체 {stats['full_doc_chars']}자"
+    )
+
+
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) >= 3 and sys.argv[1] == "--schema-recall":
+        schema_recall(sys.argv[2])
+    else:
+        main()
@@ -0,0 +1,72 @@
+# test/test_bom_graph.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from app.services.bom_graph import BomGraph
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bom() -> pd.DataFrame:
+    rows = [
+        # 전개번호, 자재번호, 소요량_구성품, 단위량, 효력시작일, 효력종료일
+        (".0", "FG1", 1, 1, "", ""),
+        ("..1", "A", 2, 1, "", ""),
+        ("...2", "A1", 3, 1, "", ""),
+        ("..1", "B", 1, 2, "", ""),
+        ("...2", "B1", 5, 1, "20250101", "20250630"),  # 기간 밖이면 하위까지 제외
+        ("....3", "B11", 1, 1, "", ""),
+        (".0", "FG2", 1, 1, "", ""),
+        ("..1", "A", 4, 1, "", ""),
+    ]
+    df = pd.DataFrame(rows, columns=["전개번호", "자재번호", "소요량_구성품", "단위량", "효력시작일", "효력종료일"])
+    for col in ("구성요소내역", "단위", "조달유형", "공급업체", "공급업체명", "특별조달유형", "평가클래스"):
+        df[col] = ""
+    return df
+
+
+def test_explode_multiplies_down_the_path():
+    graph = BomGraph.build(_bom())
+    demand = pd.DataFrame({"자재번호": ["FG1", "FG2"], "완성품부족": [10, 1]})
+
+    out = graph.explode(demand, as_of="2025-03-01")
+    need = dict(zip(out["완성품자재"] + ":" + out["자재번호"], out["필요구성품수량"]))
+    assert need == {
+        "FG1:A": 20, "FG1:A1": 60, "FG1:B": 20, "FG1:B1": 100, "FG1:B11": 100, "FG2:A": 4,
+    }
+
+    out = graph.explode(demand, as_of="2025-12-01")
+    assert "B1" not in set(out["자재번호"]) and "B11" not in set(out["자재번호"])
+
+
+def test_nbytes_counts_attrs_and_cached_dates():
+    graph = BomGraph.build(_bom())
+    attrs = int(graph.attrs.memory_usage(deep=True).sum())
+    before = graph.nbytes()
+    assert before > attrs
+    graph.multipliers("2025-03-01")
+    assert graph.nbytes() > before
+
+
+def test_make_order2_imports_without_settings():
+    # bench_bom_ffill.py 처럼 .env / 환경변수 없이 resolve_top_assembly 를 쓸 수 있어야 한다
+    pytest.importorskip("pymysql")
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "SQLALCHEMY_DATABASE_URI")}
+    code = (
+        "import sys, make_order2;"
+        "assert 'app.core.config' not in sys.modules;"
+        "import pandas as pd;"
+        "df = pd.DataFrame({'전개번호': ['.0', '..1'], '자재번호': ['FG', 'C']});"
+        "print(list(make_order2.resolve_top_assembly(df)))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd="/", env={**env, "PYTHONPATH": str(BACKEND_ROOT)},
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "['FG', 'FG']"
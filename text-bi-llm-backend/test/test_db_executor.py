@@ -0,0 +1,106 @@
+# test/test_db_executor.py
+import asyncio
+import contextlib
+import threading
+import time
+
+import pytest
+
+from app.db import executor
+from app.db.query_control import QueryTimeoutError
+
+
+class FakeSession:
+    def __init__(self, kind):
+        self.kind = kind
+        self.closed = False
+        self.killed = threading.Event()
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    created = []
+    limits = []
+
+    def factory(kind):
+        def make():
+            session = FakeSession(kind)
+            created.append(session)
+            return session
+        return make
+
+    @contextlib.contextmanager
+    def fake_timeout(session, timeout=None):
+        # KILL QUERY 대신: 제한 시간이 지나면 세션에 표시 → 작업이 QueryTimeoutError 로 끝난다
+        limits.append(timeout)
+        timer = threading.Timer(timeout or 0.5, session.killed.set)
+        timer.start()
+        try:
+            yield
+        finally:
+            timer.cancel()
+
+    monkeypatch.setattr(executor, "SessionLocal", factory("primary"))
+    monkeypatch.setattr(executor, "ReadSessionLocal", factory("replica"))
+    monkeypatch.setattr(executor, "statement_timeout", fake_timeout)
+    return created, limits
+
+
+def _slow(session):
+    if session.killed.wait(5):
+        raise QueryTimeoutError("killed")
+    return "never"
+
+
+def _fail(session):
+    raise RuntimeError("boom")
+
+
+def test_fan_out_order_errors_and_timeouts(sessions):
+    created, limits = sessions
+
+    async def main():
+        return await executor.fan_out_db(
+            [("slow", _slow), ("ok", lambda s: s.kind), ("fail", _fail)],
+            timeout=0.1,
+            read_only=("ok",),
+        )
+
+    started = time.perf_counter()
+    slow, ok, fail = asyncio.run(main())
+    assert time.perf_counter() - started < 2
+
+    assert [r.name for r in (slow, ok, fail)] == ["slow", "ok", "fail"]
+    assert ok.ok and ok.value == "replica"
+    assert slow.timed_out and not slow.ok
+    assert isinstance(fail.error, RuntimeError)
+    # 모든 작업이 같은 제한으로 statement_timeout 아래에서 실행된다
+    assert limits == [0.1, 0.1, 0.1]
+
+
+def test_timed_out_task_releases_its_session(sessions):
+    created, _ = sessions
+
+    async def main():
+        return await executor.fan_out_db([("slow", _slow)], timeout=0.1)
+
+    (res,) = asyncio.run(main())
+    assert res.timed_out
+    # 기다리지 않고 돌아온 뒤에도 워커에서 도는 쿼리는 중단되고 세션이 닫힌다
+    deadline = time.monotonic() + 2
+    while not created[0].closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert created[0].killed.is_set() and created[0].closed
+
+
+def test_zero_timeout_falls_back_to_statement_limit(sessions):
+    _, limits = sessions
+
+    async def main():
+        return await executor.fan_out_db([("ok", lambda s: 1)], timeout=0)
+
+    assert asyncio.run(main())[0].value == 1
+    assert limits == [None]
@@ -0,0 +1,68 @@
+# test/test_local_insight.py
+import pytest
+
+from app.services.local_insight import PIE_MAX_SLICES, infer_chart_spec, summarize_profile
+from app.services.result_profile import profile_rows
+
+
+def _spec(rows, question=None):
+    spec = infer_chart_spec(profile_rows(rows), question)
+    return spec and (spec.type, spec.x_field, spec.y_field)
+
+
+def test_date_column_gives_line():
+    rows = [
+        {"일자": "2025-11-01", "플랜트": "1010", "금액": 10.0},
+        {"일자": "2025-11-02", "플랜트": "1020", "금액": 20.0},
+    ]
+    # 범주 컬럼이 같이 있어도 기간이 우선
+    assert _spec(rows, "플랜트별 비중") == ("line", "일자", "금액")
+
+
+def test_year_integer_column_gives_line():
+    rows = [{"연도": 2024, "금액": 5}, {"연도": 2025, "금액": 9}]
+    assert _spec(rows) == ("line", "연도", "금액")
+
+
+def test_category_gives_bar():
+    rows = [{"플랜트": p, "재고금액": float(i)} for i, p in enumerate(["1010", "1020", "1030"])]
+    assert _spec(rows, "플랜트별 재고금액") == ("bar", "플랜트", "재고금액")
+
+
+@pytest.mark.parametrize("question", ["플랜트별 재고금액 비중", "공급업체 점유율", "share by plant"])
+def test_share_question_with_few_groups_gives_pie(question):
+    rows = [{"플랜트": f"P{i}", "재고금액": float(i + 1)} for i in range(PIE_MAX_SLICES)]
+    assert _spec(rows, question) == ("pie", "플랜트", "재고금액")
+
+
+def test_share_question_with_many_groups_stays_bar():
+    rows = [{"플랜트": f"P{i}", "재고금액": float(i + 1)} for i in range(PIE_MAX_SLICES + 1)]
+    assert _spec(rows, "플랜트별 재고금액 비중") == ("bar", "플랜트", "재고금액")
+
+
+def test_breakdown_column_is_the_x_axis():
+    # 그룹 수가 적은 범주(플랜트)가 대표 범주
+    rows = [{"자재": f"M{i}", "플랜트": "1010" if i % 2 else "1020", "금액": 1.0} for i in range(6)]
+    assert _spec(rows) == ("bar", "플랜트", "금액")
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [
+        [{"자재번호": "A", "자재명": "x"}, {"자재번호": "B", "자재명": "y"}],  # 수치 없음
+        [{"금액": 1.0}, {"금액": 2.0}],                                     # 축으로 쓸 컬럼 없음
+        [],
+    ],
+)
+def test_undecidable_returns_none(rows):
+    assert infer_chart_spec(profile_rows(rows)) is None
+    assert infer_chart_spec(None) is None
+
+
+def test_summarize_profile():
+    rows = [{"플랜트": "1010", "금액": 300.0}, {"플랜트": "1020", "금액": 100.0}]
+    text = summarize_profile(profile_rows(rows))
+    assert text.splitlines()[0] == "조회 결과 2행입니다."
+    assert "금액 합계 400" in text
+    assert "플랜트 기준 1위는 '1010'(300, 전체의 75.0%)입니다. (2개 그룹)" in text
+    assert summarize_profile(profile_rows([])) == "조회 결과가 없습니다."
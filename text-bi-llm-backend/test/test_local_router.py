@@ -0,0 +1,47 @@
+# test/test_local_router.py
+import json
+
+from app.services.local_router import LocalRouter, classify_rules
+
+
+def test_rules_route_obvious_questions():
+    assert classify_rules("플랜트별 재고금액 상위 10개 보여줘").action == "sql_bi"
+    assert classify_rules("이 시스템 사용법 알려줘").action == "help"
+
+
+def _write(path, n, action="report"):
+    with open(path, "a", encoding="utf-8") as f:
+        for i in range(n):
+            f.write(json.dumps({"question": f"질문 {i}", "action": action}, ensure_ascii=False) + "\n")
+
+
+def test_record_triggers_reload_after_n_samples(tmp_path):
+    path = tmp_path / "router.jsonl"
+    _write(path, 2, "help")
+    router = LocalRouter(training_path=str(path), reload_every=3, reload_interval=0)
+    assert router.reload() == 2
+
+    router.record("플랜트별 재고", "sql_bi")
+    router.record("보고서로 정리", "report")
+    assert router.reloads == 1
+    router.record("메일 형식으로", "report")
+    assert router.reloads == 2
+    assert router._model is not None and router._model.size == 5
+
+
+def test_record_triggers_reload_after_interval(tmp_path):
+    path = tmp_path / "router.jsonl"
+    router = LocalRouter(training_path=str(path), reload_every=0, reload_interval=60)
+    router.reload()
+    router.record("플랜트별 재고", "sql_bi")
+    assert router.reloads == 1
+    router._loaded_at -= 61
+    router.record("보고서로 정리", "report")
+    assert router.reloads == 2
+
+
+def test_record_ignores_unknown_action(tmp_path):
+    path = tmp_path / "router.jsonl"
+    router = LocalRouter(training_path=str(path))
+    router.record("q", "unknown")
+    assert not path.exists()
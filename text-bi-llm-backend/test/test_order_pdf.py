@@ -0,0 +1,195 @@
+# test/test_order_pdf.py
+import asyncio
+import importlib
+import sys
+import threading
+import time
+
+import pytest
+
+pdfkit = pytest.importorskip("pdfkit")
+pytest.importorskip("jinja2")
+
+
+@pytest.fixture
+def order_pdf(monkeypatch):
+    # wkhtmltopdf 없이 import (모듈 로드 시 pdfkit.configuration 이 실행 파일을 찾는다)
+    monkeypatch.setattr(pdfkit, "configuration", lambda **kwargs: None)
+    sys.modules.pop("order_pdf", None)
+    module = importlib.import_module("order_pdf")
+    monkeypatch.setattr(module.settings, "PO_PDF_MAX_WORKERS", 3)
+    yield module
+    module.shutdown_pdf_pool()
+    sys.modules.pop("order_pdf", None)
+
+
+def _docs(*vendors):
+    return [
+        {
+            "header": {"po_no": 1, "po_date": "2025-11-24", "plant": "1010", "vendor_code": v, "vendor_name": v},
+            "items": [{"품목명": "x", "자재번호": "C1", "발주수량": 1, "단위": "EA", "단가": 1.0, "금액": 1.0}],
+        }
+        for v in vendors
+    ]
+
+
+class FakeRenderer:
+    """pdfkit.from_string 대체: 업체명으로 지연/실패를 정하고 동시 실행 수를 기록"""
+
+    def __init__(self, delays=None, fail=()):
+        self.delays = delays or {}
+        self.fail = set(fail)
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = []
+
+    def __call__(self, html, filename, configuration=None, options=None):
+        vendor = next((v for v in list(self.delays) + list(self.fail) if f"_{v}." in filename), None)
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.calls.append(filename)
+        try:
+            time.sleep(self.delays.get(vendor, 0.01))
+            if vendor in self.fail:
+                raise OSError(f"wkhtmltopdf failed for {vendor}")
+            with open(filename, "wb") as f:
+                f.write(b"%PDF")
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def test_results_follow_input_order_and_progress_counts(order_pdf, monkeypatch, tmp_path):
+    renderer = FakeRenderer(delays={"A": 0.15, "B": 0.05, "C": 0.01, "D": 0.08})
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", renderer)
+    progress = []
+
+    infos = order_pdf.save_po_pdf(
+        _docs("A", "B", "C", "D"), str(tmp_path), on_progress=lambda d, t, info: progress.append((d, t, info["vendor_name"]))
+    )
+
+    assert [i["vendor_name"] for i in infos] == ["A", "B", "C", "D"]
+    assert all(i["ok"] for i in infos)
+    assert [(d, t) for d, t, _ in progress] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    # 진행 보고는 끝난 순서 (A 가 가장 느림)
+    assert progress[-1][2] == "A"
+    assert sorted(p.name for p in tmp_path.iterdir()) == [f"PO_2025-11-24_{v}.pdf" for v in "ABCD"]
+
+
+def test_failure_is_isolated(order_pdf, monkeypatch, tmp_path):
+    renderer = FakeRenderer(fail={"BAD"})
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", renderer)
+
+    infos = order_pdf.save_po_pdf(_docs("A", "BAD", "C"), str(tmp_path))
+
+    assert [i["ok"] for i in infos] == [True, False, True]
+    assert "wkhtmltopdf failed for BAD" in infos[1]["error"]
+
+
+def test_duplicate_vendor_files_do_not_collide(order_pdf, monkeypatch, tmp_path):
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", FakeRenderer())
+    infos = order_pdf.save_po_pdf(_docs("A/B", "A B", "A?B"), str(tmp_path))
+    assert len({i["file_name"] for i in infos}) == 3
+
+
+def test_pool_is_bounded_across_calls(order_pdf, monkeypatch, tmp_path):
+    renderer = FakeRenderer(delays={v: 0.05 for v in "ABCDEFGH"})
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", renderer)
+
+    calls = [
+        threading.Thread(target=order_pdf.save_po_pdf, args=(_docs(*"ABCD"), str(tmp_path / "r1"))),
+        threading.Thread(target=order_pdf.save_po_pdf, args=(_docs(*"EFGH"), str(tmp_path / "r2"))),
+    ]
+    for t in calls:
+        t.start()
+    for t in calls:
+        t.join()
+
+    assert len(renderer.calls) == 8
+    assert renderer.max_active <= 3
+
+
+def test_shutdown_pdf_pool(order_pdf, monkeypatch, tmp_path):
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", FakeRenderer())
+    pool = order_pdf._get_pdf_pool()
+    assert order_pdf._get_pdf_pool() is pool
+
+    order_pdf.shutdown_pdf_pool()
+    assert order_pdf._pdf_pool is None
+    order_pdf.shutdown_pdf_pool()  # 두 번 불러도 된다
+
+    # 종료 후 다시 쓰면 새 풀
+    assert order_pdf.save_po_pdf(_docs("A"), str(tmp_path))[0]["ok"]
+    assert order_pdf._pdf_pool is not None and order_pdf._pdf_pool is not pool
+
+
+def test_stop_skips_unstarted_vendors(order_pdf, monkeypatch, tmp_path):
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", FakeRenderer())
+    stop = threading.Event()
+
+    infos = order_pdf.save_po_pdf(
+        _docs(*"ABCDEF"), str(tmp_path), max_workers=1, on_progress=lambda *a: stop.set(), stop=stop
+    )
+
+    assert [i["ok"] for i in infos] == [True] + [False] * 5
+    assert {i["error"] for i in infos[1:]} == {"cancelled"}
+
+
+def test_stream_disconnect_stops_rendering(order_pdf, monkeypatch):
+    po = importlib.import_module("app.api.v1.endpoints.po")
+    docs = _docs(*"ABCDEF")
+    finished = threading.Event()
+    seen_stop = []
+
+    async def fake_run_in_db(fn, *args, **kwargs):
+        return docs
+
+    def fake_save(po_docs, save_dir, max_workers, on_progress, stop):
+        try:
+            for i, doc in enumerate(po_docs, start=1):
+                if stop.is_set():
+                    seen_stop.append(i)
+                    break
+                time.sleep(0.02)
+                on_progress(i, len(po_docs), {"vendor_name": doc["header"]["vendor_name"], "ok": True})
+        finally:
+            finished.set()
+        return []
+
+    monkeypatch.setattr(po, "run_in_db", fake_run_in_db)
+    monkeypatch.setattr(po, "save_po_pdf", fake_save)
+
+    async def main():
+        events = po._generate_po_events("2025-11-24")
+        assert (await events.__anext__()).startswith("event: po_docs")
+        assert (await events.__anext__()).startswith("event: pdf")
+        await events.aclose()  # 클라이언트 연결 끊김
+        # 렌더 작업이 끝날 때까지 기다린 뒤 닫히고, 남은 task 가 없다
+        assert finished.is_set()
+        others = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+        assert others == []
+
+    asyncio.run(main())
+    assert seen_stop and seen_stop[0] < len(docs)
+
+
+def test_stream_reports_every_vendor(order_pdf, monkeypatch, tmp_path):
+    po = importlib.import_module("app.api.v1.endpoints.po")
+    monkeypatch.setattr(order_pdf.pdfkit, "from_string", FakeRenderer(fail={"B"}))
+    monkeypatch.setattr(po, "save_po_pdf", order_pdf.save_po_pdf)
+    monkeypatch.setattr(po, "PO_BASE_DIR", str(tmp_path))
+
+    async def fake_run_in_db(fn, *args, **kwargs):
+        return _docs(*"ABC")
+
+    monkeypatch.setattr(po, "run_in_db", fake_run_in_db)
+
+    async def main():
+        return [chunk async for chunk in po._generate_po_events("2025-11-24")]
+
+    chunks = asyncio.run(main())
+    kinds = [c.split("\n", 1)[0] for c in chunks]
+    assert kinds == ["event: po_docs"] + ["event: pdf"] * 3 + ["event: done"]
+    assert '"count": 2' in chunks[-1] and '"vendor_name": "B"' in chunks[-1]
@@ -0,0 +1,76 @@
+# test/test_po_open_agg.py
+from datetime import date
+
+from app.services import po_open_agg
+from app.services.po_open_agg import checksum_candidates, fetch_warn_list, warn_list_end
+
+D1, D2, D3, D4 = (date(2025, 11, d) for d in (1, 2, 3, 4))
+
+
+def test_checksum_candidates():
+    stored = {
+        D1: (10, 111, "2025-11-01 17:00:00"),
+        D2: (5, 222, "2025-11-02 12:00:00"),
+        D3: (7, 333, "2025-11-03 09:00:00"),
+    }
+    current = {
+        D1: (10, "2025-11-01 17:00:00"),  # 그대로, 미결 없음 → 건너뜀
+        D2: (5, "2025-11-02 12:00:00"),   # 그대로지만 미결이 남아 있음 → 확인
+        D3: (8, "2025-11-03 10:00:00"),   # 건수 변화
+        D4: (1, "2025-11-04 08:00:00"),   # 신규 일자
+    }
+    assert checksum_candidates(current, stored, open_days=[D2]) == [D2, D3, D4]
+
+
+def test_warn_list_end():
+    counts = [(D1, 20), (D2, 20), (D3, 20), (D4, 20)]
+    assert warn_list_end(counts, 50) == D3
+    assert warn_list_end(counts, 40) == D2
+    assert warn_list_end(counts, 100) is None
+    assert warn_list_end([], 50) is None
+
+
+class FakeResult:
+    def __init__(self, rows, keys=("구매오더",)):
+        self._rows = rows
+        self._keys = keys
+
+    def keys(self):
+        return list(self._keys)
+
+    def fetchall(self):
+        return self._rows
+
+
+class FakeSession:
+    def __init__(self, day_counts, rows_until):
+        self.day_counts = day_counts
+        self.rows_until = rows_until  # end_dt → 반환 행 수
+        self.warn_list_ends = []
+
+    def execute(self, stmt, params):
+        if stmt is po_open_agg._WARN_DAYS_SQL:
+            return FakeResult(self.day_counts)
+        self.warn_list_ends.append(params["end_dt"])
+        return FakeResult([(i,) for i in range(min(self.rows_until[params["end_dt"]], params["limit"]))])
+
+
+def test_warn_list_reads_only_needed_days():
+    db = FakeSession([(D1, 30), (D2, 30)], {"2025-11-02": 60, "2025-11-30": 80})
+    rows = fetch_warn_list(db, D1, date(2025, 11, 30), date(2025, 12, 31), 14, limit=50, use_aggregates=True)
+    assert len(rows) == 50
+    assert db.warn_list_ends == ["2025-11-02"]
+
+
+def test_warn_list_falls_back_when_aggregate_is_behind():
+    # 집계상으론 D2 까지 50건이지만 그 사이 완료 처리되어 원본엔 40건 → 전체 기간으로 다시 조회
+    db = FakeSession([(D1, 30), (D2, 30)], {"2025-11-02": 40, "2025-11-30": 80})
+    rows = fetch_warn_list(db, D1, date(2025, 11, 30), date(2025, 12, 31), 14, limit=50, use_aggregates=True)
+    assert len(rows) == 50
+    assert db.warn_list_ends == ["2025-11-02", "2025-11-30"]
+
+
+def test_warn_list_without_aggregates():
+    db = FakeSession([], {"2025-11-30": 10})
+    assert len(fetch_warn_list(db, D1, date(2025, 11, 30), date(2025, 12, 31), 14)) == 10
+    assert db.warn_list_ends == ["2025-11-30"]
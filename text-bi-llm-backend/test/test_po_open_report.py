@@ -0,0 +1,93 @@
+# test/test_po_open_report.py
+from datetime import date
+
+from app.services.po_open_report import _sections_from_agg_rows
+
+BASE = date(2025, 11, 30)
+
+# (생성일자, 상태, 플랜트명, 생성자명, 대표차종, 건수)
+ROWS = [
+    (date(2025, 11, 16), "@5D@", "P1", "kim", "A", 2),   # 경과 14일 → 경고 (경계)
+    (date(2025, 11, 17), "@5D@", "P1", " ", None, 3),    # 경과 13일 → 확인필요, 생성자/차종 (미상)
+    (date(2025, 11, 10), "@5B@", "P2", "lee", "B", 5),   # 정상 (P2 는 미결 없음)
+    (date(2025, 11, 1), "@5D@", None, "lee", "B", 1),    # 경고, 플랜트명 NULL
+    (date(2025, 11, 20), "@XX@", "P3", "park", "C", 4),  # 기타
+    (date(2025, 11, 17), "@5D@", "P4", "kim", "D", 1),   # 확인필요
+]
+
+
+def test_grades_and_counts():
+    sections = _sections_from_agg_rows(ROWS, BASE)
+    assert sections["grade_dist"] == [
+        {"알림등급": "정상", "건수": 5},
+        {"알림등급": "확인필요", "건수": 4},
+        {"알림등급": "경고", "건수": 3},
+        {"알림등급": "기타", "건수": 4},
+    ]
+    assert sections["counts"] == {
+        "total_cnt": 16,
+        "done_cnt": 5,
+        "open_cnt": 7,
+        "warn_cnt": 3,
+        "check_cnt": 4,
+        "open_reason_cnt": 0,
+    }
+
+
+def test_daily_and_elapsed_sections():
+    sections = _sections_from_agg_rows(ROWS, BASE)
+    assert sections["daily_open"] == [
+        {"생성일자": date(2025, 11, 1), "미결건수": 1},
+        {"생성일자": date(2025, 11, 16), "미결건수": 2},
+        {"생성일자": date(2025, 11, 17), "미결건수": 4},
+    ]
+    assert sections["daily_warn"] == [
+        {"생성일자": date(2025, 11, 1), "경고건수": 1},
+        {"생성일자": date(2025, 11, 16), "경고건수": 2},
+    ]
+    # 경계: 13일 = 확인필요, 14일 = 경고
+    assert sections["elapsed_hist"] == [
+        {"경과일수": 13, "건수": 4},
+        {"경과일수": 14, "건수": 2},
+        {"경과일수": 29, "건수": 1},
+    ]
+
+
+def test_plant_top_keeps_null_group_and_requires_open():
+    # GROUP BY 플랜트명 HAVING 미결건수 > 0 (NULL 플랜트명은 별도 그룹, 경고 0 건 플랜트도 포함)
+    assert _sections_from_agg_rows(ROWS, BASE)["plant_warn"] == [
+        {"플랜트명": "P1", "경고건수": 2, "미결건수": 5, "경고비율(미결대비)": 0.4},
+        {"플랜트명": None, "경고건수": 1, "미결건수": 1, "경고비율(미결대비)": 1.0},
+        {"플랜트명": "P4", "경고건수": 0, "미결건수": 1, "경고비율(미결대비)": 0.0},
+    ]
+
+
+def test_creator_top_requires_warn_and_labels_unknown():
+    sections = _sections_from_agg_rows(ROWS, BASE)
+    # HAVING 경고건수 > 0 → (미상)(경고 0) 제외
+    assert sections["creator_warn"] == [
+        {"생성자명": "kim", "경고건수": 2, "미결건수": 3, "경고비율(미결대비)": 0.6667},
+        {"생성자명": "lee", "경고건수": 1, "미결건수": 1, "경고비율(미결대비)": 1.0},
+    ]
+    # HAVING 미결건수 > 0 → 미결 없는 C 제외, 빈 값/NULL 은 (미상)
+    assert sections["model_warn"] == [
+        {"대표차종": "A", "경고건수": 2, "미결건수": 2, "경고비율(미결대비)": 1.0},
+        {"대표차종": "B", "경고건수": 1, "미결건수": 1, "경고비율(미결대비)": 1.0},
+        {"대표차종": "(미상)", "경고건수": 0, "미결건수": 3, "경고비율(미결대비)": 0.0},
+        {"대표차종": "D", "경고건수": 0, "미결건수": 1, "경고비율(미결대비)": 0.0},
+    ]
+
+
+def test_empty_period():
+    sections = _sections_from_agg_rows([], BASE)
+    assert sections["grade_dist"] == []
+    assert sections["counts"] == {
+        "total_cnt": 0,
+        "done_cnt": 0,
+        "open_cnt": 0,
+        "warn_cnt": 0,
+        "check_cnt": 0,
+        "open_reason_cnt": 0,
+    }
+    for name in ("daily_open", "daily_warn", "elapsed_hist", "plant_warn", "creator_warn", "model_warn"):
+        assert sections[name] == []
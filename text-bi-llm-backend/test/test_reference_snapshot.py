@@ -0,0 +1,110 @@
+# test/test_reference_snapshot.py
+import gc
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.services.bom_graph import BomGraphCache
+from app.services.reference_snapshot import (
+    REFERENCE_TABLES,
+    ReferenceSnapshotStore,
+    decode_frame,
+    select_rows,
+    typed_frame,
+)
+
+
+def test_numeric_key_is_selected_by_str_codes():
+    raw = pd.DataFrame({
+        "플랜트": [1010, 1010, 1020],
+        "자재번호": np.array([1001, 1002, 1003], dtype=np.int64),
+        "적입수량": [10, 20, 30],
+        "최소재고": [0, 0, 0],
+        "구매처": ["V1", None, "V3"],
+    })
+    frame = typed_frame(REFERENCE_TABLES["standard_info"], raw)
+    assert isinstance(frame["자재번호"].dtype, pd.CategoricalDtype)
+
+    picked = select_rows(frame, "자재번호", ["1001", " 1003 "])
+    assert picked["자재번호"].tolist() == ["1001", "1003"]
+    assert picked["플랜트"].tolist() == ["1010", "1020"]
+    assert picked["적입수량"].tolist() == [10.0, 30.0]
+    # int 로 넘겨도 같은 행
+    assert select_rows(frame, "자재번호", [1002])["구매처"].tolist() == [""]
+
+
+def test_nullable_int_code_does_not_become_float_text():
+    raw = pd.DataFrame({"자재번호": [1001.0, np.nan, 1003.0], "단가": ["1.5", "x", None]})
+    frame = typed_frame(REFERENCE_TABLES["purchase order"], raw)
+    assert list(frame["자재번호"].cat.categories) == ["", "1001", "1003"]
+    assert select_rows(frame, "자재번호", ["1003"])["단가"].isna().all()
+    assert decode_frame(frame)["단가"].tolist()[0] == 1.5
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'ref.sqlite'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE `purchase order` (자재번호 INTEGER, 단가 REAL)"))
+        conn.execute(text("INSERT INTO `purchase order` VALUES (1001, 1.5), (1002, 2.5)"))
+        conn.execute(text("CREATE TABLE standard_info (플랜트 INTEGER, 자재번호 INTEGER, 적입수량 REAL, 최소재고 REAL, 구매처 TEXT)"))
+        conn.execute(text("INSERT INTO standard_info VALUES (1010, 1001, 10, 0, 'V1')"))
+    return engine
+
+
+def test_store_caches_and_selects_numeric_keys(engine):
+    store = ReferenceSnapshotStore(check_interval=60)
+    assert store.select("purchase order", engine, "자재번호", ["1002"])["단가"].tolist() == [2.5]
+    store.select("purchase order", engine, "자재번호", ["1001"])
+    assert store.table_loads("purchase order") == 1
+    assert store.stats()["hits"] == 1
+
+
+def test_store_bound_includes_derived_bytes(engine):
+    store = ReferenceSnapshotStore(check_interval=60)
+    po = store.get_snapshot("purchase order", engine)
+    std_bytes = store.get_snapshot("standard_info", engine).nbytes
+    assert store.stats()["tables"] == ["purchase order", "standard_info"]
+
+    # 파생 캐시가 자리를 차지하면 오래된 스냅샷부터 내린다
+    store.max_bytes = po.nbytes + std_bytes + 10
+    store.register_derived("graph", lambda: 100)
+    store.refresh("standard_info")
+    store.get_snapshot("standard_info", engine)
+    stats = store.stats()
+    assert stats["tables"] == ["standard_info"]
+    assert stats["derived_bytes"] == {"graph": 100}
+    assert stats["total_bytes"] == std_bytes + 100
+    assert stats["evictions"] == 1
+
+
+def test_oversize_table_is_not_cached(engine):
+    store = ReferenceSnapshotStore(check_interval=60, max_bytes=1)
+    store.get_snapshot("purchase order", engine)
+    store.get_snapshot("purchase order", engine)
+    assert store.table_loads("purchase order") == 2
+    assert store.stats()["oversize"] == 2 and store.stats()["tables"] == []
+
+
+def test_bom_graph_cache_does_not_pin_snapshot(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'bom.sqlite'}")
+    cols = "전개번호, 자재번호, 구성요소내역, 소요량_구성품, 단위량, 단위, 조달유형, 공급업체, 공급업체명, 특별조달유형, 평가클래스, 효력시작일, 효력종료일"
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE TABLE bom ({cols})"))
+        conn.execute(text("INSERT INTO bom VALUES ('.0', 9000, 'FG', 1, 1, 'EA', 'E', '', '', '', '', '', '')"))
+        conn.execute(text("INSERT INTO bom VALUES ('..1', 1001, 'C', 2, 1, 'EA', 'F', 'V', 'Vendor', '', '', '', '')"))
+    store = ReferenceSnapshotStore(check_interval=60)
+    cache = BomGraphCache()
+    snap = store.get_snapshot("bom", engine)
+    graph = cache.get(engine, snapshot=snap)
+    assert cache.get(engine, snapshot=snap) is graph
+    assert graph.top_codes.tolist() == ["9000"]
+
+    store.refresh("bom")
+    ref = cache._snapshot_ref
+    del snap
+    gc.collect()
+    assert ref() is None
+    assert cache.nbytes() == graph.nbytes() > 0
@@ -0,0 +1,129 @@
+# test/test_result_cache.py
+from contextlib import contextmanager
+
+from app.services.result_cache import QueryResultCache, extract_tables, fresh_table_stats
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeConn:
+    def __init__(self, fail_on=()):
+        self.executed = []
+        self.fail_on = fail_on
+        self.invalidated = False
+
+    def execute(self, stmt, params=None):
+        sql = str(stmt)
+        self.executed.append(sql)
+        if any(f in sql for f in self.fail_on):
+            raise RuntimeError(sql)
+        return FakeResult([(name, "2025-01-01", "2025-11-24", 10) for name in (params or {}).get("names", [])])
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+def test_stats_expiry_reset_after_probe():
+    conn = FakeConn()
+    with fresh_table_stats(conn):
+        conn.execute("SELECT 1")
+    assert conn.executed == [
+        "SET SESSION information_schema_stats_expiry = 0",
+        "SELECT 1",
+        "SET SESSION information_schema_stats_expiry = DEFAULT",
+    ]
+
+
+def test_stats_expiry_reset_when_probe_fails():
+    conn = FakeConn(fail_on=("SELECT",))
+    try:
+        with fresh_table_stats(conn):
+            conn.execute("SELECT 1")
+    except RuntimeError:
+        pass
+    assert conn.executed[-1].endswith("= DEFAULT")
+
+
+def test_connection_dropped_when_reset_fails():
+    conn = FakeConn(fail_on=("DEFAULT",))
+    with fresh_table_stats(conn):
+        pass
+    assert conn.invalidated
+
+
+def test_no_reset_without_variable():
+    # MySQL 5.7: 변수가 없으면 SET 이 실패하고 되돌릴 것도 없다
+    conn = FakeConn(fail_on=("= 0",))
+    with fresh_table_stats(conn):
+        conn.execute("SELECT 1")
+    assert conn.executed[-1] == "SELECT 1"
+    assert not conn.invalidated
+
+
+def test_extract_tables():
+    sql = "WITH t AS (SELECT 1) SELECT * FROM `migyul` m JOIN bom b ON 1=1, t"
+    assert extract_tables(sql) == ["migyul", "bom"]
+
+
+def test_extract_tables_skips_function_from():
+    sql = (
+        "SELECT EXTRACT(YEAR FROM 납기일), TRIM(LEADING '0' FROM 자재번호), SUBSTRING(내역 FROM 2) "
+        "FROM migyul WHERE 자재번호 IN (SELECT 자재번호 FROM bom) AND 내역 <> 'x from y'"
+    )
+    assert extract_tables(sql) == ["migyul", "bom"]
+
+
+class FakeEngine:
+    class dialect:
+        name = "mysql"
+
+    def __init__(self, fail_on=()):
+        self.conns = []
+        self.fail_on = fail_on
+
+    @contextmanager
+    def connect(self):
+        conn = FakeConn(self.fail_on)
+        self.conns.append(conn)
+        yield conn
+
+
+class FakeSession:
+    def __init__(self, engine):
+        self.engine = engine
+
+    def get_bind(self):
+        return self.engine
+
+    def connection(self):
+        raise AssertionError("probe 가 요청 세션 연결을 쓰면 안 된다")
+
+
+def test_probe_uses_dedicated_connection():
+    engine = FakeEngine(fail_on=("DEFAULT",))
+    cache = QueryResultCache(probe_interval=60)
+    versions = cache._probe_versions(FakeSession(engine), ["migyul", "BOM"])
+    assert versions == (("bom", "2025-01-01|2025-11-24|10"), ("migyul", "2025-01-01|2025-11-24|10"))
+    # 세션 변수를 못 되돌린 건 probe 전용 연결만 버린다
+    assert len(engine.conns) == 1 and engine.conns[0].invalidated
+    # probe_interval 안에서는 다시 조회하지 않는다
+    cache._probe_versions(FakeSession(engine), ["bom", "migyul"])
+    assert len(engine.conns) == 1
+
+
+def test_probe_cache_is_bounded():
+    engine = FakeEngine()
+    cache = QueryResultCache(max_entries=3, probe_interval=60)
+    for i in range(10):
+        cache._probe_versions(FakeSession(engine), [f"t{i}"])
+    assert list(cache._probe_cache) == [("t7",), ("t8",), ("t9",)]
+    # 최근에 쓴 조합은 남는다
+    cache._probe_versions(FakeSession(engine), ["t7"])
+    cache._probe_versions(FakeSession(engine), ["t10"])
+    assert list(cache._probe_cache) == [("t9",), ("t7",), ("t10",)]
@@ -0,0 +1,78 @@
+# test/test_result_profile.py
+from app.services.result_profile import exemplar_rows, profile_rows
+from app.services.sql_bi_service import ColumnarRows
+
+
+def test_number_category_and_breakdown():
+    rows = [
+        {"플랜트": "1010", "재고금액": 300.0, "수량": 3},
+        {"플랜트": "1020", "재고금액": 100.0, "수량": 1},
+        {"플랜트": "1010", "재고금액": 100.0, "수량": None},
+    ]
+    profile = profile_rows(rows, top_k=5)
+
+    assert profile["row_count"] == 3 and profile["truncated"] is False
+    cols = profile["columns"]
+    assert cols["플랜트"]["type"] == "category" and cols["플랜트"]["distinct"] == 2
+    assert cols["재고금액"] == {"type": "number", "nulls": 0, "min": 100, "max": 300, "sum": 500, "mean": 166.6667}
+    assert cols["수량"]["nulls"] == 1 and cols["수량"]["sum"] == 4
+    # 절대값 합이 가장 큰 숫자 컬럼이 대표 수치
+    assert profile["measure"] == "재고금액"
+    assert profile["breakdown"] == {
+        "by": "플랜트",
+        "total": 500,
+        "groups": 2,
+        "top": [
+            {"value": "1010", "sum": 400, "share": 0.8},
+            {"value": "1020", "sum": 100, "share": 0.2},
+        ],
+    }
+    assert "trend" not in profile
+
+
+def test_date_trend_from_columnar_rows():
+    table = ColumnarRows(
+        columns=["월", "발주금액"],
+        data=[["2025-03", 30.0], ["2025-01", 10.0], ["2025-02", 40.0], ["2025-03", 10.0]],
+        has_more=True,
+    )
+    profile = profile_rows(table)
+
+    assert profile["truncated"] is True
+    assert profile["columns"]["월"] == {"type": "date", "nulls": 0, "min": "2025-01", "max": "2025-03", "distinct": 3}
+    trend = profile["trend"]
+    assert (trend["date"], trend["periods"], trend["first_period"], trend["last_period"]) == ("월", 3, "2025-01", "2025-03")
+    assert (trend["first"], trend["last"], trend["change_pct"], trend["peak_period"]) == (10, 40, 300.0, "2025-02")
+
+
+def test_year_integer_column_is_a_date():
+    rows = [{"year": 2023, "금액": 5}, {"year": 2024, "금액": 7}, {"year": 2025, "금액": 9}]
+    profile = profile_rows(rows)
+    assert profile["columns"]["year"]["type"] == "date"
+    assert profile["measure"] == "금액"
+    assert profile["trend"]["slope_per_period"] == 2
+
+    # 이름이 기간이 아니거나 범위 밖이면 그냥 숫자
+    assert profile_rows([{"qty": 2024}, {"qty": 2025}])["columns"]["qty"]["type"] == "number"
+    assert profile_rows([{"year": 1}, {"year": 2}])["columns"]["year"]["type"] == "number"
+
+
+def test_no_measure_and_empty():
+    profile = profile_rows([{"자재번호": "A"}, {"자재번호": "B"}])
+    assert "measure" not in profile and "breakdown" not in profile
+    assert profile_rows([]) == {"row_count": 0, "truncated": False, "columns": {}}
+
+
+def test_exemplar_rows_add_extremes():
+    rows = [{"k": str(i), "v": float(i)} for i in range(10)]
+    rows[7]["v"] = 100.0
+    rows[8]["v"] = -5.0
+    picks = exemplar_rows(rows, profile_rows(rows), limit=2)
+    assert [r["k"] for r in picks] == ["0", "1", "7", "8"]
+
+
+def test_four_digit_codes_are_categories():
+    # 플랜트 코드 "1010" 은 연도처럼 보여도 범주
+    assert profile_rows([{"플랜트": "1010"}, {"플랜트": "1020"}])["columns"]["플랜트"]["type"] == "category"
+    assert profile_rows([{"연도": "2024"}, {"연도": "2025"}])["columns"]["연도"]["type"] == "date"
+    assert profile_rows([{"플랜트": "2025-01"}, {"플랜트": "2025-02"}])["columns"]["플랜트"]["type"] == "date"
@@ -0,0 +1,80 @@
+# test/test_router_service.py
+import asyncio
+
+import pytest
+
+from app.services import router_service
+from app.services.router_service import _discard_task
+
+
+def test_discard_task_swallows_child_cancel():
+    async def main():
+        child = asyncio.create_task(asyncio.sleep(10))
+        await asyncio.sleep(0)
+        await _discard_task(child)
+        return child.cancelled()
+
+    assert asyncio.run(main())
+
+
+def test_discard_task_swallows_child_error():
+    async def boom():
+        raise ValueError("x")
+
+    async def main():
+        child = asyncio.create_task(boom())
+        await asyncio.sleep(0)
+        await _discard_task(child)
+
+    asyncio.run(main())
+
+
+def test_discard_task_propagates_own_cancel():
+    async def main():
+        started = asyncio.Event()
+
+        async def stubborn():
+            # 취소를 받아도 정리에 시간이 걸리는 task
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                started.set()
+                await asyncio.sleep(0.2)
+                raise
+
+        async def outer():
+            child = asyncio.create_task(stubborn())
+            await asyncio.sleep(0)
+            await _discard_task(child)
+            return "finished"
+
+        task = asyncio.create_task(outer())
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+
+def test_route_and_run_closes_event_generator(monkeypatch):
+    closed = []
+
+    async def fake_events(*args, **kwargs):
+        try:
+            yield "action", "sql_bi"
+            yield "result", ("sql_bi", "SELECT 1", [], None, [])
+            yield "after", None
+        finally:
+            closed.append(True)
+
+    monkeypatch.setattr(router_service, "route_and_run_events", fake_events)
+
+    async def main():
+        result = await router_service.route_and_run(None, "q")
+        # GC 를 기다리지 않고 return 직후 finally 가 돌았어야 한다
+        return result, list(closed)
+
+    result, closed_at_return = asyncio.run(main())
+    assert result[1] == "SELECT 1"
+    assert closed_at_return == [True]
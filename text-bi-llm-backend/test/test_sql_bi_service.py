@@ -0,0 +1,101 @@
+# test/test_sql_bi_service.py
+import asyncio
+import json
+
+import pytest
+
+from app.schemas.sql_bi import SQLBIRequest
+from app.services import sql_bi_service, sql_guard
+from app.services.sql_bi_service import ColumnarRows
+from app.services.sql_cache import MemoryLRUBackend, SQLCache
+from app.services.sql_guard import SQLGuard, SQLGuardError
+from app.services.sql_repair import SQLFixMemo, _RepairStats
+
+CATALOG = {"stock": {"plant", "qty"}}
+BAD = "SELECT plnt FROM stock"
+GOOD = "SELECT plant FROM stock"
+
+
+class FakeLLM:
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    async def chat(self, messages, model=None):
+        self.calls.append(messages[-1]["content"])
+        return json.dumps({"sql": self.answers.pop(0)})
+
+
+class FakeDB:
+    def __init__(self):
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(sql_guard, "_catalog_columns", lambda: CATALOG)
+    monkeypatch.setattr(sql_bi_service, "select_schema_doc", lambda q: "stock(plant, qty)")
+    monkeypatch.setattr(sql_bi_service, "sql_cache", SQLCache(MemoryLRUBackend(), ttl=0))
+    monkeypatch.setattr(sql_bi_service, "sql_fix_memo", SQLFixMemo())
+    monkeypatch.setattr(sql_bi_service, "repair_stats", _RepairStats())
+    monkeypatch.setattr(sql_bi_service, "sql_guard", SQLGuard())
+    executed = []
+
+    def execute_guarded(db, sql, limit):
+        executed.append(sql)
+        return ColumnarRows(columns=["plant"], data=[["1010"]])
+
+    monkeypatch.setattr(sql_bi_service, "_execute_guarded", execute_guarded)
+    return executed
+
+
+def _ask(question="플랜트별 재고"):
+    return asyncio.run(sql_bi_service.run_sql_bi(FakeDB(), SQLBIRequest(question=question)))
+
+
+def test_unknown_column_from_first_sql_is_repaired(service, monkeypatch):
+    llm = FakeLLM(BAD, GOOD)
+    monkeypatch.setattr(sql_bi_service, "llm_client", llm)
+
+    res = _ask()
+
+    assert res.sql == GOOD
+    assert service == [GOOD]  # 검사에 걸린 SQL 은 실행하지 않는다
+    assert len(llm.calls) == 2 and "plnt" in llm.calls[1]
+    stats = sql_bi_service.repair_stats.snapshot()
+    assert stats["llm_fixes"] == 1
+    assert sql_bi_service.sql_guard.stats()["rejected"] == {"unknown_column": 1}
+    # 캐시에는 검사를 통과한 수정본만
+    assert sql_bi_service.sql_cache.get("플랜트별 재고", "stock(plant, qty)", sql_bi_service.settings.OPENAI_SQL_MODEL) == GOOD
+
+
+def test_generate_sql_does_not_cache_rejected_sql(service, monkeypatch):
+    monkeypatch.setattr(sql_bi_service, "llm_client", FakeLLM(BAD))
+    assert asyncio.run(sql_bi_service.generate_sql("q")) == BAD
+    assert sql_bi_service.sql_cache.backend.size() == 0
+
+
+def test_repair_memo_skips_llm_for_same_failed_sql(service, monkeypatch):
+    llm = FakeLLM(BAD, GOOD, BAD)
+    monkeypatch.setattr(sql_bi_service, "llm_client", llm)
+
+    assert _ask("질문 A").sql == GOOD
+    assert _ask("질문 B").sql == GOOD  # 같은 실패 SQL → 메모에서 수정본
+
+    assert len(llm.calls) == 3  # 생성 A, 수정 A, 생성 B
+    stats = sql_bi_service.repair_stats.snapshot()
+    assert stats["llm_fixes"] == 1 and stats["memo_fixes"] == 1
+
+
+def test_gives_up_after_max_attempts(service, monkeypatch):
+    monkeypatch.setattr(sql_bi_service.settings, "SQL_REPAIR_MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(sql_bi_service, "llm_client", FakeLLM(BAD, "SELECT qtty FROM stock"))
+
+    with pytest.raises(SQLGuardError) as e:
+        _ask()
+    assert e.value.reason == "unknown_column"
+    assert service == []
+    assert len(sql_bi_service.sql_fix_memo) == 0
@@ -0,0 +1,158 @@
+# test/test_sql_cache.py
+import numpy as np
+import pytest
+
+from app.services.sql_cache import (
+    CacheBackend,
+    MemoryLRUBackend,
+    SemanticIndex,
+    SQLCache,
+    make_cache_key,
+    normalize_question,
+)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("플랜트별 재고금액 상위 10개", "플랜트별  재고금액 상위 10개?"),
+        ("재고 1,000개 이상", "재고 1000개 이상"),
+        ("단가 3.50 이상", "단가 3.5 이상"),
+        ("단가 .5 이상", "단가 0.5 이상"),
+        ("단가 10.0 이상", "단가 10 이상"),
+        ("상위 007개", "상위 7개"),
+        ("ＡＢＣ 자재", "abc 자재"),
+    ],
+)
+def test_same_key(a, b):
+    assert normalize_question(a) == normalize_question(b)
+
+
+@pytest.mark.parametrize(
+    "a, b",
+    [
+        ("단가 0.5 이상", "단가 5 이상"),
+        ("단가 0.05 이상", "단가 0.5 이상"),
+        ("플랜트 1,2 재고", "플랜트 12 재고"),
+        ("상위 5개", "상위 10개"),
+        ("재고 1,000 이상", "재고 1,00 이상"),
+    ],
+)
+def test_different_key(a, b):
+    assert normalize_question(a) != normalize_question(b)
+
+
+def test_number_forms():
+    assert normalize_question("단가 0.5 이상") == "단가 0.5 이상"
+    assert normalize_question("단가 .5") == "단가 0.5"
+    assert normalize_question("12,345,678원") == "12345678원"
+    assert normalize_question("플랜트 1,2") == "플랜트 1 2"
+    assert normalize_question("0.0") == "0"
+
+
+def test_cache_key_includes_schema_and_model():
+    base = make_cache_key("q", "schema", "m1")
+    assert base != make_cache_key("q", "schema2", "m1")
+    assert base != make_cache_key("q", "schema", "m2")
+
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+    class Partial(CacheBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_sql_cache_roundtrip_and_stats():
+    cache = SQLCache(backend=MemoryLRUBackend(max_entries=2), ttl=60)
+    assert cache.get("단가 0.5 이상", "doc", "m") is None
+    cache.set("단가 0.5 이상", "doc", "m", "SELECT 1")
+    assert cache.get("단가  0.50 이상!", "doc", "m") == "SELECT 1"
+    assert cache.get("단가 5 이상", "doc", "m") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 1)
+    cache.invalidate()
+    assert cache.stats()["size"] == 0
+
+
+class FakeEmbedder:
+    """정규화 질문 → 고정 벡터 (등록 안 된 질문은 서로 직교)"""
+
+    def __init__(self, vectors):
+        self.vectors = {k: np.asarray(v, dtype=float) / np.linalg.norm(v) for k, v in vectors.items()}
+        self.calls = 0
+
+    def encode(self, texts, normalize_embeddings=True):
+        self.calls += 1
+        out = []
+        for t in texts:
+            v = self.vectors.get(t)
+            if v is None:
+                v = np.zeros(4)
+                v[hash(t) % 4] = 1.0
+            out.append(v)
+        return np.stack(out)
+
+
+def _semantic_cache(threshold=0.9):
+    embedder = FakeEmbedder({
+        normalize_question("플랜트별 재고금액 상위 10개"): [1, 0, 0, 0.1],
+        normalize_question("재고금액 상위 10개 플랜트"): [1, 0, 0, 0.15],
+        normalize_question("재고금액 상위 5개 플랜트"): [1, 0, 0, 0.15],
+        normalize_question("플랜트별 발주금액 상위 10개"): [0.3, 1, 0, 0],
+    })
+    cache = SQLCache(MemoryLRUBackend(), ttl=60, semantic=SemanticIndex(embedder, threshold=threshold))
+    return cache, embedder
+
+
+def test_semantic_hit_for_paraphrase():
+    cache, _ = _semantic_cache()
+    cache.set("플랜트별 재고금액 상위 10개", "doc", "m", "SELECT 10")
+    assert cache.get("재고금액 상위 10개 플랜트", "doc", "m") == "SELECT 10"
+    stats = cache.stats()
+    assert (stats["hits"], stats["semantic_hits"], stats["semantic_size"]) == (1, 1, 1)
+
+
+def test_semantic_requires_same_numbers_schema_and_model():
+    cache, _ = _semantic_cache()
+    cache.set("플랜트별 재고금액 상위 10개", "doc", "m", "SELECT 10")
+    assert cache.get("재고금액 상위 5개 플랜트", "doc", "m") is None
+    assert cache.get("재고금액 상위 10개 플랜트", "doc2", "m") is None
+    assert cache.get("재고금액 상위 10개 플랜트", "doc", "m2") is None
+    assert cache.get("플랜트별 발주금액 상위 10개", "doc", "m") is None  # 유사도 미달
+    assert cache.stats()["semantic_hits"] == 0
+
+
+def test_exact_hit_skips_embedding_and_invalidate_clears_index():
+    cache, embedder = _semantic_cache()
+    cache.set("플랜트별 재고금액 상위 10개", "doc", "m", "SELECT 10")
+    calls = embedder.calls
+    assert cache.get("플랜트별  재고금액 상위 10개?", "doc", "m") == "SELECT 10"
+    assert embedder.calls == calls
+    cache.invalidate()
+    assert cache.stats()["semantic_size"] == 0
+    assert cache.get("재고금액 상위 10개 플랜트", "doc", "m") is None
+
+
+def test_semantic_entry_dropped_when_backend_evicted():
+    cache, _ = _semantic_cache()
+    cache.backend = MemoryLRUBackend(max_entries=1)
+    cache.set("플랜트별 재고금액 상위 10개", "doc", "m", "SELECT 10")
+    cache.set("플랜트별 발주금액 상위 10개", "doc", "m", "SELECT po")
+    assert cache.get("재고금액 상위 10개 플랜트", "doc", "m") is None
+    assert cache.stats()["semantic_size"] == 1
+
+
+def test_semantic_without_embedder_is_exact_only(monkeypatch):
+    from app.services import sql_cache as module
+
+    monkeypatch.setattr(module, "_default_embedder", lambda: None)
+    cache = SQLCache(MemoryLRUBackend(), ttl=60, semantic=SemanticIndex())
+    cache.set("플랜트별 재고금액 상위 10개", "doc", "m", "SELECT 10")
+    assert cache.get("재고금액 상위 10개 플랜트", "doc", "m") is None
+    assert cache.get("플랜트별 재고금액 상위 10개", "doc", "m") == "SELECT 10"
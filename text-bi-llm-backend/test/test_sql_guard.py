@@ -0,0 +1,203 @@
+# test/test_sql_guard.py
+import pytest
+
+from app.services import sql_guard
+from app.services.sql_guard import SQLGuardError, apply_row_limit, validate_sql
+
+CATALOG = {
+    "migyul": {"생성일", "납기일", "플랜트명", "상태", "자재번호", "오더수량"},
+    "bom": {"전개번호", "자재번호", "소요량_구성품"},
+    "purchase order": {"자재번호", "단가"},
+}
+
+ACCEPT = [
+    "SELECT EXTRACT(YEAR FROM 납기일) AS y, COUNT(*) FROM migyul GROUP BY y",
+    "SELECT TRIM(LEADING '0' FROM 자재번호) AS code FROM bom",
+    "SELECT SUBSTRING(자재번호 FROM 2) FROM bom",
+    "SELECT p.단가, b.전개번호 FROM `purchase order` p JOIN bom b ON p.자재번호 = b.자재번호",
+    "WITH o AS (SELECT 자재번호 FROM migyul WHERE 상태 = '@5D@') SELECT COUNT(*) FROM o",
+    "SELECT 자재번호 FROM bom WHERE 자재번호 IN (SELECT 자재번호 FROM migyul)",
+    "SELECT 플랜트명 FROM migyul WHERE 플랜트명 = 'delete from bom'",
+]
+
+REJECT = [
+    ("", "empty"),
+    ("SELECT 1; DROP TABLE bom", "multi_statement"),
+    ("DELETE FROM bom", "not_select"),
+    ("SELECT * FROM bom FOR UPDATE", "forbidden"),
+    ("SELECT * FROM bom FOR SHARE", "forbidden"),
+    ("SELECT * FROM bom LOCK IN SHARE MODE", "forbidden"),
+    ("SELECT * FROM bom INTO OUTFILE '/tmp/x'", "forbidden"),
+    ("SELECT 자재번호 INTO @x FROM bom", "forbidden"),
+    ("SELECT SLEEP(10)", "forbidden"),
+    ("SELECT * FROM nope", "unknown_table"),
+    ("SELECT EXTRACT(YEAR FROM 납기일) FROM nope", "unknown_table"),
+]
+
+
+@pytest.fixture(params=["sqlglot", "regex"])
+def parser(request, monkeypatch):
+    monkeypatch.setattr(sql_guard, "_catalog_columns", lambda: CATALOG)
+    if request.param == "sqlglot":
+        pytest.importorskip("sqlglot")
+    else:
+        monkeypatch.setattr(sql_guard, "_load_sqlglot", lambda: (None, None))
+    return request.param
+
+
+@pytest.mark.parametrize("sql", ACCEPT)
+def test_accepts(parser, sql):
+    check = validate_sql(sql)
+    assert check.tables
+    assert {t.lower() for t in check.tables} <= set(CATALOG)
+
+
+@pytest.mark.parametrize("sql, reason", REJECT)
+def test_rejects(parser, sql, reason):
+    with pytest.raises(SQLGuardError) as e:
+        validate_sql(sql)
+    assert e.value.reason == reason
+
+
+def test_function_from_does_not_count_as_table(parser):
+    assert validate_sql("SELECT EXTRACT(YEAR FROM 납기일) FROM migyul").tables == ["migyul"]
+
+
+def test_sqlglot_checks_columns(monkeypatch):
+    pytest.importorskip("sqlglot")
+    monkeypatch.setattr(sql_guard, "_catalog_columns", lambda: CATALOG)
+    assert validate_sql("SELECT 플랜트명, COUNT(*) AS cnt FROM migyul GROUP BY 플랜트명 ORDER BY cnt").columns_checked
+    for sql in ("SELECT 없는컬럼 FROM migyul", "SELECT b.단가 FROM bom b"):
+        with pytest.raises(SQLGuardError) as e:
+            validate_sql(sql)
+        assert e.value.reason == "unknown_column"
+
+
+def test_without_catalog_tables_are_not_checked(parser, monkeypatch):
+    monkeypatch.setattr(sql_guard, "_catalog_columns", lambda: {})
+    assert validate_sql("SELECT * FROM anything").tables == ["anything"]
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT * FROM bom", "SELECT * FROM bom\nLIMIT 100"),
+        ("SELECT * FROM bom LIMIT 10", "SELECT * FROM bom LIMIT 10"),
+        ("SELECT * FROM bom LIMIT 500", "SELECT * FROM bom LIMIT 100"),
+        ("SELECT * FROM bom WHERE 자재번호 IN (SELECT 자재번호 FROM migyul LIMIT 5)",
+         "SELECT * FROM bom WHERE 자재번호 IN (SELECT 자재번호 FROM migyul LIMIT 5)\nLIMIT 100"),
+    ],
+)
+def test_apply_row_limit(sql, expected):
+    assert apply_row_limit(sql, 100) == expected
+
+
+# ---------------------------------------------------------
+# check_cost (EXPLAIN 결과를 가짜 plan 으로 대체)
+# ---------------------------------------------------------
+class _FakeBind:
+    class dialect:
+        name = "mysql"
+
+
+class _FakeDB:
+    def get_bind(self):
+        return _FakeBind()
+
+
+def _plan(*rows):
+    return [
+        {"id": sid, "table": table, "type": type_, "rows": n, "extra": extra}
+        for sid, table, type_, n, extra in rows
+    ]
+
+
+@pytest.fixture
+def fake_explain(monkeypatch):
+    plans = {}
+
+    def explain(db, sql):
+        plan = plans["plan"]
+        full_scans = [(r["table"], r["rows"]) for r in plan if r["type"] == "ALL"]
+        examined = {}
+        for r in plan:
+            examined[r["id"]] = examined.get(r["id"], 1) * max(1, r["rows"])
+        return sql_guard.CostEstimate(sum(examined.values()), full_scans, plan)
+
+    monkeypatch.setattr(sql_guard, "_explain", explain)
+    return plans
+
+
+@pytest.mark.parametrize(
+    "sql, extra",
+    [
+        ("SELECT SUM(오더수량) FROM migyul WHERE 상태 LIKE '%5D%' LIMIT 201", "Using where"),
+        ("SELECT * FROM migyul WHERE 상태 = 'X' LIMIT 201", "Using where"),
+        ("SELECT SUM(오더수량) FROM migyul LIMIT 201", ""),
+        ("SELECT 플랜트명, COUNT(*) FROM migyul GROUP BY 플랜트명 LIMIT 201", ""),
+        ("SELECT DISTINCT 상태 FROM migyul LIMIT 201", ""),
+        ("SELECT * FROM migyul ORDER BY 오더수량 LIMIT 201", "Using filesort"),
+    ],
+)
+def test_check_cost_rejects_full_scan(fake_explain, sql, extra):
+    fake_explain["plan"] = _plan((1, "migyul", "ALL", 40_000_000, extra))
+    with pytest.raises(SQLGuardError) as e:
+        sql_guard.SQLGuard().check_cost(_FakeDB(), sql)
+    assert e.value.reason == "full_scan"
+
+
+def test_check_cost_allows_plain_limit_scan(fake_explain):
+    # 필터/정렬/집계 없는 단일 테이블 + LIMIT 은 처음 201 행에서 멈춘다
+    fake_explain["plan"] = _plan((1, "migyul", "ALL", 40_000_000, None))
+    assert sql_guard.SQLGuard().check_cost(_FakeDB(), "SELECT * FROM migyul LIMIT 201") == 40_000_000
+
+
+def test_check_cost_rejects_join_blowup_and_caches_verdict(fake_explain):
+    guard = sql_guard.SQLGuard()
+    fake_explain["plan"] = _plan(
+        (1, "migyul", "range", 100_000, "Using where"),
+        (1, "bom", "ref", 1_000, None),
+    )
+    sql = "SELECT * FROM migyul m JOIN bom b ON m.자재번호 = b.자재번호 WHERE m.생성일 >= '2025-01-01' LIMIT 201"
+    for _ in range(2):
+        with pytest.raises(SQLGuardError) as e:
+            guard.check_cost(_FakeDB(), sql)
+        assert e.value.reason == "too_many_rows"
+    stats = guard.stats()
+    assert stats["explains"] == 1 and stats["explain_cache_hits"] == 1
+    assert stats["rejected"]["too_many_rows"] == 2
+
+
+def test_check_cost_accepts_indexed_range(fake_explain):
+    fake_explain["plan"] = _plan((1, "migyul", "range", 30_000, "Using index condition"))
+    sql = "SELECT * FROM migyul WHERE 생성일 >= '2025-11-01' LIMIT 201"
+    assert sql_guard.SQLGuard().check_cost(_FakeDB(), sql) == 30_000
+
+
+def test_explain_runs_under_statement_timeout(monkeypatch):
+    import contextlib
+
+    entered = []
+
+    @contextlib.contextmanager
+    def fake_timeout(db, timeout=None):
+        entered.append(db)
+        yield
+
+    class Result:
+        def keys(self):
+            return ["id", "table", "type", "rows", "Extra"]
+
+        def fetchall(self):
+            return [(1, "migyul", "ALL", 5, None)]
+
+    class DB(_FakeDB):
+        def execute(self, stmt):
+            assert entered, "EXPLAIN 이 statement_timeout 밖에서 실행됨"
+            return Result()
+
+    monkeypatch.setattr(sql_guard, "statement_timeout", fake_timeout)
+    db = DB()
+    estimate = sql_guard._explain(db, "SELECT * FROM migyul")
+    assert entered == [db]
+    assert estimate.full_scans == [("migyul", 5)]